@@ -0,0 +1,450 @@
+"""
+Veritabanı ve sayfa veri hazırlığı benchmark'ı.
+
+Her ölçek için ayrı bir alt süreçte karalama veritabanı sentetik veriyle doldurulur (benchmarks.synthetic_data),
+ardından db_manager'daki her fonksiyon, Analytics ve Mood Tracker sayfalarının veri hazırlığı (sorgular,
+NumPy istatistikleri, DataFrame'ler; Plotly figürleri hariç) ve auth hash/doğrulama işlemleri ölçülür.
+Ölçümler en yoğun mood geçmişine sahip kullanıcı üzerinden yapılır. Sonuçlar JSON olarak yazılır;
+önceki bir sonuç dosyasıyla karşılaştırılarak gerilemeler yakalanabilir.
+
+    python -m benchmarks.db_suite                                   # tüm ölçekler
+    python -m benchmarks.db_suite --scale small --scale medium --json db_suite.json
+    python -m benchmarks.db_suite --json yeni.json --baseline eski.json --threshold 1.5
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from benchmarks.synthetic_data import SYNTHETIC_PASSWORD, SyntheticProfile, generate, prepare_scratch_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCALES: Dict[str, SyntheticProfile] = {
+    "small": SyntheticProfile(users=10, days=90),
+    "medium": SyntheticProfile(users=100, days=365),
+    "large": SyntheticProfile(users=1000, days=730),
+}
+
+# Performansla ilgisi olmayan yaşam döngüsü fonksiyonları ölçülmez
+UNMEASURED = {"add_insert_listener", "add_delete_listener", "shutdown_storage"}
+# Gerileme karşılaştırmasında bu farkın altındaki değişimler gürültü sayılır
+NOISE_FLOOR_MS = 0.5
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[..., Any]
+    # Her ölçümden önce çağrılır ve fn'e geçirilecek argümanları döner; süresi ölçüme katılmaz
+    setup: Optional[Callable[[], Tuple]] = None
+    repeat: Optional[int] = None
+
+
+def measure(case: Case, repeat: int) -> Dict[str, Any]:
+    timings: List[float] = []
+    error = None
+    try:
+        for _ in range(case.repeat or repeat):
+            args = case.setup() if case.setup else ()
+            started = time.perf_counter()
+            case.fn(*args)
+            timings.append((time.perf_counter() - started) * 1000)
+    except Exception as e:
+        error = repr(e)
+    return {
+        "name": case.name,
+        "runs": len(timings),
+        "min_ms": min(timings) if timings else None,
+        "median_ms": statistics.median(timings) if timings else None,
+        "mean_ms": statistics.fmean(timings) if timings else None,
+        "max_ms": max(timings) if timings else None,
+        "error": error,
+    }
+
+
+# --- Sayfa veri hazırlığı (pages/ içindeki build_* fonksiyonlarının figür dışındaki adımları) ---
+def analytics_data(user_id: int) -> Dict[str, Any]:
+    import pandas as pd
+    from database.db_manager import get_character_counts, get_daily_activity, get_mood_distribution, get_user_totals, list_mood_counts
+    from utils.insights import get_user_insights
+    from utils.mood_stats import WEEKDAY_LABELS, compute_mood_stats
+
+    result: Dict[str, Any] = {"totals": get_user_totals(user_id)}
+    result["mood_distribution"] = pd.DataFrame(get_mood_distribution(user_id), columns=["mood", "count"])
+    result["characters"] = pd.DataFrame(get_character_counts(user_id), columns=["character", "count"])
+    activity = pd.DataFrame(get_daily_activity(user_id), columns=["date", "Rüya", "Mood", "Terapi"])
+    activity["date"] = pd.to_datetime(activity["date"])
+    result["activity"] = activity.melt(id_vars="date", var_name="kayıt", value_name="count")
+    stats = compute_mood_stats(list_mood_counts(user_id))
+    if stats is not None:
+        result["trend"] = pd.DataFrame({"date": stats.days, "valence": stats.rolling_30})
+        result["weekday"] = pd.DataFrame({"gün": WEEKDAY_LABELS, "valence": stats.weekday_valence})
+    result["insights"] = get_user_insights(user_id)
+    return result
+
+
+def mood_data(user_id: int, range_days: Optional[int]) -> Optional[Dict[str, Any]]:
+    import numpy as np
+    import pandas as pd
+    from database.db_manager import get_mood_distribution, list_mood_counts
+    from utils.mood_stats import WEEKDAY_LABELS, compute_mood_stats
+
+    start_day = date.today() - timedelta(days=range_days) if range_days else None
+    stats = compute_mood_stats(list_mood_counts(user_id))
+    if stats is None:
+        return None
+    visible = stats.days >= np.datetime64(start_day) if start_day else slice(None)
+    trend = pd.DataFrame({
+        "date": stats.days[visible],
+        "Günlük": stats.valence[visible],
+        "7 gün ort.": stats.rolling_7[visible],
+        "30 gün ort.": stats.rolling_30[visible],
+    }).melt(id_vars="date", var_name="seri", value_name="valence")
+    return {
+        "trend": trend,
+        "weekday": pd.DataFrame({"gün": WEEKDAY_LABELS, "valence": stats.weekday_valence}),
+        "distribution": pd.DataFrame(get_mood_distribution(user_id, start=start_day), columns=["mood", "count"]),
+    }
+
+
+# --- Ölçüm senaryoları ---
+def _heaviest_user(engine) -> Tuple[int, str]:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        return tuple(conn.execute(text(
+            "SELECT users.id, users.username FROM users JOIN mood_record ON mood_record.user_id = users.id "
+            "GROUP BY users.id ORDER BY COUNT(*) DESC LIMIT 1"
+        )).first())
+
+
+def db_cases(user_id: int, username: str) -> List[Case]:
+    import numpy as np
+    from database import db_manager as db
+    from database.models import DreamAnalysis
+    from benchmarks.synthetic_data import SYNTHETIC_PASSWORD_HASH
+
+    counter = iter(range(10 ** 9))
+    today = date.today()
+    dreams = db.list_dream_analyses(user_id, limit=64)
+    dream_ids = [dream.id for dream in dreams]
+    dream_id = dream_ids[0] if dream_ids else None
+    vector = np.random.default_rng(0).random(384, dtype=np.float32).tobytes()
+    dream_embeddings = [(dream_id, user_id, 384, vector) for dream_id in dream_ids]
+    text_embeddings = [(f"bench-{i:04d}", "bench", 384, vector) for i in range(64)]
+    _, dream_cursor = db.list_dream_analyses_page(user_id)
+    _, mood_cursor = db.list_mood_records_page(user_id)
+    _, therapy_cursor = db.list_character_therapies_page(user_id)
+
+    conversation_id = db.create_conversation(user_id, "therapy", "Benchmark sohbeti", "Sherlock Holmes")
+    db.append_messages(conversation_id, [("user" if i % 2 == 0 else "model", f"Mesaj {i}") for i in range(50)])
+    dream_conversation_id = db.create_conversation(user_id, "dream", "Benchmark rüya sohbeti")
+
+    def add_then(add: Callable[[], None], latest: Callable[[], int]) -> Callable[[], Tuple]:
+        # Silme ölçümleri için her seferinde yeni bir kayıt hazırlanır
+        def setup() -> Tuple:
+            add()
+            return (latest(),)
+        return setup
+
+    def new_conversation() -> Tuple:
+        return (db.create_conversation(user_id, "dream", f"Silinecek {next(counter)}"), user_id)
+
+    def full_pass() -> None:
+        for _ in db.iter_text_chunks(DreamAnalysis, "dream_text"):
+            pass
+
+    return [
+        Case("db.create_db_and_tables", db.create_db_and_tables),
+        Case("db.ensure_database", db.ensure_database),
+        Case("db.data_version", lambda: db.data_version(user_id)),
+        Case("db.flush_writes", db.flush_writes),
+        Case("db.get_user_by_username", lambda: db.get_user_by_username(username)),
+        Case("db.add_user", lambda: db.add_user(f"bench_new_{next(counter)}", SYNTHETIC_PASSWORD_HASH)),
+        Case("db.update_user_password_hash", lambda: db.update_user_password_hash(user_id, SYNTHETIC_PASSWORD_HASH)),
+        # Rüya analizleri
+        Case("db.add_dream_analysis", lambda: db.add_dream_analysis(user_id, "Benchmark rüyası", "Benchmark analizi")),
+        Case("db.list_dream_analyses", lambda: db.list_dream_analyses(user_id)),
+        Case("db.list_dream_analyses_page", lambda: db.list_dream_analyses_page(user_id)),
+        Case("db.list_dream_analyses_page[cursor]", lambda: db.list_dream_analyses_page(user_id, dream_cursor)),
+        Case("db.delete_dream_analysis", db.delete_dream_analysis,
+             setup=lambda: (db.add_dream_analysis(user_id, "Silinecek rüya", "-"),)),
+        # Mood kayıtları ve günlük özet
+        Case("db.add_mood_record", lambda: db.add_mood_record(user_id, "😐 Nötr", "benchmark")),
+        Case("db.list_mood_records", lambda: db.list_mood_records(user_id)),
+        Case("db.list_mood_records_page", lambda: db.list_mood_records_page(user_id)),
+        Case("db.list_mood_records_page[cursor]", lambda: db.list_mood_records_page(user_id, mood_cursor)),
+        Case("db.delete_mood_record", db.delete_mood_record, setup=add_then(
+            lambda: db.add_mood_record(user_id, "😐 Nötr"),
+            lambda: db.list_mood_records(user_id, limit=1)[0].id)),
+        Case("db.list_mood_daily", lambda: db.list_mood_daily(user_id)),
+        Case("db.list_mood_daily[90d]", lambda: db.list_mood_daily(user_id, start=today - timedelta(days=90))),
+        Case("db.list_mood_counts", lambda: db.list_mood_counts(user_id)),
+        Case("db.list_mood_counts[all_users]", lambda: db.list_mood_counts()),
+        Case("db.rebuild_mood_daily", lambda: db.rebuild_mood_daily(user_id)),
+        Case("db.rebuild_mood_daily[all_users]", lambda: db.rebuild_mood_daily(), repeat=1),
+        # Karakter terapisi
+        Case("db.add_character_therapy", lambda: db.add_character_therapy(user_id, "Sherlock Holmes", "Girdi", "Yanıt")),
+        Case("db.list_character_therapies", lambda: db.list_character_therapies(user_id)),
+        Case("db.list_character_therapies_page", lambda: db.list_character_therapies_page(user_id)),
+        Case("db.list_character_therapies_page[cursor]", lambda: db.list_character_therapies_page(user_id, therapy_cursor)),
+        Case("db.delete_character_therapy", db.delete_character_therapy, setup=add_then(
+            lambda: db.add_character_therapy(user_id, "Sherlock Holmes", "Silinecek", "-"),
+            lambda: db.list_character_therapies(user_id, limit=1)[0].id)),
+        # Embedding'ler ve arama
+        Case("db.save_dream_embeddings", lambda: db.save_dream_embeddings(dream_embeddings)),
+        Case("db.load_dream_embeddings", lambda: db.load_dream_embeddings(user_id)),
+        Case("db.list_unindexed_dreams", lambda: db.list_unindexed_dreams(user_id)),
+        Case("db.get_dream_analyses_by_ids", lambda: db.get_dream_analyses_by_ids(user_id, dream_ids[:20])),
+        Case("db.save_text_embeddings", lambda: db.save_text_embeddings(text_embeddings)),
+        Case("db.get_text_embeddings", lambda: db.get_text_embeddings([row[0] for row in text_embeddings])),
+        Case("db.iter_text_chunks[full_pass]", full_pass, repeat=1),
+        Case("db.search_records", lambda: db.search_records(user_id, "rüyamda ışık")),
+        Case("db.search_records[therapy]", lambda: db.search_records(user_id, "kaygılı", kinds=["therapy"])),
+        # Sohbetler
+        Case("db.create_conversation", lambda: db.create_conversation(user_id, "dream", "Benchmark")),
+        Case("db.append_messages", lambda: db.append_messages(conversation_id, [("user", "Soru"), ("model", "Yanıt")])),
+        Case("db.set_conversation_dream", lambda: db.set_conversation_dream(dream_conversation_id, user_id, dream_id)),
+        Case("db.get_conversation", lambda: db.get_conversation(conversation_id, user_id)),
+        Case("db.list_conversations_page", lambda: db.list_conversations_page(user_id, "therapy")),
+        Case("db.load_conversation_messages", lambda: db.load_conversation_messages(conversation_id)),
+        Case("db.delete_conversation", db.delete_conversation, setup=new_conversation),
+        # Analiz sorguları
+        Case("db.list_activity_days", lambda: db.list_activity_days(user_id)),
+        Case("db.get_user_insight", lambda: db.get_user_insight(user_id)),
+        Case("db.save_user_insight", lambda: db.save_user_insight(user_id, db.get_user_insight(user_id).data_version, "{}")),
+        Case("db.list_stale_insight_users", db.list_stale_insight_users),
+        Case("db.get_user_totals", lambda: db.get_user_totals(user_id)),
+        Case("db.get_mood_distribution", lambda: db.get_mood_distribution(user_id)),
+        Case("db.get_mood_distribution[90d]", lambda: db.get_mood_distribution(user_id, start=today - timedelta(days=90))),
+        Case("db.get_character_counts", lambda: db.get_character_counts(user_id)),
+        Case("db.get_daily_activity", lambda: db.get_daily_activity(user_id)),
+        Case("db.get_daily_activity[90d]", lambda: db.get_daily_activity(user_id, since=datetime.utcnow() - timedelta(days=90))),
+    ]
+
+
+def page_cases(user_id: int) -> List[Case]:
+    from database.db_manager import add_mood_record, list_mood_counts
+    from utils.analytics_cache import AnalyticsCache
+    from utils.insights import refresh_stale_insights, refresh_user_insights
+    from utils.mood_stats import compute_mood_stats_batch
+
+    cache = AnalyticsCache()
+
+    def make_stale() -> Tuple:
+        add_mood_record(user_id, "😊 Mutlu")
+        return ()
+
+    return [
+        # Sentetik veri yazıldıktan sonra tüm kullanıcıların analizleri bayattır; ilk sayfa yüklemeleri bunu öder
+        Case("insights.refresh_stale[all_users]", refresh_stale_insights, repeat=1),
+        Case("insights.refresh_user", lambda: refresh_user_insights(user_id)),
+        Case("analytics.prepare", lambda: analytics_data(user_id)),
+        Case("analytics.prepare[stale_insights]", lambda: analytics_data(user_id), setup=make_stale),
+        Case("analytics.prepare[cache_hit]", lambda: cache.get_or_compute(user_id, "analytics", date.today(),
+                                                                         lambda: analytics_data(user_id))),
+        Case("mood.prepare[90d]", lambda: mood_data(user_id, 90)),
+        Case("mood.prepare[all]", lambda: mood_data(user_id, None)),
+        Case("mood.prepare[cache_hit]", lambda: cache.get_or_compute(user_id, "mood_charts", (90, date.today()),
+                                                                    lambda: mood_data(user_id, 90))),
+        Case("mood.stats_batch[all_users]", lambda: compute_mood_stats_batch(list_mood_counts())),
+    ]
+
+
+def auth_cases(username: str, auth_repeat: int, parallel: int) -> List[Case]:
+    from concurrent.futures import ThreadPoolExecutor
+    from database.db_manager import get_user_by_username
+    from utils import auth
+
+    stored_hash = auth.get_password_hash(SYNTHETIC_PASSWORD)
+    token = auth.create_session_token(1, username, 0)
+
+    def login() -> None:
+        # main.py'deki giriş akışı
+        user = get_user_by_username(username)
+        auth.verify_and_update(SYNTHETIC_PASSWORD, user.hashed_password)
+
+    def parallel_logins() -> None:
+        # Aynı anda gelen girişler bcrypt thread havuzunda sıraya girer
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            list(pool.map(lambda _: auth.verify_password(SYNTHETIC_PASSWORD, stored_hash), range(parallel)))
+
+    return [
+        Case("auth.get_password_hash", lambda: auth.get_password_hash(SYNTHETIC_PASSWORD), repeat=auth_repeat),
+        Case("auth.verify_password", lambda: auth.verify_password(SYNTHETIC_PASSWORD, stored_hash), repeat=auth_repeat),
+        Case("auth.verify_and_update", lambda: auth.verify_and_update(SYNTHETIC_PASSWORD, stored_hash), repeat=auth_repeat),
+        Case("auth.login", login, repeat=auth_repeat),
+        Case(f"auth.verify_password[parallel_{parallel}]", parallel_logins, repeat=auth_repeat),
+        Case("auth.create_session_token", lambda: auth.create_session_token(1, username, 0)),
+        Case("auth.verify_session_token", lambda: auth.verify_session_token(token)),
+    ]
+
+
+def _lazy_cases(factory: Callable[[], List[Case]], group: str) -> List[Case]:
+    # Senaryo hazırlığı başarısız olursa (ör. bcrypt kurulumu) grup tek hata satırı olarak raporlanır
+    try:
+        return factory()
+    except Exception as e:
+        message = repr(e)
+
+        def fail() -> None:
+            raise RuntimeError(message)
+        return [Case(f"{group}.setup", fail, repeat=1)]
+
+
+def uncovered_functions(results: List[Dict[str, Any]]) -> List[str]:
+    """
+    db_manager'daki ölçülmeyen public fonksiyonları döner (yeni fonksiyon eklenip suite'e eklenmediyse).
+    """
+    from database import db_manager
+
+    measured = {r["name"].split(".", 1)[1].split("[")[0] for r in results if r["name"].startswith("db.")}
+    public = {name for name, value in inspect.getmembers(db_manager, inspect.isfunction)
+              if not name.startswith("_") and value.__module__ == db_manager.__name__}
+    return sorted(public - measured - UNMEASURED)
+
+
+def run_scale(name: str, db_path: str, repeat: int, auth_repeat: int, parallel: int) -> Dict[str, Any]:
+    """
+    Ölçeği bu süreçte üretir ve ölçer (alt süreçte çağrılır).
+    """
+    prepare_scratch_db(db_path, overwrite=True)
+    generated = generate(SCALES[name])
+    from database.db_manager import engine, flush_writes, list_mood_counts
+
+    user_id, username = _heaviest_user(engine)
+    results = []
+    for cases in (
+        _lazy_cases(lambda: db_cases(user_id, username), "db"),
+        _lazy_cases(lambda: page_cases(user_id), "page"),
+        _lazy_cases(lambda: auth_cases(username, auth_repeat, parallel), "auth"),
+    ):
+        for case in cases:
+            results.append(measure(case, repeat))
+    flush_writes()
+    return {
+        "scale": name,
+        "profile": asdict(SCALES[name]),
+        "rows": generated["rows"],
+        "generate_seconds": generated["seconds"],
+        "db_size_mb": os.path.getsize(db_path) / (1024 * 1024),
+        "user": {"id": user_id, "moods": sum(row[3] for row in list_mood_counts(user_id))},
+        "results": results,
+        "uncovered": uncovered_functions(results),
+    }
+
+
+def run_isolated(name: str, repeat: int, auth_repeat: int, parallel: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="dreammind-bench-") as scratch:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.db_suite", "--child", name, "--db", os.path.join(scratch, f"{name}.db"),
+             "--repeat", str(repeat), "--auth-repeat", str(auth_repeat), "--parallel", str(parallel)],
+            cwd=ROOT, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def environment() -> Dict[str, Any]:
+    import numpy
+    import sqlalchemy
+    from utils.auth import BCRYPT_ROUNDS
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sqlite": sqlite3.sqlite_version,
+        "sqlalchemy": sqlalchemy.__version__,
+        "numpy": numpy.__version__,
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Medyanı temel sonuçtakinin threshold katından fazla olan ölçümleri döner.
+    """
+    previous = {(scale["scale"], r["name"]): r["median_ms"] for scale in baseline["scales"] for r in scale["results"]}
+    regressions = []
+    for scale in report["scales"]:
+        for r in scale["results"]:
+            old = previous.get((scale["scale"], r["name"]))
+            new = r["median_ms"]
+            if old is None or new is None:
+                continue
+            if new > old * threshold and new - old > NOISE_FLOOR_MS:
+                regressions.append(f"{scale['scale']:<7} {r['name']:<45} {old:>10.2f} ms -> {new:>10.2f} ms (x{new / old:.1f})")
+    return regressions
+
+
+def print_report(scale: Dict[str, Any]) -> None:
+    rows = ", ".join(f"{kind}={count}" for kind, count in scale["rows"].items())
+    print(f"\n== {scale['scale']}: {scale['profile']['users']} kullanıcı, {rows}, "
+          f"{scale['db_size_mb']:.1f} MB (üretim {scale['generate_seconds']:.1f} sn); "
+          f"ölçülen kullanıcı {scale['user']['moods']} mood kaydı")
+    print(f"{'ölçüm':<45} {'medyan ms':>10} {'min ms':>10} {'tekrar':>7}")
+    for r in scale["results"]:
+        if r["error"]:
+            print(f"{r['name']:<45} {'HATA':>10}  {r['error']}")
+        else:
+            print(f"{r['name']:<45} {r['median_ms']:>10.2f} {r['min_ms']:>10.2f} {r['runs']:>7}")
+    if scale["uncovered"]:
+        print(f"! Ölçülmeyen db_manager fonksiyonları: {', '.join(scale['uncovered'])}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Veritabanı, sayfa veri hazırlığı ve auth benchmark'ı")
+    parser.add_argument("--scale", choices=list(SCALES), action="append", help="Ölçülecek veri ölçeği/ölçekleri")
+    parser.add_argument("--repeat", type=int, default=20, help="Ölçüm başına tekrar sayısı")
+    parser.add_argument("--auth-repeat", type=int, default=3, help="bcrypt ölçümleri için tekrar sayısı")
+    parser.add_argument("--parallel", type=int, default=8, help="Eşzamanlı giriş ölçümündeki istek sayısı")
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası (gerileme varsa çıkış kodu 1)")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Gerileme sayılacak medyan oranı")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_scale(args.child, args.db, args.repeat, args.auth_repeat, args.parallel)))
+        return
+
+    report = {"environment": environment(), "repeat": args.repeat, "scales": []}
+    for name in args.scale or list(SCALES):
+        print(f"{name} ölçeği üretiliyor ve ölçülüyor...", flush=True)
+        scale = run_isolated(name, args.repeat, args.auth_repeat, args.parallel)
+        report["scales"].append(scale)
+        print_report(scale)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} gerileme (x{args.threshold} eşiği):")
+            print("\n".join(regressions))
+            sys.exit(1)
+        print("\nGerileme yok.")
+
+
+if __name__ == "__main__":
+    main()
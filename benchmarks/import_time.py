@@ -0,0 +1,91 @@
+"""
+Sayfa başına import süresi ölçümü.
+
+Her sayfanın (ve main.py'nin) en üst seviyedeki import'ları ayrı ve temiz bir Python sürecinde sırayla
+import edilir; toplam süre ve en yavaş modüller raporlanır. Streamlit script'i her yeniden
+çalıştırmada bu import'ları tekrar etmez, ancak süreç açılışındaki ilk sayfa yüklemesi bu süreyi öder.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --json import_time.json
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import importlib, json, sys, time
+modules = json.loads(sys.argv[1])
+timings = []
+total_started = time.perf_counter()
+for name in modules:
+    started = time.perf_counter()
+    try:
+        importlib.import_module(name)
+        error = None
+    except Exception as e:
+        error = repr(e)
+    timings.append({"module": name, "ms": (time.perf_counter() - started) * 1000, "error": error})
+heavy = [m for m in ("torch", "diffusers", "google.generativeai", "sentence_transformers") if m in sys.modules]
+print(json.dumps({"total_ms": (time.perf_counter() - total_started) * 1000, "modules": timings, "heavy_loaded": heavy}))
+"""
+
+
+def top_level_imports(path: str) -> List[str]:
+    """
+    Script'in modül seviyesindeki import edilen modül adlarını sırasıyla döner.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules: List[str] = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+
+def measure_script(path: str) -> Dict[str, Any]:
+    modules = top_level_imports(path)
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, json.dumps(modules)],
+        cwd=ROOT, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["script"] = os.path.relpath(path, ROOT)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sayfa import süresi benchmark'ı")
+    parser.add_argument("--top", type=int, default=3, help="Sayfa başına gösterilecek en yavaş modül sayısı")
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    scripts = [os.path.join(ROOT, "main.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+    results = [measure_script(path) for path in scripts]
+    for result in results:
+        slowest = sorted(result["modules"], key=lambda m: m["ms"], reverse=True)[:args.top]
+        details = ", ".join(f"{m['module']} {m['ms']:.0f} ms" for m in slowest)
+        heavy = f" | ağır: {', '.join(result['heavy_loaded'])}" if result["heavy_loaded"] else ""
+        print(f"{result['script']:<40} {result['total_ms']:>8.0f} ms  ({details}){heavy}")
+        for m in result["modules"]:
+            if m["error"]:
+                print(f"    ! {m['module']}: {m['error']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
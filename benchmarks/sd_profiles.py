@@ -0,0 +1,126 @@
+"""
+Stable Diffusion profil karşılaştırması: görsel başına süre ve tepe bellek (RSS).
+
+Her profil ayrı bir alt süreçte ölçülür; böylece tepe RSS değerleri birbirini etkilemez.
+
+    python -m benchmarks.sd_profiles                    # tüm profiller, profil başına 2 görsel
+    python -m benchmarks.sd_profiles --profile fast --images 3 --json sd_profiles.json
+    python -m benchmarks.sd_profiles --batch 4          # ayrıca 4'lü batch ile görsel başına süre
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+BENCH_PROMPT = "a surreal dream of a floating city above a calm ocean at night, soft light"
+
+
+def _peak_rss_mb() -> float:
+    # Linux'ta ru_maxrss KB, macOS'ta bayt cinsindendir
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure_profile(name: str, images: int, batch: int = 0) -> Dict[str, Any]:
+    """
+    Profili bu süreçte yükler ve ölçer (alt süreçte çağrılır).
+    """
+    import torch
+    from diffusers import StableDiffusionPipeline
+    from models.image_store import SD_MODEL_ID
+    from models.sd_profiles import apply_profile, configure_threads, get_profile, warm_up
+
+    profile = get_profile(name)
+    threads = configure_threads(profile)
+    started = time.perf_counter()
+    pipe = StableDiffusionPipeline.from_pretrained(SD_MODEL_ID, torch_dtype=torch.float32)
+    pipe = apply_profile(pipe, profile)
+    load_seconds = time.perf_counter() - started
+
+    warmup_seconds = 0.0
+    if profile.warmup:
+        started = time.perf_counter()
+        warm_up(pipe, profile)
+        warmup_seconds = time.perf_counter() - started
+
+    timings: List[float] = []
+    for i in range(images):
+        generator = torch.Generator(device="cpu").manual_seed(1234 + i)
+        started = time.perf_counter()
+        with torch.inference_mode():
+            pipe(BENCH_PROMPT, num_inference_steps=profile.steps, guidance_scale=profile.guidance,
+                 width=profile.width, height=profile.height, generator=generator)
+        timings.append(time.perf_counter() - started)
+
+    # Aynı sayıda görsel tek pipeline çağrısında (batch) üretilir; ayrı seed'li generator listesiyle
+    batch_seconds = 0.0
+    if batch > 1:
+        generators = [torch.Generator(device="cpu").manual_seed(1234 + i) for i in range(batch)]
+        started = time.perf_counter()
+        with torch.inference_mode():
+            pipe([BENCH_PROMPT] * batch, num_inference_steps=profile.steps, guidance_scale=profile.guidance,
+                 width=profile.width, height=profile.height, generator=generators)
+        batch_seconds = (time.perf_counter() - started) / batch
+
+    return {
+        "profile": profile.name,
+        "scheduler": profile.scheduler,
+        "steps": profile.steps,
+        "resolution": f"{profile.width}x{profile.height}",
+        "threads": threads,
+        "load_seconds": load_seconds,
+        "warmup_seconds": warmup_seconds,
+        "seconds_per_image": sum(timings) / len(timings) if timings else 0.0,
+        "first_image_seconds": timings[0] if timings else 0.0,
+        "batch_size": batch if batch > 1 else 1,
+        "batched_seconds_per_image": batch_seconds,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_isolated(name: str, images: int, batch: int) -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.sd_profiles", "--child", name, "--images", str(images),
+         "--batch", str(batch)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    from models.sd_profiles import SD_PROFILES
+
+    parser = argparse.ArgumentParser(description="Stable Diffusion CPU profil benchmark'ı")
+    parser.add_argument("--profile", choices=list(SD_PROFILES), action="append", help="Ölçülecek profil(ler)")
+    parser.add_argument("--images", type=int, default=2, help="Profil başına üretilecek görsel sayısı")
+    parser.add_argument("--batch", type=int, default=0,
+                        help="Sıralı üretime ek olarak bu boyutta batch ile görsel başına süreyi ölç")
+    parser.add_argument("--json", help="Sonuçların yazılacağı JSON dosyası")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_profile(args.child, args.images, args.batch)))
+        return
+
+    results = []
+    for name in args.profile or list(SD_PROFILES):
+        print(f"{name} ölçülüyor...", flush=True)
+        results.append(run_isolated(name, args.images, args.batch))
+
+    print(f"{'profil':<10} {'çözünürlük':<11} {'adım':>4} {'sn/görsel':>10} {'batch sn/görsel':>16} "
+          f"{'yükleme sn':>11} {'tepe RSS MB':>12}")
+    for r in results:
+        batched = f"{r['batched_seconds_per_image']:.1f} (x{r['batch_size']})" if r["batch_size"] > 1 else "-"
+        print(f"{r['profile']:<10} {r['resolution']:<11} {r['steps']:>4} {r['seconds_per_image']:>10.1f} {batched:>16} "
+              f"{r['load_seconds']:>11.1f} {r['peak_rss_mb']:>12.0f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
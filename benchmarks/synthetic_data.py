@@ -0,0 +1,182 @@
+"""
+Benchmark'lar için tekrarlanabilir sentetik veri üreticisi.
+
+Boş bir veritabanına N kullanıcı ve her kullanıcı için gerçekçi hacimde rüya, mood ve karakter terapisi
+kaydı yazar. Kullanıcıların etkinlik düzeyi log-normal dağılır (birkaç yoğun, çoğu seyrek kullanıcı);
+mood kayıtları günlere Poisson dağılımıyla, rüyalar ve terapi seansları ağırlıklı olarak sabah ve akşam
+saatlerine yayılır. Aynı seed ile her çalıştırmada aynı veri üretilir. Kayıtlar database.transfer
+üzerinden toplu yazılır; mood_daily özeti ve analiz işaretleri uygulamadaki gibi güncellenir.
+
+Veritabanı yolu DREAMMIND_DB_PATH ile okunduğundan üretici ayrı bir karalama dosyası ister:
+
+    python -m benchmarks.synthetic_data --db /tmp/dreammind_bench.db --users 100 --days 365
+"""
+import argparse
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Tuple
+import numpy as np
+
+# Tüm sentetik kullanıcıların şifresi; hash bcrypt maliyeti 12 ile bir kez üretilip sabitlenmiştir
+# (kullanıcı başına bcrypt çalıştırmak üretimi dakikalarca uzatırdı)
+SYNTHETIC_PASSWORD = "dreammind-bench"
+SYNTHETIC_PASSWORD_HASH = "$2b$12$mmV5I6Wg8x1IMHvoeNyeeO0TF7w.MqNBF.enzt0MXX53xMrhZHMuK"
+SYNTHETIC_USERNAME = "bench_user_{:05d}"
+
+_DREAM_SUBJECTS = ["denizin üstünde uçtuğumu", "eski okulumda kaybolduğumu", "annemle İstanbul'da yürüdüğümü",
+                   "sınava geç kaldığımı", "dişlerimin döküldüğünü", "bir ormanda kovalandığımı",
+                   "çocukluk evime döndüğümü", "asansörün durmadan yükseldiğini", "yağmurda ışıkların söndüğünü"]
+_DREAM_DETAILS = ["Her şey çok parlaktı.", "Sonunda uyandım ve kalbim hızlı atıyordu.", "Yanımda tanımadığım biri vardı.",
+                  "Saatler geriye doğru akıyordu.", "Kimse sesimi duymuyordu.", "Garip bir huzur hissettim."]
+_ANALYSES = ["Bu rüya değişim arzusunu ve kontrol ihtiyacını simgeliyor olabilir.",
+             "Kaybolma teması belirsizlik dönemlerinde sık görülür.",
+             "Uçmak özgürlük ve sorumluluklardan kaçış isteğiyle ilişkilendirilir.",
+             "Geçmişe dönüş rüyaları çözülmemiş duyguların işlenmesine işaret eder."]
+_NOTES = ["", "", "", "İş yoğundu.", "Uykumu alamadım.", "Arkadaşlarla güzel vakit geçirdim.", "Spor yaptım.",
+          "Başım ağrıyordu.", "Hava çok güzeldi."]
+_THERAPY_INPUTS = ["Son zamanlarda çok kaygılıyım.", "İşte motivasyonumu kaybettim.", "Ailemle tartıştım.",
+                   "Uyku düzenim bozuldu.", "Kendimi yalnız hissediyorum.", "Bir karar vermem gerekiyor."]
+_THERAPY_RESPONSES = ["Bunu fark etmen önemli bir ilk adım.", "Bu duyguyu en son ne zaman yoğun yaşadın?",
+                      "Küçük ve ölçülebilir bir hedefle başlayalım.", "Kendine biraz daha şefkatle yaklaşabilirsin."]
+_FALLBACK_CHARACTERS = ["Sherlock Holmes", "Firdevs Hanım", "Ramiz Dayı", "Aksakallı Dede"]
+
+
+@dataclass
+class SyntheticProfile:
+    """
+    Ortalama kullanıcının veri hacmi; kullanıcı başına hacimler etkinlik çarpanıyla ölçeklenir.
+    """
+    users: int = 100
+    days: int = 365               # geçmişin uzunluğu (bugünden geriye)
+    moods_per_day: float = 1.2
+    dream_probability: float = 0.3    # bir günde rüya kaydı olma olasılığı
+    therapy_per_day: float = 0.2
+    activity_sigma: float = 0.8   # kullanıcı etkinlik çarpanının log-normal yayılımı
+    seed: int = 42
+
+
+def _characters() -> List[str]:
+    try:
+        from models.gemini_client import CHARACTER_THERAPY_PROMPTS
+        return list(CHARACTER_THERAPY_PROMPTS)
+    except Exception:
+        return _FALLBACK_CHARACTERS
+
+
+def _timestamps(rng: np.random.Generator, start: datetime, day_offsets: np.ndarray) -> List[datetime]:
+    # Gün içinde sabah (08:00) ve akşam (21:00) civarında yoğunlaşan saatler
+    evening = rng.random(len(day_offsets)) < 0.6
+    hours = np.clip(np.where(evening, rng.normal(21, 1.5, len(day_offsets)), rng.normal(8, 1.5, len(day_offsets))), 0, 23.99)
+    seconds = day_offsets * 86400 + (hours * 3600).astype(np.int64)
+    return [start + timedelta(seconds=int(value)) for value in np.sort(seconds)]
+
+
+def iter_user_rows(rng: np.random.Generator, user_id: int, profile: SyntheticProfile, start: datetime,
+                   characters: List[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Tek kullanıcının (tür, kayıt) satırlarını üretir.
+    """
+    from utils.mood_stats import MOOD_OPTIONS
+
+    activity = rng.lognormal(0.0, profile.activity_sigma)
+    # Kullanıcının bir "ruh hali eğilimi" vardır; etiketler bu eğilime göre ağırlıklı seçilir
+    mood_weights = rng.dirichlet(np.full(len(MOOD_OPTIONS), 0.6))
+
+    mood_days = np.repeat(np.arange(profile.days), rng.poisson(profile.moods_per_day * activity, profile.days))
+    labels = rng.choice(len(MOOD_OPTIONS), size=len(mood_days), p=mood_weights)
+    notes = rng.integers(0, len(_NOTES), size=len(mood_days))
+    for created_at, label, note in zip(_timestamps(rng, start, mood_days), labels, notes):
+        yield "mood", {"user_id": user_id, "created_at": created_at, "mood": MOOD_OPTIONS[label],
+                       "note": _NOTES[note] or None}
+
+    dream_days = np.flatnonzero(rng.random(profile.days) < min(1.0, profile.dream_probability * activity))
+    for created_at in _timestamps(rng, start, dream_days):
+        subject, detail, analysis = (rng.integers(0, len(items)) for items in (_DREAM_SUBJECTS, _DREAM_DETAILS, _ANALYSES))
+        yield "dream", {"user_id": user_id, "created_at": created_at,
+                        "dream_text": f"Rüyamda {_DREAM_SUBJECTS[subject]} gördüm. {_DREAM_DETAILS[detail]}",
+                        "analysis_result": _ANALYSES[analysis]}
+
+    favourites = rng.choice(len(characters), size=min(2, len(characters)), replace=False)
+    therapy_days = np.repeat(np.arange(profile.days), rng.poisson(profile.therapy_per_day * activity, profile.days))
+    for created_at in _timestamps(rng, start, therapy_days):
+        # Seansların çoğu kullanıcının favori karakterleriyle
+        character = favourites[rng.integers(0, len(favourites))] if rng.random() < 0.8 else rng.integers(0, len(characters))
+        yield "therapy", {"user_id": user_id, "created_at": created_at, "character": characters[character],
+                          "user_input": _THERAPY_INPUTS[rng.integers(0, len(_THERAPY_INPUTS))],
+                          "ai_response": _THERAPY_RESPONSES[rng.integers(0, len(_THERAPY_RESPONSES))]}
+
+
+def generate(profile: SyntheticProfile) -> Dict[str, Any]:
+    """
+    Yapılandırılmış veritabanına kullanıcıları ve kayıtlarını yazar; satır sayılarını ve süreyi döner.
+    Veritabanı boş olmalıdır (kullanıcı adları çakışır).
+    """
+    from sqlalchemy import insert
+    from database.db_manager import create_db_and_tables, engine
+    from database.models import User
+    from database.transfer import import_rows
+
+    started = time.perf_counter()
+    create_db_and_tables()
+    with engine.begin() as conn:
+        result = conn.execute(
+            insert(User).returning(User.id),
+            [{"username": SYNTHETIC_USERNAME.format(i), "hashed_password": SYNTHETIC_PASSWORD_HASH}
+             for i in range(profile.users)],
+        )
+        user_ids = sorted(row[0] for row in result)
+
+    rng = np.random.default_rng(profile.seed)
+    characters = _characters()
+    # Geçmiş dün biter; bugünkü yazmalar benchmark'ların kendisine kalır
+    start = datetime.combine(datetime.utcnow().date(), datetime.min.time()) - timedelta(days=profile.days)
+
+    def rows() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for user_id in user_ids:
+            yield from iter_user_rows(rng, user_id, profile, start, characters)
+
+    counts = import_rows(rows())
+    return {"profile": asdict(profile), "user_ids": user_ids, "rows": counts,
+            "seconds": time.perf_counter() - started}
+
+
+def prepare_scratch_db(path: str, overwrite: bool = False) -> None:
+    """
+    DREAMMIND_DB_PATH'i karalama dosyasına yönlendirir; db_manager import edilmeden önce çağrılmalıdır.
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            raise SystemExit(f"{path} zaten var; üzerine yazmak için --overwrite kullanın.")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    os.environ["DREAMMIND_DB_PATH"] = path
+
+
+def main() -> None:
+    defaults = SyntheticProfile()
+    parser = argparse.ArgumentParser(description="Sentetik DreamMind verisi üret")
+    parser.add_argument("--db", required=True, help="Karalama veritabanı dosyası (DREAMMIND_DB_PATH)")
+    parser.add_argument("--overwrite", action="store_true", help="Dosya varsa silip yeniden üret")
+    parser.add_argument("--users", type=int, default=defaults.users, help="Kullanıcı sayısı")
+    parser.add_argument("--days", type=int, default=defaults.days, help="Geçmişin gün cinsinden uzunluğu")
+    parser.add_argument("--moods-per-day", type=float, default=defaults.moods_per_day, help="Gün başına ortalama mood kaydı")
+    parser.add_argument("--dream-probability", type=float, default=defaults.dream_probability, help="Günlük rüya kaydı olasılığı")
+    parser.add_argument("--therapy-per-day", type=float, default=defaults.therapy_per_day, help="Gün başına ortalama terapi seansı")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Rastgelelik tohumu")
+    args = parser.parse_args()
+
+    prepare_scratch_db(args.db, args.overwrite)
+    profile = SyntheticProfile(users=args.users, days=args.days, moods_per_day=args.moods_per_day,
+                               dream_probability=args.dream_probability, therapy_per_day=args.therapy_per_day,
+                               seed=args.seed)
+    result = generate(profile)
+    summary = ", ".join(f"{kind}={count}" for kind, count in result["rows"].items())
+    print(f"{args.db}: {profile.users} kullanıcı, {summary} ({result['seconds']:.1f} sn)")
+    print(f"Kullanıcı adları {SYNTHETIC_USERNAME.format(0)}..., şifre: {SYNTHETIC_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
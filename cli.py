@@ -0,0 +1,70 @@
+"""
+DreamMind komut satırı araçları: kullanıcı verilerinin toplu dışa/içe aktarımı.
+
+    python cli.py export --out yedek.jsonl.gz                    # tüm kullanıcılar
+    python cli.py export --user ayse --format parquet --out yedek/
+    python cli.py import yedek.jsonl.gz                          # dosyadaki user_id'ler korunur
+    python cli.py import yedek/ --user ayse                      # tüm kayıtlar ayse'ye aktarılır
+
+İçe aktarım mevcut kayıtlarla eşleştirme yapmaz; aynı dosyayı iki kez aktarmak satırları çoğaltır.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, Optional
+from database import db_manager
+from database.transfer import FORMATS, TRANSFER_CHUNK_SIZE, TransferError, export_data, import_data
+
+
+def _resolve_user(username: Optional[str]) -> Optional[int]:
+    if username is None:
+        return None
+    user = db_manager.get_user_by_username(username)
+    if user is None:
+        raise SystemExit(f"Kullanıcı bulunamadı: {username}")
+    return user.id
+
+
+def _print_progress(kind: str, count: int) -> None:
+    print(f"\r{kind}: {count} satır", end="", file=sys.stderr, flush=True)
+
+
+def _print_summary(verb: str, counts: Dict[str, int], started: float) -> None:
+    print(file=sys.stderr)
+    summary = ", ".join(f"{kind}={count}" for kind, count in counts.items())
+    print(f"{verb}: {summary} ({time.perf_counter() - started:.1f} sn)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DreamMind veri aktarım araçları")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Rüya, mood ve terapi kayıtlarını dışa aktar")
+    export_parser.add_argument("--out", required=True, help="Çıktı dosyası (jsonl, .gz ile sıkıştırılır) veya dizini (parquet)")
+    export_parser.add_argument("--format", choices=FORMATS, default="jsonl", help="Çıktı biçimi")
+    export_parser.add_argument("--user", help="Yalnızca bu kullanıcının verilerini aktar")
+    export_parser.add_argument("--chunk-size", type=int, default=TRANSFER_CHUNK_SIZE, help="Parça başına satır sayısı")
+
+    import_parser = subparsers.add_parser("import", help="Dışa aktarılmış kayıtları içe aktar (tekrar aktarım satırları çoğaltır)")
+    import_parser.add_argument("path", help="JSONL dosyası veya Parquet dosyası/dizini")
+    import_parser.add_argument("--user", help="Tüm kayıtları bu kullanıcıya aktar (verilmezse dosyadaki user_id korunur ve var olmalıdır)")
+    import_parser.add_argument("--chunk-size", type=int, default=TRANSFER_CHUNK_SIZE, help="Transaction başına satır sayısı")
+
+    args = parser.parse_args()
+    db_manager.create_db_and_tables()
+    user_id = _resolve_user(args.user)
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            counts = export_data(args.out, args.format, user_id, args.chunk_size, _print_progress)
+            _print_summary("Dışa aktarıldı", counts, started)
+        else:
+            counts = import_data(args.path, user_id, args.chunk_size, _print_progress)
+            _print_summary("İçe aktarıldı", counts, started)
+    except TransferError as e:
+        print(file=sys.stderr)
+        raise SystemExit(f"Aktarım hatası: {e}")
+
+
+if __name__ == "__main__":
+    main()
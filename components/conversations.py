@@ -0,0 +1,78 @@
+import streamlit as st
+from typing import List, Optional, Tuple
+from database.db_manager import (
+    create_conversation, append_messages, get_conversation, list_conversations_page, load_conversation_messages,
+)
+from database.models import Conversation
+from components.history import get_history_rows, render_load_older, reset_history
+
+# Sayfa yenilendiğinde sohbete geri dönebilmek için URL'de tutulan parametre
+CONVERSATION_PARAM = "conversation"
+
+
+def start_persisted_conversation(kind: str, title: str, character: Optional[str] = None) -> Optional[int]:
+    """
+    Giriş yapmış kullanıcı için yeni sohbet kaydı açar ve id'sini URL'ye yazar. Misafirler için None döner.
+    """
+    if not st.session_state.get('logged_in'):
+        return None
+    conversation_id = create_conversation(st.session_state['user_id'], kind, title, character)
+    st.query_params[CONVERSATION_PARAM] = str(conversation_id)
+    reset_history(f"{kind}_conversations")
+    return conversation_id
+
+
+def persist_turn(conversation_id: Optional[int], user_message: str, ai_response: str) -> None:
+    """
+    Tamamlanan sohbet turunu (kullanıcı + model mesajı) tek yazımda ekler.
+    """
+    if conversation_id:
+        append_messages(conversation_id, [("user", user_message), ("model", ai_response)])
+
+
+def requested_conversation(kind: str) -> Optional[Tuple[Conversation, List[Tuple[str, str]]]]:
+    """
+    URL'deki sohbet parametresi bu kullanıcının ilgili türdeki bir sohbetini gösteriyorsa
+    başlığı ve mesajlarını döner.
+    """
+    if not st.session_state.get('logged_in'):
+        return None
+    raw_id = st.query_params.get(CONVERSATION_PARAM)
+    if not raw_id or not raw_id.isdigit():
+        return None
+    conversation = get_conversation(int(raw_id), st.session_state['user_id'])
+    if conversation is None or conversation.kind != kind:
+        return None
+    return conversation, load_conversation_messages(conversation.id)
+
+
+def clear_conversation_param() -> None:
+    if CONVERSATION_PARAM in st.query_params:
+        del st.query_params[CONVERSATION_PARAM]
+
+
+def render_saved_conversations(kind: str) -> Optional[int]:
+    """
+    Kayıtlı sohbet başlıklarını (mesaj gövdeleri yüklenmeden) listeler.
+    Kullanıcı "Devam Et" butonuna bastıysa ilgili sohbetin id'sini döner.
+    """
+    def fetch_conversation_page(cursor):
+        return list_conversations_page(st.session_state['user_id'], kind, cursor, page_size=10)
+
+    key = f"{kind}_conversations"
+    conversations = get_history_rows(key, fetch_conversation_page)
+    if not conversations:
+        st.info("Henüz kayıtlı sohbetiniz yok.")
+        return None
+    selected = None
+    for conversation in conversations:
+        col_title, col_action = st.columns([4, 1])
+        with col_title:
+            character = f" · {conversation.character}" if conversation.character else ""
+            st.markdown(f"**{conversation.title}**{character}")
+            st.caption(f"{conversation.updated_at.strftime('%d.%m.%Y %H:%M')} · {conversation.message_count} mesaj")
+        with col_action:
+            if st.button("▶️ Devam Et", key=f"resume_{key}_{conversation.id}"):
+                selected = conversation.id
+    render_load_older(key, fetch_conversation_page)
+    return selected
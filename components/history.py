@@ -0,0 +1,52 @@
+import streamlit as st
+from typing import Any, Callable, List, Optional, Tuple
+
+# fetch_page(cursor) -> (kayıtlar, sonraki imleç)
+FetchPage = Callable[[Optional[str]], Tuple[List[Any], Optional[str]]]
+
+
+def _state_key(key: str) -> str:
+    return f"{key}_history_pages"
+
+
+def get_history_rows(key: str, fetch_page: FetchPage) -> List[Any]:
+    """
+    Geçmiş listesinin şimdiye kadar yüklenmiş kayıtlarını döner.
+    İlk çağrıda yalnızca ilk sayfa yüklenir; sonraki rerun'larda veritabanına gidilmez.
+    """
+    state_key = _state_key(key)
+    if state_key not in st.session_state:
+        rows, cursor = fetch_page(None)
+        st.session_state[state_key] = {"rows": list(rows), "cursor": cursor}
+    return st.session_state[state_key]["rows"]
+
+
+def render_load_older(key: str, fetch_page: FetchPage) -> None:
+    """
+    Daha eski kayıt varsa "daha eski kayıtları yükle" butonunu gösterir.
+    Buton yalnızca bir sonraki sayfayı imleç ile çeker ve listeye ekler.
+    """
+    state = st.session_state.get(_state_key(key))
+    if not state or not state["cursor"]:
+        return
+    if st.button("⬇️ Daha eski kayıtları yükle", key=f"{key}_load_older", use_container_width=True):
+        rows, cursor = fetch_page(state["cursor"])
+        state["rows"].extend(rows)
+        state["cursor"] = cursor
+        st.rerun()
+
+
+def drop_history_row(key: str, record_id: int) -> None:
+    """
+    Silinen kaydı yüklenmiş listeden çıkarır (diğer sayfaları yeniden yüklemeden).
+    """
+    state = st.session_state.get(_state_key(key))
+    if state:
+        state["rows"] = [row for row in state["rows"] if row.id != record_id]
+
+
+def reset_history(key: str) -> None:
+    """
+    Yeni kayıt eklendiğinde listeyi sıfırlar; bir sonraki çizimde ilk sayfa yeniden yüklenir.
+    """
+    st.session_state.pop(_state_key(key), None)
@@ -0,0 +1,85 @@
+import json
+import streamlit as st
+import streamlit.components.v1 as components
+from database.db_manager import ensure_database, get_token_version, revoke_session_tokens
+from utils.auth import SESSION_TTL_SECONDS, create_session_token, verify_session_token
+
+# Sayfa yenilendiğinde girişin korunması için imzalı oturum token'ının tutulduğu çerez.
+# Token URL'ye yazılmaz; tarayıcı geçmişine, paylaşılan linklere ve erişim loglarına düşmez.
+SESSION_COOKIE = "dreammind_session"
+# Eski sürümlerin token'ı taşıdığı URL parametresi; görülürse adres çubuğundan silinir
+LEGACY_SESSION_PARAM = "session"
+# Bir sonraki çizimde tarayıcıya yazılacak çerez değeri ("" çerezi siler)
+_PENDING_COOKIE_KEY = "_session_cookie_pending"
+
+
+def _queue_cookie(value: str) -> None:
+    # start_session/end_session'dan hemen sonra st.rerun() çağrılır; çerez bir sonraki çizimde yazılır
+    st.session_state[_PENDING_COOKIE_KEY] = value
+
+
+def _write_pending_cookie() -> None:
+    value = st.session_state.pop(_PENDING_COOKIE_KEY, None)
+    if value is None:
+        return
+    max_age = SESSION_TTL_SECONDS if value else 0
+    # Bileşen iframe'i uygulamayla aynı origin'dedir; çerez üst belgeye yazılır
+    components.html(
+        "<script>"
+        f"parent.document.cookie = {json.dumps(SESSION_COOKIE)} + '=' + {json.dumps(value)}"
+        f" + '; Path=/; Max-Age={max_age}; SameSite=Strict'"
+        " + (parent.location.protocol === 'https:' ? '; Secure' : '');"
+        "</script>",
+        height=0,
+    )
+
+
+def start_session(user_id: int, username: str) -> None:
+    """
+    Girişi session state'e yazar ve imzalı token'ı çereze yazılmak üzere sıraya alır.
+    """
+    st.session_state.logged_in = True
+    st.session_state.is_guest = False
+    st.session_state.user_id = user_id
+    st.session_state.username = username
+    token = create_session_token(user_id, username, get_token_version(user_id) or 0)
+    _queue_cookie(token)
+
+
+def restore_session() -> None:
+    """
+    Her sayfanın başında (set_page_config'ten sonra) çağrılır. Bekleyen çerez yazımını yapar; yeni sekme veya
+    yenilemede çerezdeki token imzası, süresi ve kullanıcının güncel token versiyonu geçerliyse girişi
+    bcrypt'e gitmeden geri yükler.
+    """
+    _write_pending_cookie()
+    if LEGACY_SESSION_PARAM in st.query_params:
+        del st.query_params[LEGACY_SESSION_PARAM]
+    if st.session_state.get('logged_in'):
+        return
+    token = st.context.cookies.get(SESSION_COOKIE)
+    claims = verify_session_token(token)
+    if claims is None:
+        return
+    user_id, username, token_version = claims
+    # Sayfa yeni bir süreçte ilk açılan olabilir; token_version kolonu migration'la gelir
+    ensure_database()
+    # Çıkış yapılınca versiyon artar; eski token'lar (başka cihazlardakiler dahil) artık kabul edilmez
+    if get_token_version(user_id) != token_version:
+        return
+    st.session_state.logged_in = True
+    st.session_state.is_guest = False
+    st.session_state.user_id = user_id
+    st.session_state.username = username
+
+
+def end_session() -> None:
+    """
+    Kullanıcının tüm oturum token'larını iptal eder, session state'i ve çerezi temizler.
+    """
+    user_id = st.session_state.get('user_id') if st.session_state.get('logged_in') else None
+    if user_id is not None:
+        revoke_session_tokens(user_id)
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    _queue_cookie("")
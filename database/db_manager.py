@@ -1,20 +1,240 @@
+import atexit
+import base64
 import os
-from sqlalchemy import create_engine
+import threading
+from datetime import date, datetime
+from collections import defaultdict
+from sqlalchemy import create_engine, event, func, text, tuple_, update
 from sqlalchemy.orm import sessionmaker
-from database.models import Base, DreamAnalysis, MoodRecord, CharacterTherapy, User
-from typing import List, Optional
+from database.models import Base, DreamAnalysis, MoodRecord, CharacterTherapy, User, Conversation, Message, DreamEmbedding, TextEmbedding, DreamImage, MoodDaily, UserInsight
+from database.migrations import run_migrations
+from database.insights import ACTIVITY_SQL, DATA_VERSION_SQL, MARK_ALL_STALE_SQL, MARK_STALE_SQL, SAVE_SQL, STALE_USERS_SQL
+from database.mood_daily import (
+    COUNTS_SQL, DISTRIBUTION_SQL, REBUILD_SQL, REBUILD_USER_SQL, REFRESH_DAY_SQL, UPSERT_SQL, day_range, refresh_day_params, upsert_params,
+)
+from database.search import FTS_SOURCES, build_match_expression, make_snippet, query_terms, ranked_query, tr_fold
+from database.write_queue import WriteBehindQueue
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from loguru import logger
 
 # Veritabanı dosya yolu
 DB_PATH = os.getenv("DREAMMIND_DB_PATH", "dreammind.db")
 DB_URL = f"sqlite:///{DB_PATH}"
 
+# SQLite depolama modu: "wal" (eşzamanlı okuma/yazma için önerilen) veya "default" (rollback journal)
+DB_MODE = os.getenv("DREAMMIND_DB_MODE", "wal").lower()
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DREAMMIND_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_MMAP_SIZE = int(os.getenv("DREAMMIND_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("DREAMMIND_DB_CACHE_SIZE_KB", str(64 * 1024)))
+# Arka planda tek yazıcı thread'i ile toplu insert (opsiyonel)
+WRITE_BEHIND = os.getenv("DREAMMIND_WRITE_BEHIND", "0") == "1"
+
 # SQLAlchemy engine ve session
 engine = create_engine(DB_URL, connect_args={"check_same_thread": False}, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Veritabanını ve tabloları oluştur
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Her yeni SQLite bağlantısı için performans pragma'larını ayarlar.
+    """
+    # FTS trigger'ları Türkçe sadeleştirme fonksiyonunu kullanır
+    dbapi_connection.create_function("tr_fold", 1, tr_fold, deterministic=True)
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+        if DB_MODE == "wal":
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+# Commit sonrası dinleyiciler (ör. arama indeksleri). Dinleyici hataları yazmayı etkilemez.
+_insert_listeners: List[Callable[[list], None]] = []
+_delete_listeners: List[Callable[[type, int, int], None]] = []
+
+def add_insert_listener(callback: Callable[[list], None]) -> None:
+    """
+    Kayıtlar commit edildikten sonra eklenen ORM nesneleriyle çağrılacak fonksiyonu kaydeder.
+    """
+    if callback not in _insert_listeners:
+        _insert_listeners.append(callback)
+
+def add_delete_listener(callback: Callable[[type, int, int], None]) -> None:
+    """
+    Kayıt silindikten sonra (model sınıfı, kayıt id, user_id) ile çağrılacak fonksiyonu kaydeder.
+    """
+    if callback not in _delete_listeners:
+        _delete_listeners.append(callback)
+
+def _notify_inserted(records: list) -> None:
+    for callback in _insert_listeners:
+        try:
+            callback(records)
+        except Exception as e:
+            logger.error(f"Insert dinleyicisi hatası: {e}")
+
+def _notify_deleted(model, record_id: int, user_id: int) -> None:
+    for callback in _delete_listeners:
+        try:
+            callback(model, record_id, user_id)
+        except Exception as e:
+            logger.error(f"Delete dinleyicisi hatası: {e}")
+
+def _write_batch(records: list) -> None:
+    """
+    Kayıtları tek bir transaction içinde yazar.
+    """
+    # Commit sonrası dinleyiciler nesne alanlarını yeniden sorgu atmadan okuyabilsin
+    session = SessionLocal(expire_on_commit=False)
+    try:
+        session.add_all(records)
+        _apply_write_side_effects(session, records)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+    _notify_inserted(records)
+
+def _apply_write_side_effects(session, records: list) -> None:
+    """
+    Eklenen kayıtlara bağlı türetilmiş verileri aynı transaction içinde günceller.
+    """
+    # Sohbet başlıklarındaki mesaj sayısı ve son güncelleme zamanı
+    appended = defaultdict(list)
+    for record in records:
+        if isinstance(record, Message):
+            appended[record.conversation_id].append(record.created_at or datetime.utcnow())
+    for conversation_id, timestamps in appended.items():
+        session.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(message_count=Conversation.message_count + len(timestamps), updated_at=max(timestamps))
+        )
+    # Kullanıcının çapraz sinyal analizleri bayatlar
+    _mark_insights_stale(session, {record.user_id for record in records
+                                   if isinstance(record, (DreamAnalysis, MoodRecord, CharacterTherapy))})
+    # Günlük mood özeti; id ve created_at için kayıtlar önce flush edilir
+    moods = [record for record in records if isinstance(record, MoodRecord)]
+    if moods:
+        session.flush()
+        for record in moods:
+            session.execute(text(UPSERT_SQL), upsert_params(record.user_id, record.mood, record.id, record.created_at))
+
+def _mark_insights_stale(session, user_ids) -> None:
+    for user_id in user_ids:
+        session.execute(text(MARK_STALE_SQL), {"user_id": user_id})
+
+_write_queue: Optional[WriteBehindQueue] = WriteBehindQueue(_write_batch).start() if WRITE_BEHIND else None
+
+def _save_record(record) -> None:
+    _save_records([record])
+
+def data_version(user_id: int) -> int:
+    """
+    Kullanıcının verisinin veritabanındaki versiyonunu (user_insight.data_version) döner. Her kayıt ekleme/silme
+    versiyonu aynı transaction'da artırdığından başka süreçlerin (cli import, arka plan işleri) yazmaları da
+    görülür. Tek satırlık birincil anahtar okumasıdır; analiz önbelleği anahtarlarında kullanılır.
+    """
+    _flush_pending_writes()
+    with engine.connect() as conn:
+        return conn.execute(text(DATA_VERSION_SQL), {"user_id": user_id}).scalar() or 0
+
+def _save_records(records: list) -> None:
+    # Write-behind modu açıksa kayıtlar kuyruğa alınır, değilse tek transaction'da hemen commit edilir
+    if _write_queue is not None:
+        for record in records:
+            _write_queue.submit(record)
+    else:
+        _write_batch(records)
+
+def _flush_pending_writes() -> None:
+    # Okumalardan önce kuyruktaki kayıtları yaz (read-your-writes)
+    if _write_queue is not None:
+        _write_queue.flush()
+
+def flush_writes() -> None:
+    """
+    Write-behind kuyruğundaki tüm kayıtların commit edilmesini bekler.
+    """
+    _flush_pending_writes()
+
+def shutdown_storage() -> None:
+    """
+    Kuyruğu boşaltıp yazıcı thread'ini durdurur ve WAL içeriğini ana dosyaya aktarır (fsync).
+    """
+    global _write_queue
+    if _write_queue is not None:
+        _write_queue.close()
+        _write_queue = None
+    if DB_MODE == "wal":
+        try:
+            with engine.connect() as conn:
+                conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        except Exception as e:
+            logger.error(f"WAL checkpoint başarısız: {e}")
+    engine.dispose()
+
+atexit.register(shutdown_storage)
+
+# Veritabanını ve tabloları oluştur, bekleyen migration'ları uygula
 def create_db_and_tables():
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+_db_ready = False
+_db_ready_lock = threading.Lock()
+
+def ensure_database() -> None:
+    """
+    Tabloları ve migration'ları süreç başına yalnızca bir kez çalıştırır (Streamlit her etkileşimde script'i yeniden çalıştırır).
+    """
+    global _db_ready
+    if _db_ready:
+        return
+    with _db_ready_lock:
+        if not _db_ready:
+            create_db_and_tables()
+            _db_ready = True
+
+# Keyset (cursor) sayfalama yardımcıları
+def _encode_cursor(created_at: datetime, record_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, record_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(record_id)
+    except Exception as e:
+        raise ValueError("Geçersiz sayfalama imleci.") from e
+
+def _list_page(model, user_id: int, cursor: Optional[str], page_size: int, order_column=None, filters=()) -> Tuple[list, Optional[str]]:
+    """
+    (created_at, id) (veya verilen sıralama kolonu, id) üzerinden keyset sayfalama yapar; OFFSET
+    kullanılmadığı için her sayfanın maliyeti geçmişte ne kadar geriye gidildiğinden bağımsızdır.
+    """
+    order_column = order_column if order_column is not None else model.created_at
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        query = session.query(model).filter(model.user_id == user_id, *filters)
+        if cursor:
+            position, record_id = _decode_cursor(cursor)
+            query = query.filter(tuple_(order_column, model.id) < tuple_(position, record_id))
+        rows = query.order_by(order_column.desc(), model.id.desc()).limit(page_size + 1).all()
+    finally:
+        session.close()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = _encode_cursor(getattr(rows[-1], order_column.key), rows[-1].id)
+    return rows, next_cursor
 
 # User işlemleri
 def get_user_by_username(username: str) -> Optional[User]:
@@ -35,83 +255,541 @@ def add_user(username: str, hashed_password: str) -> User:
     finally:
         session.close()
 
-# DreamAnalysis işlemleri
-def add_dream_analysis(user_id: int, dream_text: str, analysis_result: str) -> None:
+def update_user_password_hash(user_id: int, hashed_password: str) -> None:
+    """
+    Kullanıcının şifre hash'ini değiştirir (bcrypt maliyeti değiştiğinde yeniden hash için).
+    """
     session = SessionLocal()
     try:
-        record = DreamAnalysis(user_id=user_id, dream_text=dream_text, analysis_result=analysis_result)
-        session.add(record)
+        session.query(User).filter(User.id == user_id).update({User.hashed_password: hashed_password})
         session.commit()
     finally:
         session.close()
 
+def get_token_version(user_id: int) -> Optional[int]:
+    """
+    Kullanıcının güncel oturum token versiyonunu döner (kullanıcı yoksa None); tek kolonluk birincil anahtar okuması.
+    """
+    session = SessionLocal()
+    try:
+        row = session.query(User.token_version).filter(User.id == user_id).first()
+        return row[0] if row else None
+    finally:
+        session.close()
+
+def revoke_session_tokens(user_id: int) -> None:
+    """
+    Token versiyonunu artırarak kullanıcıya verilmiş tüm oturum token'larını geçersiz kılar.
+    """
+    session = SessionLocal()
+    try:
+        session.query(User).filter(User.id == user_id).update({User.token_version: User.token_version + 1})
+        session.commit()
+    finally:
+        session.close()
+
+# DreamAnalysis işlemleri
+def add_dream_analysis(user_id: int, dream_text: str, analysis_result: str) -> int:
+    """
+    Rüya analizini write-behind kuyruğunu beklemeden yazar ve id'sini döner (görsel bağlantısı id ister).
+    """
+    record = DreamAnalysis(user_id=user_id, dream_text=dream_text, analysis_result=analysis_result)
+    # Kuyrukta bekleyen önceki kayıtlar sıra bozulmasın diye önce yazılır
+    _flush_pending_writes()
+    _write_batch([record])
+    return record.id
+
 def list_dream_analyses(user_id: int, limit: int = 10) -> List[DreamAnalysis]:
+    _flush_pending_writes()
     session = SessionLocal()
     try:
         return session.query(DreamAnalysis).filter(DreamAnalysis.user_id == user_id).order_by(DreamAnalysis.created_at.desc()).limit(limit).all()
     finally:
         session.close()
 
+def list_dream_analyses_page(user_id: int, cursor: Optional[str] = None, page_size: int = 20) -> Tuple[List[DreamAnalysis], Optional[str]]:
+    """
+    Rüya analizlerini yeniden eskiye sayfa sayfa döner: (kayıtlar, sonraki sayfa imleci).
+    Son sayfada imleç None olur.
+    """
+    return _list_page(DreamAnalysis, user_id, cursor, page_size)
+
 def delete_dream_analysis(record_id: int) -> None:
+    _flush_pending_writes()
     session = SessionLocal()
     try:
         record = session.query(DreamAnalysis).filter(DreamAnalysis.id == record_id).first()
         if record:
+            user_id = record.user_id
             session.delete(record)
+            session.query(DreamEmbedding).filter(DreamEmbedding.dream_id == record_id).delete(synchronize_session=False)
+            # Görsel bağlantısı kalkar; dosya görsel deposunun LRU temizliğine bırakılır
+            session.query(DreamImage).filter(DreamImage.dream_id == record_id).delete(synchronize_session=False)
+            session.query(Conversation).filter(Conversation.dream_id == record_id).update(
+                {Conversation.dream_id: None}, synchronize_session=False)
+            _mark_insights_stale(session, [user_id])
             session.commit()
     finally:
         session.close()
+    if record:
+        _notify_deleted(DreamAnalysis, record_id, user_id)
 
 # MoodRecord işlemleri
 def add_mood_record(user_id: int, mood: str, note: str = None) -> None:
-    session = SessionLocal()
-    try:
-        record = MoodRecord(user_id=user_id, mood=mood, note=note)
-        session.add(record)
-        session.commit()
-    finally:
-        session.close()
+    record = MoodRecord(user_id=user_id, mood=mood, note=note)
+    _save_record(record)
 
 def list_mood_records(user_id: int, limit: int = 30) -> list:
+    _flush_pending_writes()
     session = SessionLocal()
     try:
         return session.query(MoodRecord).filter(MoodRecord.user_id == user_id).order_by(MoodRecord.created_at.desc()).limit(limit).all()
     finally:
         session.close()
 
+def list_mood_records_page(user_id: int, cursor: Optional[str] = None, page_size: int = 20) -> Tuple[List[MoodRecord], Optional[str]]:
+    """
+    Mood kayıtlarını yeniden eskiye sayfa sayfa döner: (kayıtlar, sonraki sayfa imleci).
+    """
+    return _list_page(MoodRecord, user_id, cursor, page_size)
+
 def delete_mood_record(record_id: int) -> None:
+    _flush_pending_writes()
     session = SessionLocal()
     try:
         record = session.query(MoodRecord).filter(MoodRecord.id == record_id).first()
         if record:
+            user_id = record.user_id
             session.delete(record)
+            session.flush()
+            # Kaydın günü ham kayıtlardan yeniden hesaplanır (son ruh hali silinmiş olabilir)
+            for statement in REFRESH_DAY_SQL:
+                session.execute(text(statement), refresh_day_params(user_id, record.created_at))
+            _mark_insights_stale(session, [user_id])
             session.commit()
     finally:
         session.close()
+    if record:
+        _notify_deleted(MoodRecord, record_id, user_id)
 
-# CharacterTherapy işlemleri
-def add_character_therapy(user_id: int, character: str, user_input: str, ai_response: str) -> None:
+def list_mood_daily(user_id: int, start: Optional[date] = None, end: Optional[date] = None) -> List[MoodDaily]:
+    """
+    Günlük mood özetlerini tarih sırasıyla döner; start/end (dahil) verilmezse tüm geçmiş okunur.
+    Tek bir (user_id, day) birincil anahtar taramasıdır.
+    """
+    _flush_pending_writes()
+    first, last = day_range(start, end)
     session = SessionLocal()
     try:
-        record = CharacterTherapy(user_id=user_id, character=character, user_input=user_input, ai_response=ai_response)
-        session.add(record)
-        session.commit()
+        return (
+            session.query(MoodDaily)
+            .filter(MoodDaily.user_id == user_id, MoodDaily.day >= first, MoodDaily.day <= last)
+            .order_by(MoodDaily.day)
+            .all()
+        )
     finally:
         session.close()
 
+def list_mood_counts(user_id: Optional[int] = None) -> List[Tuple[int, str, str, int]]:
+    """
+    Günlük özetteki ruh hali sayaçlarını (user_id, gün, ruh hali, adet) satırları olarak, kullanıcı ve gün
+    sırasıyla döner. user_id verilmezse tüm kullanıcılar okunur (toplu istatistik hesabı için).
+    """
+    _flush_pending_writes()
+    where, params = ("1", {}) if user_id is None else ("mood_daily.user_id = :user_id", {"user_id": user_id})
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text(COUNTS_SQL.format(where=where)), params)]
+
+def rebuild_mood_daily(user_id: Optional[int] = None) -> int:
+    """
+    Günlük mood özetini ham kayıtlardan baştan üretir (tüm kullanıcılar veya tek kullanıcı).
+    Oluşan gün satırı sayısını döner.
+    """
+    _flush_pending_writes()
+    statements, params = (REBUILD_SQL, {}) if user_id is None else (REBUILD_USER_SQL, {"user_id": user_id})
+    with engine.begin() as conn:
+        for statement in statements:
+            result = conn.execute(text(statement), params)
+        # Özetten hesaplanan analizler bayatlar; versiyon aynı transaction'da artar
+        conn.execute(text(MARK_ALL_STALE_SQL if user_id is None else MARK_STALE_SQL), params)
+    return result.rowcount
+
+# CharacterTherapy işlemleri
+def add_character_therapy(user_id: int, character: str, user_input: str, ai_response: str) -> None:
+    record = CharacterTherapy(user_id=user_id, character=character, user_input=user_input, ai_response=ai_response)
+    _save_record(record)
+
 def list_character_therapies(user_id: int, limit: int = 30) -> list:
+    _flush_pending_writes()
     session = SessionLocal()
     try:
         return session.query(CharacterTherapy).filter(CharacterTherapy.user_id == user_id).order_by(CharacterTherapy.created_at.desc()).limit(limit).all()
     finally:
         session.close()
 
+def list_character_therapies_page(user_id: int, cursor: Optional[str] = None, page_size: int = 20) -> Tuple[List[CharacterTherapy], Optional[str]]:
+    """
+    Terapi kayıtlarını yeniden eskiye sayfa sayfa döner: (kayıtlar, sonraki sayfa imleci).
+    """
+    return _list_page(CharacterTherapy, user_id, cursor, page_size)
+
 def delete_character_therapy(record_id: int) -> None:
+    _flush_pending_writes()
     session = SessionLocal()
     try:
         record = session.query(CharacterTherapy).filter(CharacterTherapy.id == record_id).first()
         if record:
+            user_id = record.user_id
             session.delete(record)
+            _mark_insights_stale(session, [user_id])
             session.commit()
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+    if record:
+        _notify_deleted(CharacterTherapy, record_id, user_id)
+
+# DreamEmbedding işlemleri (anlamsal arama indeksi)
+def save_dream_embeddings(rows: List[Tuple[int, int, int, bytes]]) -> None:
+    """
+    (dream_id, user_id, dim, vektör baytları) satırlarını tek transaction'da yazar.
+    """
+    if not rows:
+        return
+    session = SessionLocal()
+    try:
+        for dream_id, user_id, dim, vector in rows:
+            session.merge(DreamEmbedding(dream_id=dream_id, user_id=user_id, dim=dim, vector=vector))
+        session.commit()
+    finally:
+        session.close()
+
+def load_dream_embeddings(user_id: int) -> List[Tuple[int, bytes]]:
+    """
+    Kullanıcının tüm rüya embedding'lerini (dream_id, vektör baytları) olarak tek sorguda döner.
+    """
+    session = SessionLocal()
+    try:
+        rows = session.query(DreamEmbedding.dream_id, DreamEmbedding.vector).filter(DreamEmbedding.user_id == user_id).order_by(DreamEmbedding.dream_id).all()
+        return [(dream_id, vector) for dream_id, vector in rows]
+    finally:
+        session.close()
+
+def list_unindexed_dreams(user_id: int, limit: int = 64) -> List[Tuple[int, str]]:
+    """
+    Henüz embedding'i olmayan rüyaları (id, dream_text) olarak döner.
+    """
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        rows = (
+            session.query(DreamAnalysis.id, DreamAnalysis.dream_text)
+            .outerjoin(DreamEmbedding, DreamEmbedding.dream_id == DreamAnalysis.id)
+            .filter(DreamAnalysis.user_id == user_id, DreamEmbedding.dream_id.is_(None))
+            .limit(limit)
+            .all()
+        )
+        return [(dream_id, text) for dream_id, text in rows]
+    finally:
+        session.close()
+
+def get_dream_analyses_by_ids(user_id: int, record_ids: List[int]) -> List[DreamAnalysis]:
+    """
+    Verilen id'lerdeki rüya analizlerini, id listesindeki sırayı koruyarak döner.
+    """
+    if not record_ids:
+        return []
+    session = SessionLocal()
+    try:
+        rows = session.query(DreamAnalysis).filter(DreamAnalysis.user_id == user_id, DreamAnalysis.id.in_(record_ids)).all()
+    finally:
+        session.close()
+    by_id = {row.id: row for row in rows}
+    return [by_id[record_id] for record_id in record_ids if record_id in by_id]
+
+# TextEmbedding işlemleri (içerik hash'i ile embedding önbelleği)
+def get_text_embeddings(content_hashes: List[str]) -> Dict[str, bytes]:
+    """
+    Önbellekte bulunan hash'lerin vektör baytlarını döner.
+    """
+    if not content_hashes:
+        return {}
+    session = SessionLocal()
+    try:
+        rows = session.query(TextEmbedding.content_hash, TextEmbedding.vector).filter(TextEmbedding.content_hash.in_(content_hashes)).all()
+        return {content_hash: vector for content_hash, vector in rows}
+    finally:
+        session.close()
+
+def save_text_embeddings(rows: List[Tuple[str, str, int, bytes]]) -> None:
+    """
+    (content_hash, model, dim, vektör baytları) satırlarını tek transaction'da yazar.
+    """
+    if not rows:
+        return
+    session = SessionLocal()
+    try:
+        for content_hash, model, dim, vector in rows:
+            session.merge(TextEmbedding(content_hash=content_hash, model=model, dim=dim, vector=vector))
+        session.commit()
+    finally:
+        session.close()
+
+def iter_text_chunks(model, column_name: str, chunk_size: int = 500) -> Iterator[List[Tuple[int, int, str]]]:
+    """
+    Tablodaki boş olmayan metinleri (id, user_id, metin) parçaları halinde id sırasıyla dolaşır.
+    Her parça ayrı sorguyla okunduğu için bellek kullanımı parça boyutuyla sınırlıdır.
+    """
+    _flush_pending_writes()
+    column = getattr(model, column_name)
+    last_id = 0
+    while True:
+        session = SessionLocal()
+        try:
+            rows = (
+                session.query(model.id, model.user_id, column)
+                .filter(model.id > last_id, column.isnot(None), column != "")
+                .order_by(model.id)
+                .limit(chunk_size)
+                .all()
+            )
+        finally:
+            session.close()
+        if not rows:
+            return
+        yield [(record_id, user_id, text) for record_id, user_id, text in rows]
+        last_id = rows[-1][0]
+
+# Tam metin arama (FTS5)
+class SearchHit(NamedTuple):
+    kind: str
+    record_id: int
+    created_at: datetime
+    title: str
+    snippet: str
+    score: float
+
+_SEARCH_MODELS = {"dream": DreamAnalysis, "therapy": CharacterTherapy, "mood": MoodRecord}
+
+def _search_title(kind: str, record) -> str:
+    if kind == "dream":
+        return f"Rüya #{record.id}"
+    if kind == "therapy":
+        return f"{record.character} ile terapi"
+    return f"Ruh hali: {record.mood}"
+
+def search_records(user_id: int, query: str, kinds: Optional[List[str]] = None,
+                   limit: int = 20, offset: int = 0) -> List[SearchHit]:
+    """
+    Kullanıcının rüya, terapi ve ruh hali kayıtlarında bm25 ile sıralanmış tam metin araması yapar.
+    Yalnızca istenen sayfadaki kayıtlar tablodan okunur; snippet'ler orijinal metinden üretilir.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+    kinds = [kind for kind in (kinds or list(FTS_SOURCES)) if kind in FTS_SOURCES]
+    if not kinds:
+        return []
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        ranked = session.execute(
+            text(ranked_query(kinds)),
+            {"match": build_match_expression(user_id, terms), "limit": limit, "offset": offset},
+        ).all()
+        ids_by_kind: Dict[str, List[int]] = defaultdict(list)
+        for kind, record_id, _ in ranked:
+            ids_by_kind[kind].append(record_id)
+        records = {}
+        for kind, record_ids in ids_by_kind.items():
+            model = _SEARCH_MODELS[kind]
+            for record in session.query(model).filter(model.user_id == user_id, model.id.in_(record_ids)).all():
+                records[(kind, record.id)] = record
+    finally:
+        session.close()
+    hits = []
+    for kind, record_id, score in ranked:
+        record = records.get((kind, record_id))
+        if record is None:
+            continue
+        # Eşleşme hangi kolondaysa snippet o kolondan üretilir
+        columns = [name for name, _ in FTS_SOURCES[kind][2]]
+        texts = [getattr(record, name) for name in columns]
+        source_text = next((t for t in texts if t and any(term in tr_fold(t) for term in terms)), texts[0])
+        hits.append(SearchHit(kind, record_id, record.created_at, _search_title(kind, record),
+                              make_snippet(source_text, terms), -score))
+    return hits
+
+# Conversation / Message işlemleri
+def create_conversation(user_id: int, kind: str, title: str, character: Optional[str] = None) -> int:
+    """
+    Yeni bir sohbet başlığı oluşturur ve id'sini döner.
+    """
+    session = SessionLocal()
+    try:
+        conversation = Conversation(user_id=user_id, kind=kind, title=title[:120], character=character)
+        session.add(conversation)
+        session.commit()
+        return conversation.id
+    finally:
+        session.close()
+
+def append_messages(conversation_id: int, messages: List[Tuple[str, str]]) -> None:
+    """
+    Bir sohbet turunun mesajlarını [(role, content), ...] tek transaction'da (veya write-behind kuyruğunda)
+    ekler. Mesajlar hiçbir zaman güncellenmez; başlık sayaçları aynı yazımda artırılır.
+    """
+    now = datetime.utcnow()
+    records = [Message(conversation_id=conversation_id, role=role, content=content, created_at=now) for role, content in messages]
+    _save_records(records)
+
+def set_conversation_dream(conversation_id: int, user_id: int, dream_id: int) -> None:
+    """
+    Rüya sohbetini kaydedilen rüya analizine bağlar; sohbet yeniden açıldığında görsel bu id ile bulunur.
+    """
+    session = SessionLocal()
+    try:
+        session.query(Conversation).filter(Conversation.id == conversation_id, Conversation.user_id == user_id).update(
+            {Conversation.dream_id: dream_id}, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+
+def get_conversation(conversation_id: int, user_id: int) -> Optional[Conversation]:
+    """
+    Kullanıcıya ait sohbet başlığını döner (başka kullanıcının sohbeti için None).
+    """
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        return session.query(Conversation).filter(Conversation.id == conversation_id, Conversation.user_id == user_id).first()
+    finally:
+        session.close()
+
+def list_conversations_page(user_id: int, kind: str, cursor: Optional[str] = None, page_size: int = 10) -> Tuple[List[Conversation], Optional[str]]:
+    """
+    Sohbet başlıklarını son güncellenenden başlayarak sayfa sayfa döner; mesaj gövdeleri yüklenmez.
+    """
+    return _list_page(Conversation, user_id, cursor, page_size, order_column=Conversation.updated_at, filters=(Conversation.kind == kind,))
+
+def load_conversation_messages(conversation_id: int) -> List[Tuple[str, str]]:
+    """
+    Sohbetin tüm mesajlarını (role, content) olarak tek bir index taramasıyla sırayla döner.
+    """
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        rows = session.query(Message.role, Message.content).filter(Message.conversation_id == conversation_id).order_by(Message.id).all()
+        return [(role, content) for role, content in rows]
+    finally:
+        session.close()
+
+def delete_conversation(conversation_id: int, user_id: int) -> bool:
+    """
+    Kullanıcıya ait sohbeti ve mesajlarını siler; sohbet başka kullanıcınınsa hiçbir şey silinmez.
+    """
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        deleted = session.query(Conversation).filter(
+            Conversation.id == conversation_id, Conversation.user_id == user_id
+        ).delete(synchronize_session=False)
+        if deleted:
+            session.query(Message).filter(Message.conversation_id == conversation_id).delete(synchronize_session=False)
+        session.commit()
+        return bool(deleted)
+    finally:
+        session.close()
+
+# Çapraz sinyal analizleri (utils.insights hesaplar, burada saklanır)
+def list_activity_days(user_id: int) -> List[Tuple[str, str, Optional[str], int]]:
+    """
+    Rüya ve terapi kayıtlarını gün kovalarında (gün, 'dream'/'therapy', karakter, adet) olarak gün sırasıyla döner.
+    """
+    _flush_pending_writes()
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(text(ACTIVITY_SQL), {"user_id": user_id})]
+
+def get_user_insight(user_id: int) -> Optional[UserInsight]:
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        return session.get(UserInsight, user_id)
+    finally:
+        session.close()
+
+def save_user_insight(user_id: int, version: int, payload: str) -> bool:
+    """
+    Hesaplanan analizi kaydeder. Hesaplama sırasında yeni kayıt geldiyse (versiyon değiştiyse) satır
+    bayat kalır ve False döner.
+    """
+    with engine.begin() as conn:
+        result = conn.execute(text(SAVE_SQL), {"user_id": user_id, "version": version,
+                                               "computed_at": datetime.utcnow(), "payload": payload})
+    return result.rowcount > 0
+
+def list_stale_insight_users() -> List[int]:
+    _flush_pending_writes()
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text(STALE_USERS_SQL))]
+
+# Analytics işlemleri (toplama SQLite tarafında yapılır, ORM nesnesi yüklenmez)
+def get_user_totals(user_id: int) -> Tuple[int, int, int]:
+    """
+    Kullanıcının toplam (rüya analizi, mood kaydı, terapi seansı) sayılarını döner.
+    """
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        dream_count = session.query(func.count(DreamAnalysis.id)).filter(DreamAnalysis.user_id == user_id).scalar()
+        mood_count = session.query(func.count(MoodRecord.id)).filter(MoodRecord.user_id == user_id).scalar()
+        therapy_count = session.query(func.count(CharacterTherapy.id)).filter(CharacterTherapy.user_id == user_id).scalar()
+        return dream_count or 0, mood_count or 0, therapy_count or 0
+    finally:
+        session.close()
+
+def get_mood_distribution(user_id: int, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[str, int]]:
+    """
+    Kullanıcının ruh hali dağılımını (mood, adet) listesi olarak, en sık olandan başlayarak döner.
+    Günlük özet tablosundan okunur; start/end (dahil) ile tarih aralığı sınırlanabilir.
+    """
+    _flush_pending_writes()
+    first, last = day_range(start, end)
+    with engine.connect() as conn:
+        rows = conn.execute(text(DISTRIBUTION_SQL), {"user_id": user_id, "start": first, "end": last}).all()
+    return [(mood, total) for mood, total in rows]
+
+def get_character_counts(user_id: int) -> List[Tuple[str, int]]:
+    """
+    Kullanıcının karakter bazında terapi seansı sayılarını (karakter, adet) listesi olarak döner.
+    """
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        count = func.count(CharacterTherapy.id)
+        rows = session.query(CharacterTherapy.character, count).filter(CharacterTherapy.user_id == user_id).group_by(CharacterTherapy.character).order_by(count.desc()).all()
+        return [(character, total) for character, total in rows]
+    finally:
+        session.close()
+
+def _count_by_day(session, model, user_id: int, since: Optional[datetime]) -> Dict[str, int]:
+    day = func.date(model.created_at)
+    query = session.query(day, func.count(model.id)).filter(model.user_id == user_id)
+    if since is not None:
+        query = query.filter(model.created_at >= since)
+    return {d: total for d, total in query.group_by(day).all() if d is not None}
+
+def get_daily_activity(user_id: int, since: Optional[datetime] = None) -> List[Tuple[str, int, int, int]]:
+    """
+    Gün bazında (gün 'YYYY-MM-DD', rüya, mood, terapi) sayılarını tarih sırasıyla döner.
+    since verilirse yalnızca o tarihten sonraki kayıtlar sayılır.
+    """
+    _flush_pending_writes()
+    session = SessionLocal()
+    try:
+        dreams = _count_by_day(session, DreamAnalysis, user_id, since)
+        moods = _count_by_day(session, MoodRecord, user_id, since)
+        therapies = _count_by_day(session, CharacterTherapy, user_id, since)
+    finally:
+        session.close()
+    days = sorted(set(dreams) | set(moods) | set(therapies))
+    return [(d, dreams.get(d, 0), moods.get(d, 0), therapies.get(d, 0)) for d in days]
@@ -0,0 +1,164 @@
+"""
+SQLite tabanlı kalıcı görsel üretim kuyruğu.
+
+Streamlit sayfası yalnızca iş kaydı ekler ve durumunu okur; Stable Diffusion pipeline'ı ayrı bir
+süreçte (python -m models.image_worker) çalışır. Kuyruk veritabanında tutulduğu için worker yeniden
+başlatıldığında bekleyen işler kaldığı yerden devam eder.
+"""
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import func, text
+from database.db_manager import SessionLocal, engine
+from database.models import ImageJob
+
+# Bekleyen + çalışan iş sayısı bu sınıra ulaştığında yeni iş kabul edilmez
+IMAGE_QUEUE_MAX_DEPTH = int(os.getenv("DREAMMIND_IMAGE_QUEUE_MAX_DEPTH", "20"))
+
+ACTIVE_STATUSES = ("queued", "running")
+FINAL_STATUSES = ("done", "failed", "cancelled")
+
+
+class QueueFullError(Exception):
+    """
+    Kuyruk derinliği sınırı aşıldığında fırlatılır (backpressure).
+    """
+
+
+def submit_job(prompt: str, user_id: Optional[int] = None, seed: Optional[int] = None, variants: int = 1,
+               max_depth: int = IMAGE_QUEUE_MAX_DEPTH) -> int:
+    """
+    Yeni görsel işini kuyruğa ekler ve id'sini hemen döner.
+    Derinlik kontrolü ve ekleme tek SQL ifadesinde yapıldığından eşzamanlı isteklerde de sınır aşılmaz.
+    """
+    with engine.begin() as conn:
+        result = conn.execute(
+            text(
+                "INSERT INTO image_job (user_id, prompt, seed, variants, status, progress, cancel_requested, created_at) "
+                "SELECT :user_id, :prompt, :seed, :variants, 'queued', 0.0, 0, :now "
+                "WHERE (SELECT COUNT(*) FROM image_job WHERE status IN ('queued', 'running')) < :max_depth"
+            ),
+            {"user_id": user_id, "prompt": prompt, "seed": seed, "variants": max(1, variants),
+             "now": datetime.utcnow(), "max_depth": max_depth},
+        )
+        if result.rowcount == 0:
+            raise QueueFullError("Görsel kuyruğu dolu.")
+        return result.lastrowid
+
+
+def get_job(job_id: int) -> Optional[ImageJob]:
+    session = SessionLocal()
+    try:
+        return session.get(ImageJob, job_id)
+    finally:
+        session.close()
+
+
+def job_result_paths(job: ImageJob) -> List[str]:
+    """
+    Tamamlanan işin tüm varyasyon dosya yollarını döner.
+    """
+    if job.result_paths:
+        return json.loads(job.result_paths)
+    return [job.result_path] if job.result_path else []
+
+
+def queue_position(job_id: int) -> int:
+    """
+    Bekleyen işin önünde kaç iş olduğunu döner (çalışan işler dahil).
+    """
+    session = SessionLocal()
+    try:
+        return session.query(func.count(ImageJob.id)).filter(
+            ImageJob.status.in_(ACTIVE_STATUSES), ImageJob.id < job_id
+        ).scalar()
+    finally:
+        session.close()
+
+
+def queue_depth() -> int:
+    session = SessionLocal()
+    try:
+        return session.query(func.count(ImageJob.id)).filter(ImageJob.status.in_(ACTIVE_STATUSES)).scalar()
+    finally:
+        session.close()
+
+
+def cancel_job(job_id: int) -> bool:
+    """
+    Bekleyen işi hemen iptal eder; çalışan iş için worker'a iptal isteği bırakır.
+    İş zaten bitmişse False döner.
+    """
+    with engine.begin() as conn:
+        cancelled = conn.execute(
+            text("UPDATE image_job SET status = 'cancelled', finished_at = :now WHERE id = :id AND status = 'queued'"),
+            {"id": job_id, "now": datetime.utcnow()},
+        ).rowcount
+        if cancelled:
+            return True
+        return conn.execute(
+            text("UPDATE image_job SET cancel_requested = 1 WHERE id = :id AND status = 'running'"),
+            {"id": job_id},
+        ).rowcount > 0
+
+
+# --- Worker tarafı ---
+def claim_next_job() -> Optional[ImageJob]:
+    """
+    Sıradaki bekleyen işi atomik olarak 'running' durumuna alır ve döner.
+    Birden fazla worker aynı işi alamaz.
+    """
+    with engine.begin() as conn:
+        row = conn.execute(
+            text(
+                "UPDATE image_job SET status = 'running', started_at = :now, progress = 0.0 "
+                "WHERE id = (SELECT id FROM image_job WHERE status = 'queued' ORDER BY id LIMIT 1) "
+                "RETURNING id"
+            ),
+            {"now": datetime.utcnow()},
+        ).first()
+    return get_job(row[0]) if row else None
+
+
+def update_progress(job_id: int, progress: float) -> bool:
+    """
+    İlerlemeyi (0-1) kaydeder. İş için iptal istenmişse True döner.
+    """
+    with engine.begin() as conn:
+        row = conn.execute(
+            text("UPDATE image_job SET progress = :progress WHERE id = :id RETURNING cancel_requested"),
+            {"id": job_id, "progress": progress},
+        ).first()
+    return bool(row and row[0])
+
+
+def finish_job(job_id: int, status: str, result_paths: Optional[List[str]] = None, error: Optional[str] = None) -> None:
+    if status not in FINAL_STATUSES:
+        raise ValueError(f"Geçersiz bitiş durumu: {status}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "UPDATE image_job SET status = :status, result_path = :result_path, result_paths = :result_paths, "
+                "error = :error, progress = CASE WHEN :status = 'done' THEN 1.0 ELSE progress END, "
+                "finished_at = :now WHERE id = :id"
+            ),
+            {"id": job_id, "status": status, "result_path": result_paths[0] if result_paths else None,
+             "result_paths": json.dumps(result_paths) if result_paths else None, "error": error,
+             "now": datetime.utcnow()},
+        )
+
+
+def requeue_running_jobs() -> int:
+    """
+    Worker başlarken önceki süreçte yarım kalan işleri tekrar kuyruğa alır (iptal istenenler iptal edilir).
+    Tek worker süreci varsayılır.
+    """
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE image_job SET status = 'cancelled', finished_at = :now WHERE status = 'running' AND cancel_requested = 1"),
+            {"now": datetime.utcnow()},
+        )
+        return conn.execute(
+            text("UPDATE image_job SET status = 'queued', progress = 0.0, started_at = NULL WHERE status = 'running'")
+        ).rowcount
@@ -0,0 +1,49 @@
+"""
+Çapraz sinyal analizleri (user_insight) SQL'leri.
+
+Rüya, mood ve terapi kayıtları kullanıcı başına gün kovalarında SQLite içinde gruplanır; hesaplama
+utils.insights'ta NumPy ile yapılır ve sonuç JSON olarak user_insight tablosunda saklanır. Kayıt
+ekleme/silme data_version'ı artırarak sonucu bayat işaretler.
+"""
+
+# Yazma yan etkisi: satır yoksa oluşturulur, varsa versiyon artırılır
+MARK_STALE_SQL = """
+INSERT INTO user_insight (user_id, data_version, computed_version) VALUES (:user_id, 1, -1)
+ON CONFLICT (user_id) DO UPDATE SET data_version = data_version + 1
+"""
+
+# Tüm kullanıcılar için (ör. mood_daily baştan üretildiğinde); upsert'te SELECT'in ardından WHERE gerekir
+MARK_ALL_STALE_SQL = """
+INSERT INTO user_insight (user_id, data_version, computed_version) SELECT id, 1, -1 FROM users WHERE true
+ON CONFLICT (user_id) DO UPDATE SET data_version = data_version + 1
+"""
+
+# Analiz önbelleği anahtarı; satır yoksa kullanıcı henüz kayıt yazmamıştır (versiyon 0)
+DATA_VERSION_SQL = "SELECT data_version FROM user_insight WHERE user_id = :user_id"
+
+# Hesaplama sırasında araya giren yazma varsa (versiyon değiştiyse) sonuç güncel sayılmaz
+SAVE_SQL = """
+INSERT INTO user_insight (user_id, data_version, computed_version, computed_at, payload)
+VALUES (:user_id, :version, :version, :computed_at, :payload)
+ON CONFLICT (user_id) DO UPDATE SET
+    computed_version = :version, computed_at = :computed_at, payload = :payload
+WHERE user_insight.data_version = :version
+"""
+
+# Gün kovaları: (gün, tür, etiket, adet); rüyalar için etiket NULL, terapide karakter adı
+ACTIVITY_SQL = """
+SELECT day, kind, label, n FROM (
+    SELECT date(created_at) AS day, 'dream' AS kind, NULL AS label, COUNT(*) AS n
+    FROM dream_analysis WHERE user_id = :user_id GROUP BY day
+    UNION ALL
+    SELECT date(created_at) AS day, 'therapy' AS kind, character AS label, COUNT(*) AS n
+    FROM character_therapy WHERE user_id = :user_id GROUP BY day, character
+)
+ORDER BY day
+"""
+
+STALE_USERS_SQL = """
+SELECT id FROM users
+WHERE id NOT IN (SELECT user_id FROM user_insight WHERE computed_version = data_version)
+ORDER BY id
+"""
@@ -0,0 +1,201 @@
+"""
+Hafif, versiyonlu şema migration sistemi.
+
+Uygulanan migration'lar veritabanındaki `schema_version` tablosuna kaydedilir.
+Uygulama açılışında `run_migrations` çağrılır ve henüz uygulanmamış adımlar sırayla çalıştırılır.
+Her adım idempotent yazılmalıdır (IF NOT EXISTS vb.), çünkü yeni veritabanlarında
+`Base.metadata.create_all` aynı nesneleri önceden oluşturmuş olabilir.
+
+Kullanım:
+    python -m database.migrations
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from loguru import logger
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.engine import Connection, Engine
+from database.models import DreamAnalysis, MoodRecord, CharacterTherapy
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+# Geçmiş migration'ların SQL metni donmuştur: canlı modüllerdeki (database.search, database.mood_daily)
+# sabitler sonradan değişse bile uygulanmış adımlar aynı kalmalıdır. Şema değişikliği yeni migration ile yapılır.
+_FTS_V7_V9_SQL: Dict[str, List[str]] = {
+    "dream": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS dream_fts USING fts5(owner, dream_text, analysis_result, content='', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS dream_fts_ai AFTER INSERT ON dream_analysis BEGIN INSERT INTO dream_fts(rowid, owner, dream_text, analysis_result) VALUES (new.id, 'u' || new.user_id, tr_fold(new.dream_text), tr_fold(new.analysis_result)); END",
+        "CREATE TRIGGER IF NOT EXISTS dream_fts_ad AFTER DELETE ON dream_analysis BEGIN INSERT INTO dream_fts(dream_fts, rowid, owner, dream_text, analysis_result) VALUES('delete', old.id, 'u' || old.user_id, tr_fold(old.dream_text), tr_fold(old.analysis_result)); END",
+        "CREATE TRIGGER IF NOT EXISTS dream_fts_au AFTER UPDATE ON dream_analysis BEGIN INSERT INTO dream_fts(dream_fts, rowid, owner, dream_text, analysis_result) VALUES('delete', old.id, 'u' || old.user_id, tr_fold(old.dream_text), tr_fold(old.analysis_result)); INSERT INTO dream_fts(rowid, owner, dream_text, analysis_result) VALUES (new.id, 'u' || new.user_id, tr_fold(new.dream_text), tr_fold(new.analysis_result)); END",
+        "INSERT INTO dream_fts(rowid, owner, dream_text, analysis_result) SELECT id, 'u' || user_id, tr_fold(dream_text), tr_fold(analysis_result) FROM dream_analysis",
+    ],
+    "therapy": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS therapy_fts USING fts5(owner, user_input, ai_response, content='', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS therapy_fts_ai AFTER INSERT ON character_therapy BEGIN INSERT INTO therapy_fts(rowid, owner, user_input, ai_response) VALUES (new.id, 'u' || new.user_id, tr_fold(new.user_input), tr_fold(new.ai_response)); END",
+        "CREATE TRIGGER IF NOT EXISTS therapy_fts_ad AFTER DELETE ON character_therapy BEGIN INSERT INTO therapy_fts(therapy_fts, rowid, owner, user_input, ai_response) VALUES('delete', old.id, 'u' || old.user_id, tr_fold(old.user_input), tr_fold(old.ai_response)); END",
+        "CREATE TRIGGER IF NOT EXISTS therapy_fts_au AFTER UPDATE ON character_therapy BEGIN INSERT INTO therapy_fts(therapy_fts, rowid, owner, user_input, ai_response) VALUES('delete', old.id, 'u' || old.user_id, tr_fold(old.user_input), tr_fold(old.ai_response)); INSERT INTO therapy_fts(rowid, owner, user_input, ai_response) VALUES (new.id, 'u' || new.user_id, tr_fold(new.user_input), tr_fold(new.ai_response)); END",
+        "INSERT INTO therapy_fts(rowid, owner, user_input, ai_response) SELECT id, 'u' || user_id, tr_fold(user_input), tr_fold(ai_response) FROM character_therapy",
+    ],
+    "mood": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS mood_fts USING fts5(owner, note, content='', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS mood_fts_ai AFTER INSERT ON mood_record BEGIN INSERT INTO mood_fts(rowid, owner, note) VALUES (new.id, 'u' || new.user_id, tr_fold(new.note)); END",
+        "CREATE TRIGGER IF NOT EXISTS mood_fts_ad AFTER DELETE ON mood_record BEGIN INSERT INTO mood_fts(mood_fts, rowid, owner, note) VALUES('delete', old.id, 'u' || old.user_id, tr_fold(old.note)); END",
+        "CREATE TRIGGER IF NOT EXISTS mood_fts_au AFTER UPDATE ON mood_record BEGIN INSERT INTO mood_fts(mood_fts, rowid, owner, note) VALUES('delete', old.id, 'u' || old.user_id, tr_fold(old.note)); INSERT INTO mood_fts(rowid, owner, note) VALUES (new.id, 'u' || new.user_id, tr_fold(new.note)); END",
+        "INSERT INTO mood_fts(rowid, owner, note) SELECT id, 'u' || user_id, tr_fold(note) FROM mood_record",
+    ],
+}
+
+_MOOD_DAILY_V12_SQL: List[str] = [
+    "DELETE FROM mood_daily",
+    """INSERT INTO mood_daily (user_id, day, record_count, last_mood, last_record_id, last_at, mood_counts) 
+SELECT c.user_id, c.day, SUM(c.n), l.mood, l.id, l.created_at, json_group_object(c.mood, c.n)
+FROM (
+    SELECT user_id, date(created_at) AS day, mood, COUNT(*) AS n
+    FROM mood_record WHERE 1 GROUP BY user_id, day, mood
+) AS c
+JOIN (
+    SELECT user_id, date(created_at) AS day, mood, id, created_at,
+           ROW_NUMBER() OVER (PARTITION BY user_id, date(created_at) ORDER BY created_at DESC, id DESC) AS rn
+    FROM mood_record WHERE 1
+) AS l ON l.user_id = c.user_id AND l.day = c.day AND l.rn = 1
+GROUP BY c.user_id, c.day""",
+]
+
+
+def _history_index(table: str) -> Callable[[Connection], None]:
+    def migrate(conn: Connection) -> None:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_user_created ON {table} (user_id, created_at DESC)"))
+    return migrate
+
+
+def _keyset_index(table: str) -> Callable[[Connection], None]:
+    # (created_at, id) keyset sayfalamasında ek sıralama gerekmemesi için id de index'e eklenir
+    def migrate(conn: Connection) -> None:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_user_created_id ON {table} (user_id, created_at DESC, id DESC)"))
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_{table}_user_created"))
+    return migrate
+
+
+def _fts_index(kind: str) -> Callable[[Connection], None]:
+    # FTS5 tablosu + senkronizasyon trigger'ları; mevcut kayıtlar aynı transaction'da indekslenir
+    def migrate(conn: Connection) -> None:
+        for statement in _FTS_V7_V9_SQL[kind]:
+            conn.execute(text(statement))
+    return migrate
+
+
+def _add_column(table: str, column: str, ddl: str) -> Callable[[Connection], None]:
+    # create_all yeni veritabanında kolonu zaten oluşturmuş olabilir
+    def migrate(conn: Connection) -> None:
+        existing = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if column not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return migrate
+
+
+def _mood_daily_rollup(conn: Connection) -> None:
+    # Tablo create_all ile oluşturulur; mevcut mood kayıtları özete bir kez işlenir
+    for statement in _MOOD_DAILY_V12_SQL:
+        conn.execute(text(statement))
+
+
+# (versiyon, açıklama, migration fonksiyonu) - yalnızca sona ekleme yapılmalı
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "dream_analysis (user_id, created_at DESC) index", _history_index("dream_analysis")),
+    (2, "mood_record (user_id, created_at DESC) index", _history_index("mood_record")),
+    (3, "character_therapy (user_id, created_at DESC) index", _history_index("character_therapy")),
+    (4, "dream_analysis (user_id, created_at DESC, id DESC) keyset index", _keyset_index("dream_analysis")),
+    (5, "mood_record (user_id, created_at DESC, id DESC) keyset index", _keyset_index("mood_record")),
+    (6, "character_therapy (user_id, created_at DESC, id DESC) keyset index", _keyset_index("character_therapy")),
+    (7, "dream_analysis FTS5 tam metin arama", _fts_index("dream")),
+    (8, "character_therapy FTS5 tam metin arama", _fts_index("therapy")),
+    (9, "mood_record FTS5 tam metin arama", _fts_index("mood")),
+    (10, "image_job.variants kolonu", _add_column("image_job", "variants", "INTEGER NOT NULL DEFAULT 1")),
+    (11, "image_job.result_paths kolonu", _add_column("image_job", "result_paths", "TEXT")),
+    (12, "mood_daily günlük özetini doldur", _mood_daily_rollup),
+    (13, "conversation.dream_id kolonu", _add_column("conversation", "dream_id", "INTEGER REFERENCES dream_analysis(id)")),
+    (14, "users.token_version kolonu", _add_column("users", "token_version", "INTEGER NOT NULL DEFAULT 0")),
+]
+
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+        "version INTEGER PRIMARY KEY, description TEXT NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+
+
+def get_schema_version(engine: Engine) -> int:
+    """
+    Veritabanına uygulanmış en son migration versiyonunu döner (hiç yoksa 0).
+    """
+    with engine.begin() as conn:
+        _ensure_version_table(conn)
+        return conn.execute(text(f"SELECT COALESCE(MAX(version), 0) FROM {SCHEMA_VERSION_TABLE}")).scalar()
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Bekleyen migration'ları sırayla, her biri kendi transaction'ında olacak şekilde uygular.
+    Güncel şema versiyonunu döner.
+    """
+    current = get_schema_version(engine)
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            # Aynı anda açılan başka bir süreç adımı uygulamış olabilir
+            conn.execute(
+                text(f"INSERT OR IGNORE INTO {SCHEMA_VERSION_TABLE} (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()},
+            )
+        logger.info(f"Migration {version} uygulandı: {description}")
+        current = version
+    return current
+
+
+def explain_history_queries(engine: Engine, user_id: int = 1, limit: int = 10) -> Dict[str, List[str]]:
+    """
+    list_* geçmiş sorgularının ve keyset sayfa sorgularının EXPLAIN QUERY PLAN çıktısını döner.
+    Anahtarlar "tablo" ve "tablo:keyset" biçimindedir.
+    """
+    plans = {}
+    for model in (DreamAnalysis, MoodRecord, CharacterTherapy):
+        latest = select(model).where(model.user_id == user_id).order_by(model.created_at.desc()).limit(limit)
+        keyset = (
+            select(model)
+            .where(model.user_id == user_id, tuple_(model.created_at, model.id) < tuple_(datetime.utcnow(), 2 ** 31))
+            .order_by(model.created_at.desc(), model.id.desc())
+            .limit(limit)
+        )
+        for key, stmt in ((model.__tablename__, latest), (f"{model.__tablename__}:keyset", keyset)):
+            sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            with engine.connect() as conn:
+                rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+            plans[key] = [row[-1] for row in rows]
+    return plans
+
+
+def verify_history_indexes(engine: Engine) -> bool:
+    """
+    Geçmiş sorgularının bileşik index'i kullandığını ve ayrıca sıralama yapmadığını doğrular.
+    """
+    ok = True
+    for key, details in explain_history_queries(engine).items():
+        table = key.split(":")[0]
+        uses_index = any(f"ix_{table}_user_created" in detail for detail in details)
+        temp_sort = any("TEMP B-TREE" in detail for detail in details)
+        if not uses_index or temp_sort:
+            logger.warning(f"{key} sorgusu index kullanmıyor: {details}")
+            ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    from database.db_manager import engine as db_engine
+
+    version = run_migrations(db_engine)
+    print(f"Şema versiyonu: {version}")
+    for table, details in explain_history_queries(db_engine).items():
+        print(f"{table}: {' | '.join(details)}")
+    print("Index kontrolü:", "OK" if verify_history_indexes(db_engine) else "BAŞARISIZ")
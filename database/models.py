@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, String, ForeignKey
+from sqlalchemy import Column, Integer, Text, DateTime, String, ForeignKey, Index, LargeBinary, Float, Boolean
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
@@ -14,12 +14,15 @@ class User(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     username = Column(String(64), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
+    # Oturum token'larına gömülür; artırıldığında kullanıcının verilmiş tüm token'ları geçersiz olur
+    token_version = Column(Integer, nullable=False, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationships
     dream_analyses = relationship("DreamAnalysis", back_populates="user")
     mood_records = relationship("MoodRecord", back_populates="user")
     therapy_sessions = relationship("CharacterTherapy", back_populates="user")
+    conversations = relationship("Conversation", back_populates="user")
 
 
 class DreamAnalysis(Base):
@@ -34,6 +37,9 @@ class DreamAnalysis(Base):
     dream_text = Column(Text, nullable=False)
     analysis_result = Column(Text, nullable=False)
 
+    # Geçmiş listeleri ve keyset sayfalama için (user_id, created_at DESC, id DESC) bileşik index
+    __table_args__ = (Index("ix_dream_analysis_user_created_id", "user_id", created_at.desc(), id.desc()),)
+
     # Relationship
     user = relationship("User", back_populates="dream_analyses")
 
@@ -50,6 +56,9 @@ class MoodRecord(Base):
     mood = Column(String(32), nullable=False)
     note = Column(Text, nullable=True)
 
+    # Geçmiş listeleri ve keyset sayfalama için (user_id, created_at DESC, id DESC) bileşik index
+    __table_args__ = (Index("ix_mood_record_user_created_id", "user_id", created_at.desc(), id.desc()),)
+
     # Relationship
     user = relationship("User", back_populates="mood_records")
 
@@ -67,5 +76,177 @@ class CharacterTherapy(Base):
     user_input = Column(Text, nullable=False)
     ai_response = Column(Text, nullable=False)
 
+    # Geçmiş listeleri ve keyset sayfalama için (user_id, created_at DESC, id DESC) bileşik index
+    __table_args__ = (Index("ix_character_therapy_user_created_id", "user_id", created_at.desc(), id.desc()),)
+
     # Relationship
-    user = relationship("User", back_populates="therapy_sessions")
\ No newline at end of file
+    user = relationship("User", back_populates="therapy_sessions")
+
+
+class Conversation(Base):
+    """
+    Rüya analizi veya karakter terapisi sohbetlerinin başlık (header) bilgilerini tutan tablo.
+    Mesaj gövdeleri ayrı tabloda tutulur; geçmiş listeleri yalnızca bu tabloyu okur.
+    """
+    __tablename__ = "conversation"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String(16), nullable=False)  # "dream" veya "therapy"
+    character = Column(String(64), nullable=True)
+    title = Column(String(120), nullable=False)
+    dream_id = Column(Integer, ForeignKey("dream_analysis.id"), nullable=True)  # rüya sohbetinin kaydedilen analizi
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    message_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_conversation_user_updated_id", "user_id", updated_at.desc(), id.desc()),)
+
+    # Relationships
+    user = relationship("User", back_populates="conversations")
+    messages = relationship("Message", back_populates="conversation")
+
+
+class Message(Base):
+    """
+    Sohbet mesajlarını tutan, yalnızca ekleme yapılan (append-only) tablo.
+    """
+    __tablename__ = "message"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    conversation_id = Column(Integer, ForeignKey("conversation.id"), nullable=False)
+    role = Column(String(16), nullable=False)  # "user" veya "model"
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Bir sohbetin mesajlarını sırayla tek index taramasıyla okumak için
+    __table_args__ = (Index("ix_message_conversation_id", "conversation_id", "id"),)
+
+    # Relationship
+    conversation = relationship("Conversation", back_populates="messages")
+
+
+class DreamEmbedding(Base):
+    """
+    Rüya metinlerinin anlamsal arama için float32 embedding vektörlerini (BLOB) tutan tablo.
+    """
+    __tablename__ = "dream_embedding"
+
+    dream_id = Column(Integer, ForeignKey("dream_analysis.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+
+
+class TextEmbedding(Base):
+    """
+    Metin içeriğinin hash'i (model adı dahil) ile anahtarlanan embedding önbelleği.
+    Aynı metin farklı kayıtlarda geçse de yalnızca bir kez kodlanır.
+    """
+    __tablename__ = "text_embedding"
+
+    content_hash = Column(String(64), primary_key=True)
+    model = Column(String(200), nullable=False)
+    dim = Column(Integer, nullable=False)
+    vector = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ImageJob(Base):
+    """
+    Ayrı bir worker sürecinde işlenen görsel üretim işleri (kalıcı kuyruk).
+    Durumlar: queued -> running -> done | failed | cancelled
+    """
+    __tablename__ = "image_job"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Misafir kullanıcıların işleri için boş olabilir
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    prompt = Column(Text, nullable=False)
+    seed = Column(Integer, nullable=True)
+    # Tek pipeline çağrısında üretilecek varyasyon sayısı (seed, seed+1, ...)
+    variants = Column(Integer, nullable=False, default=1)
+    status = Column(String(16), nullable=False, default="queued")
+    progress = Column(Float, nullable=False, default=0.0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    result_path = Column(Text, nullable=True)
+    # Tüm varyasyonların dosya yolları (JSON liste)
+    result_paths = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Worker'ın sıradaki işi ve kuyruk derinliğini index üzerinden bulması için
+    __table_args__ = (Index("ix_image_job_status_id", "status", "id"),)
+
+
+class ImageBlob(Base):
+    """
+    İçerik adresli görsel deposundaki dosyalar (PNG baytlarının SHA-256 özeti ile).
+    """
+    __tablename__ = "image_blob"
+
+    content_hash = Column(String(64), primary_key=True)
+    size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_access = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ImageVariant(Base):
+    """
+    Üretim parametrelerinin (prompt, seed, adım, guidance, model) hash'inden görsel içeriğine eşleme.
+    """
+    __tablename__ = "image_variant"
+
+    params_key = Column(String(64), primary_key=True)
+    content_hash = Column(String(64), ForeignKey("image_blob.content_hash"), nullable=False, index=True)
+    prompt = Column(Text, nullable=False)
+    seed = Column(Integer, nullable=True)
+    steps = Column(Integer, nullable=False)
+    guidance = Column(Float, nullable=False)
+    model = Column(String(200), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DreamImage(Base):
+    """
+    Rüya analizi kaydı ile ona ait görsel arasındaki bağlantı. Bağlı görseller depodan silinmez.
+    """
+    __tablename__ = "dream_image"
+
+    dream_id = Column(Integer, ForeignKey("dream_analysis.id"), primary_key=True)
+    content_hash = Column(String(64), ForeignKey("image_blob.content_hash"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class MoodDaily(Base):
+    """
+    Mood kayıtlarının kullanıcı/gün bazındaki özeti (günün son ruh hali, ruh hali başına adet, kayıt sayısı).
+    add_mood_record/delete_mood_record ile aynı transaction'da güncellenir; trend ve dağılım grafikleri
+    ham kayıtlar yerine bu tablodan okunur.
+    """
+    __tablename__ = "mood_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(String(10), primary_key=True)  # 'YYYY-MM-DD' (UTC)
+    record_count = Column(Integer, nullable=False, default=0)
+    last_mood = Column(String(32), nullable=False)
+    last_record_id = Column(Integer, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+    mood_counts = Column(Text, nullable=False)  # JSON: {"😊 Mutlu": 2, ...}
+
+
+class UserInsight(Base):
+    """
+    Kullanıcı başına önceden hesaplanmış çapraz sinyal analizleri (JSON).
+    Rüya, mood veya terapi kaydı eklenip silindikçe data_version artar; computed_version geride kalan
+    satırlar bayattır ve bir sonraki okumada yeniden hesaplanır.
+    """
+    __tablename__ = "user_insight"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    data_version = Column(Integer, nullable=False, default=0)
+    computed_version = Column(Integer, nullable=False, default=-1)
+    computed_at = Column(DateTime, nullable=True)
+    payload = Column(Text, nullable=True)
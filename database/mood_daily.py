@@ -0,0 +1,122 @@
+"""
+Günlük mood özeti (mood_daily) SQL'leri.
+
+Her kullanıcı/gün için tek satır tutulur: günün son ruh hali, ruh hali başına adet (JSON) ve kayıt sayısı.
+Ekleme tek bir UPSERT ile artımlı yapılır; silmede ilgili gün ham kayıtlardan (index üzerinden)
+yeniden hesaplanır. Mevcut veriler için özet baştan üretilebilir:
+
+    python -m database.mood_daily --rebuild
+"""
+import argparse
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+# Yeni kayıt: gün satırı yoksa oluşturulur, varsa sayaçlar artırılır ve kayıt daha yeniyse son ruh hali güncellenir
+UPSERT_SQL = """
+INSERT INTO mood_daily (user_id, day, record_count, last_mood, last_record_id, last_at, mood_counts)
+VALUES (:user_id, :day, 1, :mood, :record_id, :created_at, json_object(:mood, 1))
+ON CONFLICT (user_id, day) DO UPDATE SET
+    record_count = record_count + 1,
+    mood_counts = json_patch(mood_counts, json_object(:mood, 1 + COALESCE(
+        (SELECT counts.value FROM json_each(mood_counts) AS counts WHERE counts.key = :mood), 0))),
+    last_mood = CASE WHEN (excluded.last_at, excluded.last_record_id) > (last_at, last_record_id)
+                     THEN excluded.last_mood ELSE last_mood END,
+    last_record_id = CASE WHEN (excluded.last_at, excluded.last_record_id) > (last_at, last_record_id)
+                          THEN excluded.last_record_id ELSE last_record_id END,
+    last_at = MAX(last_at, excluded.last_at)
+"""
+
+# Ham kayıtlardan gün satırlarını üretir; {where} mood_record üzerindeki ek filtredir
+_ROLLUP_SELECT = """
+SELECT c.user_id, c.day, SUM(c.n), l.mood, l.id, l.created_at, json_group_object(c.mood, c.n)
+FROM (
+    SELECT user_id, date(created_at) AS day, mood, COUNT(*) AS n
+    FROM mood_record WHERE {where} GROUP BY user_id, day, mood
+) AS c
+JOIN (
+    SELECT user_id, date(created_at) AS day, mood, id, created_at,
+           ROW_NUMBER() OVER (PARTITION BY user_id, date(created_at) ORDER BY created_at DESC, id DESC) AS rn
+    FROM mood_record WHERE {where}
+) AS l ON l.user_id = c.user_id AND l.day = c.day AND l.rn = 1
+GROUP BY c.user_id, c.day
+"""
+
+_INSERT_ROLLUP = (
+    "INSERT INTO mood_daily (user_id, day, record_count, last_mood, last_record_id, last_at, mood_counts) "
+    + _ROLLUP_SELECT
+)
+
+# Tek günün yeniden hesaplanması; created_at aralığı (user_id, created_at) index'ini kullanır
+REFRESH_DAY_SQL = [
+    "DELETE FROM mood_daily WHERE user_id = :user_id AND day = :day",
+    _INSERT_ROLLUP.format(where="user_id = :user_id AND created_at >= :day AND created_at < :next_day"),
+]
+
+REBUILD_SQL = [
+    "DELETE FROM mood_daily",
+    _INSERT_ROLLUP.format(where="1"),
+]
+
+REBUILD_USER_SQL = [
+    "DELETE FROM mood_daily WHERE user_id = :user_id",
+    _INSERT_ROLLUP.format(where="user_id = :user_id"),
+]
+
+# Dağılım: aralıktaki günlerin JSON sayaçları SQLite içinde toplanır
+DISTRIBUTION_SQL = """
+SELECT counts.key, SUM(counts.value) AS total
+FROM mood_daily, json_each(mood_daily.mood_counts) AS counts
+WHERE mood_daily.user_id = :user_id AND mood_daily.day >= :start AND mood_daily.day <= :end
+GROUP BY counts.key
+ORDER BY total DESC
+"""
+
+
+# İstatistik motoru için (kullanıcı, gün, ruh hali, adet) satırları; JSON sayaçlar SQLite içinde açılır
+COUNTS_SQL = """
+SELECT mood_daily.user_id, mood_daily.day, counts.key, counts.value
+FROM mood_daily, json_each(mood_daily.mood_counts) AS counts
+WHERE {where}
+ORDER BY mood_daily.user_id, mood_daily.day
+"""
+
+
+def day_key(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def upsert_params(user_id: int, mood: str, record_id: int, created_at: datetime) -> dict:
+    # created_at SQLAlchemy'nin DateTime saklama biçimiyle yazılır ki metin karşılaştırmaları tutarlı olsun
+    return {"user_id": user_id, "day": day_key(created_at), "mood": mood, "record_id": record_id,
+            "created_at": created_at.strftime("%Y-%m-%d %H:%M:%S.%f")}
+
+
+def refresh_day_params(user_id: int, created_at: datetime) -> dict:
+    day = created_at.date()
+    return {"user_id": user_id, "day": day.isoformat(), "next_day": (day + timedelta(days=1)).isoformat()}
+
+
+def day_range(start: Optional[date], end: Optional[date]) -> Tuple[str, str]:
+    """
+    Opsiyonel tarih aralığını 'YYYY-MM-DD' sınırlarına çevirir (uçlar dahil).
+    """
+    return (start.isoformat() if start else "0000-00-00", end.isoformat() if end else "9999-99-99")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Günlük mood özeti (mood_daily) bakımı")
+    parser.add_argument("--rebuild", action="store_true", help="Özeti ham mood kayıtlarından baştan üret")
+    parser.add_argument("--user", type=int, help="Yalnızca bu kullanıcının özetini yeniden üret")
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.print_help()
+        return
+    from database.db_manager import create_db_and_tables, rebuild_mood_daily
+
+    create_db_and_tables()
+    rows = rebuild_mood_daily(args.user)
+    print(f"mood_daily yeniden oluşturuldu: {rows} gün satırı")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+SQLite FTS5 tabanlı tam metin arama yardımcıları.
+
+Her kaynak tablo için contentless bir FTS5 tablosu tutulur; tablolar trigger'larla senkron kalır
+(tablo ve trigger SQL'i database.migrations içinde donmuş metin olarak yer alır).
+Metinler indekslenmeden önce `tr_fold` ile Türkçe'ye uygun şekilde sadeleştirilir (İ/I/ı -> i,
+ş -> s, ğ -> g ...). Fonksiyon uzunluğu koruduğu için sadeleştirilmiş metindeki eşleşme konumları
+orijinal metne birebir karşılık gelir ve snippet'ler orijinal metinden üretilebilir.
+
+Not: Trigger'lar `tr_fold` fonksiyonunu kullandığından kaynak tablolara yalnızca bu fonksiyonu kaydeden
+bağlantılar (db_manager engine'i) üzerinden yazılmalıdır.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+# kaynak türü -> (kaynak tablo, FTS tablosu, [(kolon, bm25 ağırlığı)])
+FTS_SOURCES: Dict[str, Tuple[str, str, List[Tuple[str, float]]]] = {
+    "dream": ("dream_analysis", "dream_fts", [("dream_text", 2.0), ("analysis_result", 1.0)]),
+    "therapy": ("character_therapy", "therapy_fts", [("user_input", 2.0), ("ai_response", 1.0)]),
+    "mood": ("mood_record", "mood_fts", [("note", 1.0)]),
+}
+
+# Türkçe büyük/küçük harf ve aksan sadeleştirme (tek karakter -> tek karakter)
+_TR_FOLD_TABLE = str.maketrans({
+    "İ": "i", "I": "i", "ı": "i",
+    "Ş": "s", "ş": "s", "Ğ": "g", "ğ": "g", "Ç": "c", "ç": "c",
+    "Ö": "o", "ö": "o", "Ü": "u", "ü": "u",
+    "Â": "a", "â": "a", "Î": "i", "î": "i", "Û": "u", "û": "u",
+})
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tr_fold(text: Optional[str]) -> Optional[str]:
+    """
+    Metni Türkçe kurallarıyla küçük harfe çevirip aksanlarını kaldırır; metin uzunluğu değişmez.
+    """
+    if text is None:
+        return None
+    folded = text.translate(_TR_FOLD_TABLE).lower()
+    if len(folded) != len(text):
+        # Nadir karakterlerde lower() uzunluğu değiştirebilir; bu karakterler olduğu gibi bırakılır
+        folded = "".join(ch if len(ch) == 1 else original
+                         for ch, original in ((c.lower(), c) for c in text.translate(_TR_FOLD_TABLE)))
+    return folded
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Kullanıcı sorgusunu sadeleştirilmiş kelimelere ayırır.
+    """
+    return _TOKEN_RE.findall(tr_fold(query or ""))
+
+
+def build_match_expression(user_id: int, terms: List[str]) -> str:
+    """
+    FTS5 MATCH ifadesi: kullanıcı kapsamı (owner kolonu) AND metin kolonlarında tüm kelimeler (önek eşleşmesi).
+    Kelimeler tırnak içine alındığından kullanıcı girdisi FTS sözdizimi olarak yorumlanmaz.
+    """
+    words = " AND ".join(f'"{term}"*' for term in terms)
+    return f'owner : "{owner_token(user_id)}" AND -{{owner}} : ({words})'
+
+
+def owner_token(user_id: int) -> str:
+    return f"u{user_id}"
+
+
+def make_snippet(text: Optional[str], terms: List[str], width: int = 160) -> str:
+    """
+    Orijinal metinden ilk eşleşmenin çevresini alır ve eşleşen kelimeleri kalın yapar.
+    """
+    if not text:
+        return ""
+    folded = tr_fold(text)
+    pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\w*", re.UNICODE)
+    first = pattern.search(folded) if terms else None
+    start = max(0, first.start() - width // 3) if first else 0
+    end = min(len(text), start + width)
+    parts = []
+    cursor = start
+    for match in pattern.finditer(folded, start, end) if terms else ():
+        match_end = min(match.end(), end)
+        parts.append(text[cursor:match.start()])
+        parts.append(f"**{text[match.start():match_end]}**")
+        cursor = match_end
+    parts.append(text[cursor:end])
+    snippet = "".join(parts).replace("\n", " ")
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def ranked_query(kinds: List[str]) -> str:
+    """
+    Seçilen kaynaklarda bm25 ile sıralanmış (tür, id, skor) sonuçlarını döndüren UNION ALL sorgusu.
+    Parametreler: :match, :limit, :offset.
+    """
+    parts = []
+    for kind in kinds:
+        _, fts_table, columns = FTS_SOURCES[kind]
+        weights = ", ".join(["0.0"] + [str(weight) for _, weight in columns])
+        parts.append(f"SELECT '{kind}' AS kind, rowid AS record_id, bm25({fts_table}, {weights}) AS score "
+                     f"FROM {fts_table} WHERE {fts_table} MATCH :match")
+    return " UNION ALL ".join(parts) + " ORDER BY score LIMIT :limit OFFSET :offset"
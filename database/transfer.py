@@ -0,0 +1,274 @@
+"""
+Kullanıcı verilerinin akış (streaming) halinde toplu dışa/içe aktarımı: JSONL veya Parquet.
+
+Dışa aktarımda her tablo tek sorguyla, sunucu tarafı cursor üzerinden sabit boyutlu parçalar halinde
+okunur; bellek kullanımı satır sayısından bağımsız olarak parça boyutuyla sınırlıdır. İçe aktarımda dosya
+satır satır okunur ve parçalar executemany ile ayrı transaction'larda yazılır. FTS indeksleri trigger'larla
+güncellenir; mood_daily özeti ve çapraz sinyal analizleri aktarım sonunda etkilenen kullanıcılar için
+yenilenir. Rüya embedding'leri aramada eksik kayıtlar için doldurulur.
+
+JSONL biçimi: her satır bir kayıttır ve "kind" alanı ("dream", "mood", "therapy") tabloyu belirtir.
+Parquet biçimi: dizin içinde tür başına bir dosya (dream.parquet, mood.parquet, therapy.parquet);
+pyarrow gerektirir.
+
+Komut satırı: python cli.py export / python cli.py import
+"""
+import gzip
+import io
+import json
+import os
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import IntegrityError
+from database.db_manager import engine, flush_writes, rebuild_mood_daily
+from database.insights import MARK_STALE_SQL
+from database.models import CharacterTherapy, DreamAnalysis, MoodRecord, User
+
+TRANSFER_CHUNK_SIZE = int(os.getenv("DREAMMIND_TRANSFER_CHUNK_SIZE", "5000"))
+
+# tür -> (model, veri kolonları); user_id ve created_at tüm türlerde ortaktır
+TRANSFER_SOURCES: Dict[str, Tuple[type, Tuple[str, ...]]] = {
+    "dream": (DreamAnalysis, ("dream_text", "analysis_result")),
+    "mood": (MoodRecord, ("mood", "note")),
+    "therapy": (CharacterTherapy, ("character", "user_input", "ai_response")),
+}
+FORMATS = ("jsonl", "parquet")
+
+ProgressCallback = Callable[[str, int], None]
+
+
+class TransferError(Exception):
+    """
+    Aktarım dosyası okunamadığında veya geçersiz kayıt içerdiğinde fırlatılır.
+    """
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise TransferError("Parquet biçimi için pyarrow kurulu olmalı (pip install pyarrow).") from e
+    return pyarrow
+
+
+def _open_text(path: str, mode: str) -> IO[str]:
+    # .gz uzantılı dosyalar şeffaf olarak sıkıştırılır/açılır
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# --- Dışa aktarım ---
+def iter_export_chunks(kind: str, user_id: Optional[int] = None,
+                       chunk_size: int = TRANSFER_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Türün kayıtlarını (user_id, created_at, veri kolonları) sözlükleri olarak parça parça döner.
+    Tek sorgu açık tutulur; satırlar cursor'dan parça boyutu kadar çekilir.
+    """
+    model, columns = TRANSFER_SOURCES[kind]
+    query = select(model.user_id, model.created_at, *(getattr(model, name) for name in columns))
+    if user_id is None:
+        query = query.order_by(model.id)
+    else:
+        # (user_id, created_at DESC, id DESC) index'i ters yönde taranır; ek sıralama gerekmez
+        query = query.where(model.user_id == user_id).order_by(model.created_at, model.id)
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"JSON'a çevrilemeyen değer: {type(value).__name__}")
+
+
+def export_jsonl(out: IO[str], user_id: Optional[int] = None, chunk_size: int = TRANSFER_CHUNK_SIZE,
+                 progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    Tüm türleri açık bir metin dosyasına JSONL olarak yazar; tür başına satır sayılarını döner.
+    """
+    flush_writes()
+    counts = {}
+    for kind in TRANSFER_SOURCES:
+        counts[kind] = 0
+        for chunk in iter_export_chunks(kind, user_id, chunk_size):
+            out.writelines(
+                json.dumps({"kind": kind, **row}, ensure_ascii=False, default=_json_default) + "\n" for row in chunk
+            )
+            counts[kind] += len(chunk)
+            if progress:
+                progress(kind, counts[kind])
+    return counts
+
+
+def _parquet_schema(pa, kind: str):
+    _, columns = TRANSFER_SOURCES[kind]
+    fields = [pa.field("user_id", pa.int64()), pa.field("created_at", pa.timestamp("us"))]
+    return pa.schema(fields + [pa.field(name, pa.string()) for name in columns])
+
+
+def export_parquet(directory: str, user_id: Optional[int] = None, chunk_size: int = TRANSFER_CHUNK_SIZE,
+                   progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    Her türü dizinde ayrı bir Parquet dosyasına yazar; her parça bir row group olur.
+    """
+    pa = _require_pyarrow()
+    flush_writes()
+    os.makedirs(directory, exist_ok=True)
+    counts = {}
+    for kind in TRANSFER_SOURCES:
+        counts[kind] = 0
+        schema = _parquet_schema(pa, kind)
+        with pa.parquet.ParquetWriter(os.path.join(directory, f"{kind}.parquet"), schema) as writer:
+            for chunk in iter_export_chunks(kind, user_id, chunk_size):
+                writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+                counts[kind] += len(chunk)
+                if progress:
+                    progress(kind, counts[kind])
+    return counts
+
+
+def export_data(path: str, fmt: str = "jsonl", user_id: Optional[int] = None, chunk_size: int = TRANSFER_CHUNK_SIZE,
+                progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    Verileri dosyaya (jsonl, .gz ile sıkıştırılabilir) veya dizine (parquet) aktarır.
+    """
+    if fmt == "parquet":
+        return export_parquet(path, user_id, chunk_size, progress)
+    if fmt != "jsonl":
+        raise ValueError(f"Bilinmeyen biçim: {fmt}")
+    with _open_text(path, "w") as out:
+        return export_jsonl(out, user_id, chunk_size, progress)
+
+
+def export_user_archive(user_id: int, chunk_size: int = TRANSFER_CHUNK_SIZE) -> bytes:
+    """
+    Tek kullanıcının verilerini gzip'li JSONL olarak döner (arayüzdeki indirme butonu için).
+    Metin sıkıştırılarak yazıldığından bellekte yalnızca sıkıştırılmış çıktı tutulur.
+    """
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as compressed:
+        with io.TextIOWrapper(compressed, encoding="utf-8") as out:
+            export_jsonl(out, user_id, chunk_size)
+    return buffer.getvalue()
+
+
+# --- İçe aktarım ---
+def iter_jsonl_rows(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    with _open_text(path, "r") as source:
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise TransferError(f"{path}:{line_number}: geçersiz JSON ({e.msg})") from e
+            if not isinstance(row, dict) or row.get("kind") not in TRANSFER_SOURCES:
+                raise TransferError(f"{path}:{line_number}: bilinmeyen kayıt türü")
+            yield row.pop("kind"), row
+
+
+def iter_parquet_rows(path: str, chunk_size: int = TRANSFER_CHUNK_SIZE) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Dizindeki (veya tek) Parquet dosyalarını row group'lar halinde okur; tür dosya adından alınır.
+    """
+    pa = _require_pyarrow()
+    files = [os.path.join(path, f"{kind}.parquet") for kind in TRANSFER_SOURCES] if os.path.isdir(path) else [path]
+    for file_path in files:
+        if not os.path.exists(file_path):
+            continue
+        kind = os.path.splitext(os.path.basename(file_path))[0]
+        if kind not in TRANSFER_SOURCES:
+            raise TransferError(f"{file_path}: dosya adı bir kayıt türü değil ({', '.join(TRANSFER_SOURCES)})")
+        for batch in pa.parquet.ParquetFile(file_path).iter_batches(batch_size=chunk_size):
+            for row in batch.to_pylist():
+                yield kind, row
+
+
+def _import_record(kind: str, row: Dict[str, Any], user_id: Optional[int]) -> Dict[str, Any]:
+    _, columns = TRANSFER_SOURCES[kind]
+    record = {name: row.get(name) for name in columns}
+    record["user_id"] = user_id if user_id is not None else row.get("user_id")
+    if record["user_id"] is None:
+        raise TransferError(f"{kind} kaydında user_id yok; hedef kullanıcı belirtin.")
+    created_at = row.get("created_at")
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError as e:
+            raise TransferError(f"{kind} kaydında geçersiz tarih: {created_at}") from e
+    record["created_at"] = created_at or datetime.utcnow()
+    return record
+
+
+def _insert_chunk(kind: str, records: List[Dict[str, Any]], first_row: int) -> None:
+    model, _ = TRANSFER_SOURCES[kind]
+    user_ids = {record["user_id"] for record in records}
+    chunk = f"{kind} parçası (satır {first_row}-{first_row + len(records) - 1})"
+    with engine.begin() as conn:
+        # SQLite foreign key'leri zorlamaz; dosyadaki user_id'ler var olan kullanıcılara ait olmalı
+        known = set(conn.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+        unknown = sorted(user_ids - known, key=str)
+        if unknown:
+            raise TransferError(f"{chunk}: bilinmeyen user_id {unknown}; hedef kullanıcı belirtin.")
+        try:
+            # Sözlük listesi DBAPI executemany ile tek hazırlanmış ifadede yazılır
+            conn.execute(insert(model), records)
+        except IntegrityError as e:
+            raise TransferError(f"{chunk} yazılamadı, zorunlu alan eksik veya geçersiz: {e.orig}") from e
+        for user_id in user_ids:
+            conn.execute(text(MARK_STALE_SQL), {"user_id": user_id})
+
+
+def import_rows(rows: Iterable[Tuple[str, Dict[str, Any]]], user_id: Optional[int] = None,
+                chunk_size: int = TRANSFER_CHUNK_SIZE, progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    (tür, kayıt) çiftlerini tür başına parçalar halinde yazar; tür başına eklenen satır sayılarını döner.
+    user_id verilirse tüm kayıtlar bu kullanıcıya aktarılır, verilmezse dosyadaki user_id korunur.
+    Her parça ayrı transaction'dır; yarıda kesilen aktarımda önceki parçalar kalır.
+    Mevcut kayıtlarla eşleştirme yapılmaz: aynı dosyayı tekrar içe aktarmak tüm satırları çoğaltır.
+    """
+    flush_writes()
+    buffers: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in TRANSFER_SOURCES}
+    counts = {kind: 0 for kind in TRANSFER_SOURCES}
+    affected_users = set()
+
+    def flush(kind: str) -> None:
+        records = buffers[kind]
+        if not records:
+            return
+        _insert_chunk(kind, records, counts[kind] + 1)
+        affected_users.update(record["user_id"] for record in records)
+        counts[kind] += len(records)
+        buffers[kind] = []
+        if progress:
+            progress(kind, counts[kind])
+
+    for kind, row in rows:
+        buffers[kind].append(_import_record(kind, row, user_id))
+        if len(buffers[kind]) >= chunk_size:
+            flush(kind)
+    for kind in TRANSFER_SOURCES:
+        flush(kind)
+
+    # Türetilmiş veriler: günlük mood özeti yeniden üretilir; rebuild_mood_daily kullanıcının
+    # user_insight.data_version'ını da artırır, böylece uygulama süreçlerindeki analiz önbellekleri yenilenir
+    for affected in sorted(affected_users):
+        rebuild_mood_daily(affected)
+    return counts
+
+
+def import_data(path: str, user_id: Optional[int] = None, chunk_size: int = TRANSFER_CHUNK_SIZE,
+                progress: Optional[ProgressCallback] = None) -> Dict[str, int]:
+    """
+    JSONL dosyasını (.gz olabilir) veya Parquet dosya/dizinini içe aktarır; biçim uzantıdan anlaşılır.
+    """
+    if os.path.isdir(path) or path.endswith(".parquet"):
+        rows = iter_parquet_rows(path, chunk_size)
+    else:
+        rows = iter_jsonl_rows(path)
+    return import_rows(rows, user_id, chunk_size, progress)
@@ -0,0 +1,105 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+from loguru import logger
+
+# Kuyruğu durdurmak için kullanılan işaret nesnesi
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Tek yazıcı (single-writer) arka plan kuyruğu.
+    Eklenen kayıtlar bir arka plan thread'inde toplanır ve gruplanmış transaction'lar halinde yazılır.
+    Böylece Streamlit script thread'i commit beklemez ve SQLite üzerinde yazma kilidi için yarışma azalır.
+    """
+
+    def __init__(self, write_batch: Callable[[List[Any]], None], batch_size: int = 200, flush_interval: float = 0.05,
+                 name: str = "dreammind-db-writer"):
+        self._write_batch = write_batch
+        self._name = name
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.batches_written = 0
+        self.records_written = 0
+
+    def start(self) -> "WriteBehindQueue":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        return self
+
+    def submit(self, record: Any) -> None:
+        """
+        Kaydı yazma kuyruğuna ekler. Kuyruk kapatıldıysa hata fırlatır.
+        """
+        if self._closed:
+            raise RuntimeError("Yazma kuyruğu kapatıldı.")
+        self._queue.put(record)
+
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def flush(self) -> None:
+        """
+        Kuyruktaki tüm kayıtlar commit edilene kadar bekler.
+        """
+        if self.pending():
+            self._queue.join()
+
+    def close(self) -> None:
+        """
+        Bekleyen kayıtları yazar ve yazıcı thread'ini durdurur.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            batch = [item]
+            # Kısa bir süre boyunca gelen kayıtları aynı transaction'a topla
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=max(timeout, 0)) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    self._queue.task_done()
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: List[Any]) -> None:
+        try:
+            self._write_batch(batch)
+            self.batches_written += 1
+            self.records_written += len(batch)
+        except Exception as e:
+            # Grup yazımı başarısız olursa kayıtları tek tek dene, hatalı kaydı logla
+            logger.error(f"Toplu yazma hatası, kayıtlar tek tek yazılacak: {e}")
+            for record in batch:
+                try:
+                    self._write_batch([record])
+                    self.records_written += 1
+                except Exception as record_error:
+                    logger.error(f"Kayıt yazılamadı ve atlandı: {record_error}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
@@ -1,6 +1,9 @@
 import streamlit as st
 from database import db_manager
 from utils import auth
+from components.session import end_session, restore_session, start_session
+from utils.warmup import start_background_services, start_warmup, warmup_status
+from database.transfer import export_user_archive
 
 # Page config
 st.set_page_config(
@@ -10,8 +13,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize database
-db_manager.create_db_and_tables()
+# Initialize database ve embedding worker'ı (süreç başına bir kez), ağır modülleri arka planda hazırla
+start_background_services()
+start_warmup()
 
 # --- Session State Initialization ---
 def init_session_state():
@@ -25,15 +29,34 @@ def init_session_state():
         st.session_state.username = None
 
 # --- UI Components ---
+def show_export_controls():
+    """Kullanıcının kayıtlarını gzip'li JSONL olarak indirme butonu."""
+    # Arşiv yalnızca istendiğinde hazırlanır; her yeniden çalıştırmada veritabanı taranmaz
+    if st.sidebar.button("📦 Verilerimi Hazırla"):
+        with st.spinner("Veriler hazırlanıyor..."):
+            st.session_state.export_archive = export_user_archive(st.session_state.user_id)
+    if st.session_state.get("export_archive"):
+        st.sidebar.download_button(
+            "⬇️ Verilerimi İndir",
+            data=st.session_state.export_archive,
+            file_name=f"dreammind_{st.session_state.username}.jsonl.gz",
+            mime="application/gzip",
+        )
+
 def show_main_content():
     """Displays the main application content after login or for guests."""
     st.sidebar.title(f"Hoş geldin, {st.session_state.username or 'Misafir'}!")
     st.sidebar.markdown("---")
 
+    # Arka plan hazırlık durumu (ilk açılışta modeller yüklenirken)
+    pending = [name for name, status in warmup_status().items() if status["state"] in ("pending", "running")]
+    if pending:
+        st.sidebar.caption(f"⏳ Hazırlanıyor: {', '.join(pending)}")
+
     if st.session_state.logged_in:
+        show_export_controls()
         if st.sidebar.button("🚪 Çıkış Yap"):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
+            end_session()
             st.rerun()
     elif st.session_state.is_guest:
         st.sidebar.warning("Misafir modundasınız. Verilerinizi kaydetmek için lütfen bir hesap oluşturun.")
@@ -64,11 +87,12 @@ def show_login_signup_page():
 
                 if submitted:
                     user = db_manager.get_user_by_username(username)
-                    if user and auth.verify_password(password, user.hashed_password):
-                        st.session_state.logged_in = True
-                        st.session_state.is_guest = False
-                        st.session_state.user_id = user.id
-                        st.session_state.username = user.username
+                    verified, new_hash = auth.verify_and_update(password, user.hashed_password) if user else (False, None)
+                    if verified:
+                        if new_hash:
+                            # bcrypt maliyet faktörü değişmiş; hash yeni maliyetle güncellenir
+                            db_manager.update_user_password_hash(user.id, new_hash)
+                        start_session(user.id, user.username)
                         st.rerun()
                     else:
                         st.error("Kullanıcı adı veya şifre hatalı!")
@@ -91,10 +115,7 @@ def show_login_signup_page():
                     else:
                         hashed_password = auth.get_password_hash(new_password)
                         new_user = db_manager.add_user(new_username, hashed_password)
-                        st.session_state.logged_in = True
-                        st.session_state.is_guest = False
-                        st.session_state.user_id = new_user.id
-                        st.session_state.username = new_user.username
+                        start_session(new_user.id, new_user.username)
                         st.success("Hesabınız başarıyla oluşturuldu! Yönlendiriliyorsunuz...")
                         st.rerun()
 
@@ -106,6 +127,8 @@ def show_login_signup_page():
 
 # --- Main App Logic ---
 init_session_state()
+# Yenileme/yeni sekmede çerezdeki imzalı token ile giriş geri yüklenir
+restore_session()
 
 if st.session_state.logged_in or st.session_state.is_guest:
     show_main_content()
@@ -0,0 +1,129 @@
+import os
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Sohbet bağlamı için yaklaşık token bütçesi ve özetlenmeden tutulacak son tur sayısı
+CHAT_TOKEN_BUDGET = int(os.getenv("DREAMMIND_CHAT_TOKEN_BUDGET", "6000"))
+CHAT_KEEP_TURNS = int(os.getenv("DREAMMIND_CHAT_KEEP_TURNS", "4"))
+# Tur başına prompt token kaydının tutulacağı son tur sayısı (oturum boyunca sınırsız büyümesin)
+CHAT_USAGE_LOG_TURNS = int(os.getenv("DREAMMIND_CHAT_USAGE_LOG_TURNS", "50"))
+
+SUMMARY_PREFIX = "Önceki konuşmanın özeti (bağlam için):"
+SUMMARY_ACK = "Anladım, konuşmaya bu bağlamla devam ediyorum."
+
+# summarizer(önceki özet, özetlenecek turlar) -> yeni özet
+Summarizer = Callable[[str, List[Tuple[str, str]]], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Yaklaşık token sayısı (ortalama ~4 karakter/token varsayımı).
+    """
+    return (len(text) + 3) // 4 if text else 0
+
+
+def extractive_summary(previous_summary: str, turns: List[Tuple[str, str]], max_chars: int = 2400) -> str:
+    """
+    LLM kullanmadan basit özet: her turun başını alır, en yeni kısmı koruyacak şekilde kısaltır.
+    """
+    lines = [previous_summary] if previous_summary else []
+    for user_text, model_text in turns:
+        lines.append(f"- Kullanıcı: {user_text[:200]}")
+        lines.append(f"  Yanıt: {model_text[:200]}")
+    summary = "\n".join(lines)
+    return summary[-max_chars:]
+
+
+class ChatContext:
+    """
+    Modele gönderilen sohbet bağlamını token bütçesi içinde tutar.
+    Bütçe aşıldığında eski turlar kayan (rolling) bir özete katlanır ve yalnızca son N tur aynen saklanır.
+    """
+
+    def __init__(self, budget: int = CHAT_TOKEN_BUDGET, keep_turns: int = CHAT_KEEP_TURNS,
+                 summarizer: Optional[Summarizer] = None):
+        self.budget = budget
+        self.keep_turns = keep_turns
+        self.summarizer = summarizer or extractive_summary
+        self.summary = ""
+        self.turns: List[Tuple[str, str]] = []
+        self.summarized_turns = 0
+        # Son turlarda modele gönderilen yaklaşık token sayısı (grafik için); eski turlar düşer
+        self.usage_log: "deque[int]" = deque(maxlen=CHAT_USAGE_LOG_TURNS)
+
+    def token_count(self) -> int:
+        total = estimate_tokens(self.summary)
+        for user_text, model_text in self.turns:
+            total += estimate_tokens(user_text) + estimate_tokens(model_text)
+        return total
+
+    def prompt_tokens(self, user_message: str) -> int:
+        """
+        Yeni mesaj gönderildiğinde modele gidecek yaklaşık token sayısı.
+        """
+        return self.token_count() + estimate_tokens(user_message)
+
+    def add_turn(self, user_text: str, model_text: str) -> bool:
+        """
+        Tamamlanan turu ekler. Bütçe aşıldıysa bağlamı sıkıştırır ve True döner.
+        """
+        self.usage_log.append(self.prompt_tokens(user_text))
+        self.turns.append((user_text, model_text))
+        if self.token_count() > self.budget and len(self.turns) > self.keep_turns:
+            self.compact()
+            return True
+        return False
+
+    def load_turns(self, turns: List[Tuple[str, str]]) -> None:
+        """
+        Kayıtlı turlardan bağlamı yeniden kurar; bütçe aşılıyorsa tek seferde sıkıştırır.
+        """
+        self.clear()
+        self.turns = list(turns)
+        if self.token_count() > self.budget and len(self.turns) > self.keep_turns:
+            self.compact()
+
+    def compact(self) -> None:
+        older = self.turns[:-self.keep_turns] if self.keep_turns else list(self.turns)
+        if not older:
+            return
+        try:
+            self.summary = self.summarizer(self.summary, older)
+        except Exception:
+            self.summary = extractive_summary(self.summary, older)
+        self.turns = self.turns[len(older):]
+        self.summarized_turns += len(older)
+
+    def as_history(self) -> List[Dict[str, Any]]:
+        """
+        Modelin start_chat(history=...) parametresi için özet + son turları döner.
+        """
+        history: List[Dict[str, Any]] = []
+        if self.summary:
+            history.append({"role": "user", "parts": [f"{SUMMARY_PREFIX}\n{self.summary}"]})
+            history.append({"role": "model", "parts": [SUMMARY_ACK]})
+        for user_text, model_text in self.turns:
+            history.append({"role": "user", "parts": [user_text]})
+            history.append({"role": "model", "parts": [model_text]})
+        return history
+
+    def usage(self) -> Dict[str, Any]:
+        """
+        Güncel bütçe kullanımını döner.
+        """
+        tokens = self.token_count()
+        return {
+            "tokens": tokens,
+            "budget": self.budget,
+            "ratio": tokens / self.budget if self.budget else 0.0,
+            "verbatim_turns": len(self.turns),
+            "summarized_turns": self.summarized_turns,
+            "summary_tokens": estimate_tokens(self.summary),
+            "per_turn_prompt_tokens": list(self.usage_log),
+        }
+
+    def clear(self) -> None:
+        self.summary = ""
+        self.turns = []
+        self.summarized_turns = 0
+        self.usage_log.clear()
@@ -0,0 +1,178 @@
+"""
+Arka plan embedding hattı.
+
+db_manager yazımları commit edildikten sonra rüya metni, terapi girdisi ve ruh hali notları kuyruğa alınır;
+tek bir arka plan thread'i bunları gruplar halinde (önbellek destekli) kodlar. Böylece Streamlit script
+thread'i model çıkarımını beklemez. Var olan kayıtlar için:
+
+    python -m models.embedding_worker --backfill
+"""
+import argparse
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from database.db_manager import add_insert_listener, create_db_and_tables, iter_text_chunks
+from database.models import CharacterTherapy, DreamAnalysis, MoodRecord
+from database.write_queue import WriteBehindQueue
+from models.embeddings import embed_texts, embeddings_available
+from models.vector_index import get_dream_index
+from utils.metrics import record_timing
+
+EMBEDDING_BATCH_SIZE = int(os.getenv("DREAMMIND_EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_FLUSH_INTERVAL = float(os.getenv("DREAMMIND_EMBEDDING_FLUSH_INTERVAL", "0.5"))
+
+# kaynak adı -> (model sınıfı, metin kolonu)
+EMBEDDING_SOURCES = {
+    "dream": (DreamAnalysis, "dream_text"),
+    "therapy": (CharacterTherapy, "user_input"),
+    "mood": (MoodRecord, "note"),
+}
+
+# (kaynak, kayıt id, user_id, metin)
+EmbeddingItem = Tuple[str, int, int, str]
+
+
+class EmbeddingStats:
+    """
+    Kodlama hattının verim (texts/sec) ve grup boyutu istatistikleri.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.texts = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def record(self, texts: int, seconds: float) -> None:
+        with self._lock:
+            self.texts += texts
+            self.batches += 1
+            self.seconds += seconds
+        record_timing("embedding.batch", seconds)
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "texts": self.texts,
+                "batches": self.batches,
+                "seconds": self.seconds,
+                "texts_per_sec": self.texts / self.seconds if self.seconds else 0.0,
+                "avg_batch_size": self.texts / self.batches if self.batches else 0.0,
+            }
+
+
+_stats = EmbeddingStats()
+
+
+def process_items(items: List[EmbeddingItem], batch_size: int = EMBEDDING_BATCH_SIZE) -> None:
+    """
+    Bir grup metni kodlar; rüya vektörlerini ayrıca anlamsal arama indeksine ekler.
+    """
+    if not items or not embeddings_available():
+        return
+    started = time.perf_counter()
+    vectors = embed_texts([text for _, _, _, text in items], batch_size=batch_size)
+    dream_rows = [i for i, item in enumerate(items) if item[0] == "dream"]
+    if dream_rows:
+        get_dream_index().add_vectors([(items[i][1], items[i][2]) for i in dream_rows], vectors[dream_rows])
+    _stats.record(len(items), time.perf_counter() - started)
+
+
+def get_embedding_stats() -> Dict[str, float]:
+    return _stats.summary()
+
+
+def _items_from_records(records: list) -> List[EmbeddingItem]:
+    items = []
+    for record in records:
+        for source, (model, column_name) in EMBEDDING_SOURCES.items():
+            if isinstance(record, model):
+                text = getattr(record, column_name)
+                if text:
+                    items.append((source, record.id, record.user_id, text))
+                break
+    return items
+
+
+_queue: Optional[WriteBehindQueue] = None
+_queue_lock = threading.Lock()
+
+
+def _on_records_inserted(records: list) -> None:
+    enqueue_items(_items_from_records(records))
+
+
+def enqueue_items(items: List[EmbeddingItem]) -> bool:
+    """
+    Metinleri arka plan kuyruğuna ekler; worker başlatılmamışsa hiçbir şey yapmaz ve False döner.
+    """
+    if _queue is None:
+        return False
+    for item in items:
+        _queue.submit(item)
+    return True
+
+
+def start_embedding_worker() -> WriteBehindQueue:
+    """
+    Arka plan kodlama thread'ini (süreç başına bir kez) başlatır ve yazma dinleyicisini kaydeder.
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WriteBehindQueue(process_items, batch_size=EMBEDDING_BATCH_SIZE,
+                                          flush_interval=EMBEDDING_FLUSH_INTERVAL,
+                                          name="dreammind-embedding-worker").start()
+                add_insert_listener(_on_records_inserted)
+    return _queue
+
+
+def flush_embeddings() -> None:
+    """
+    Kuyruktaki tüm metinler kodlanana kadar bekler.
+    """
+    if _queue is not None:
+        _queue.flush()
+
+
+def backfill(sources: Optional[List[str]] = None, chunk_size: int = 500,
+             batch_size: int = EMBEDDING_BATCH_SIZE) -> Dict[str, float]:
+    """
+    Var olan kayıtları id sırasıyla parça parça okuyup kodlar. Önbellekte olan metinler yeniden kodlanmaz.
+    """
+    if not embeddings_available():
+        raise RuntimeError("Embedding modeli kullanılamıyor.")
+    for source in sources or list(EMBEDDING_SOURCES):
+        model, column_name = EMBEDDING_SOURCES[source]
+        for chunk in iter_text_chunks(model, column_name, chunk_size):
+            for i in range(0, len(chunk), batch_size):
+                process_items([(source, record_id, user_id, text) for record_id, user_id, text in chunk[i:i + batch_size]],
+                              batch_size=batch_size)
+            summary = _stats.summary()
+            logger.info(f"{source}: son id {chunk[-1][0]}, toplam {summary['texts']} metin, "
+                        f"{summary['texts_per_sec']:.1f} metin/sn")
+    return _stats.summary()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DreamMind embedding hattı")
+    parser.add_argument("--backfill", action="store_true", help="Var olan kayıtların embedding'lerini üret")
+    parser.add_argument("--source", choices=list(EMBEDDING_SOURCES), action="append",
+                        help="Yalnızca verilen kaynak(lar)ı işle")
+    parser.add_argument("--chunk-size", type=int, default=500, help="DB'den tek seferde okunacak satır sayısı")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE, help="Model çağrısı başına metin sayısı")
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.print_help()
+        return
+    create_db_and_tables()
+    summary = backfill(args.source, args.chunk_size, args.batch_size)
+    print(f"{summary['texts']} metin, {summary['batches']} grup, {summary['seconds']:.1f} sn, "
+          f"{summary['texts_per_sec']:.1f} metin/sn, ortalama grup boyutu {summary['avg_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import hashlib
+import os
+import threading
+from typing import Any, List, Optional
+import numpy as np
+from loguru import logger
+from database.db_manager import get_text_embeddings, save_text_embeddings
+
+# Çok dilli (Türkçe destekli), CPU'da hızlı küçük bir model varsayılan olarak kullanılır
+EMBEDDING_MODEL_NAME = os.getenv(
+    "DREAMMIND_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+
+_model: Optional[Any] = None
+_model_lock = threading.Lock()
+_unavailable = False
+
+
+def get_embedding_model() -> Optional[Any]:
+    """
+    SentenceTransformer modelini ilk kullanımda bir kez yükler. Kütüphane yoksa None döner.
+    """
+    global _model, _unavailable
+    if _model is not None or _unavailable:
+        return _model
+    with _model_lock:
+        if _model is None and not _unavailable:
+            try:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+            except Exception as e:
+                logger.error(f"Embedding modeli yüklenemedi, anlamsal arama devre dışı: {e}")
+                _unavailable = True
+    return _model
+
+
+def embeddings_available() -> bool:
+    return get_embedding_model() is not None
+
+
+def encode_texts(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """
+    Metinleri L2-normalize edilmiş float32 vektörlere çevirir (kosinüs benzerliği = iç çarpım).
+    """
+    model = get_embedding_model()
+    if model is None:
+        raise RuntimeError("Embedding modeli kullanılamıyor.")
+    vectors = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def content_hash(text: str) -> str:
+    """
+    Önbellek anahtarı: model adı + metnin SHA-256 özeti (model değişirse eski vektörler kullanılmaz).
+    """
+    return hashlib.sha256(f"{EMBEDDING_MODEL_NAME}\0{text}".encode("utf-8")).hexdigest()
+
+
+def embed_texts(texts: List[str], batch_size: int = 32) -> np.ndarray:
+    """
+    Metinlerin vektörlerini önce içerik-hash önbelleğinden alır; yalnızca önbellekte olmayan
+    benzersiz metinleri toplu olarak kodlayıp önbelleğe yazar. Sonuç girdi sırasıyla döner.
+    """
+    hashes = [content_hash(text) for text in texts]
+    cached = {h: np.frombuffer(vector, dtype=np.float32) for h, vector in get_text_embeddings(list(set(hashes))).items()}
+    missing = {}
+    for h, text in zip(hashes, texts):
+        if h not in cached and h not in missing:
+            missing[h] = text
+    if missing:
+        vectors = encode_texts(list(missing.values()), batch_size=batch_size)
+        save_text_embeddings([
+            (h, EMBEDDING_MODEL_NAME, vectors.shape[1], vectors[i].tobytes()) for i, h in enumerate(missing)
+        ])
+        cached.update({h: vectors[i] for i, h in enumerate(missing)})
+    if not hashes:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.vstack([cached[h] for h in hashes])
@@ -1,12 +1,14 @@
 import os
-from typing import Optional, List, Dict, Any
+import time
+from functools import partial
+from typing import Optional, List, Dict, Any, Iterator, Callable, Tuple
 from loguru import logger
 from dotenv import load_dotenv
-
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None  # Fallback için kullanılacak
+from models.llm_cache import get_llm_cache, make_cache_key
+from models.llm_client import ResilientLLMClient, LLMUnavailableError, get_llm_client
+from models.model_registry import get_model_registry, load_genai
+from models.chat_context import ChatContext, CHAT_TOKEN_BUDGET
+from utils.metrics import record_timing
 
 # Yedek analiz için Hugging Face (opsiyonel, basit placeholder)
 def fallback_dream_analysis(dream_text: str) -> str:
@@ -16,6 +18,12 @@ def fallback_dream_analysis(dream_text: str) -> str:
     """
     return "AI servisi geçici olarak kullanılamıyor. (Fallback) Rüyanız: " + dream_text[:100] + "..."
 
+def fallback_character_therapy(character: str, user_input: str) -> str:
+    """
+    Karakter terapisi için yedek yanıt. AI servisine ulaşılamadığında kullanılır.
+    """
+    return f"{character} şu anda sana yanıt veremiyor, AI servisi geçici olarak kullanılamıyor. (Fallback) Biraz sonra tekrar dener misin?"
+
 # Karakter terapisi prompt şablonları
 CHARACTER_THERAPY_PROMPTS = {
     "Sherlock Holmes": """
@@ -77,6 +85,7 @@ CHARACTER_THERAPY_PROMPTS = {
 # .env dosyasından API anahtarını yükle
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+DEFAULT_MODEL_NAME = "gemini-1.5-flash"
 
 # Prompt şablonu (proje dokümanından)
 DREAM_ANALYSIS_PROMPT = """
@@ -92,28 +101,162 @@ ANALİZ YAPISI:
 Sıcak, empatik ve bilgilendirici bir dil kullan. Türkçe yanıtla.
 """
 
+FALLBACK_UNAVAILABLE_MESSAGE = "Üzgünüm, AI servisi şu anda yanıt veremiyor. Lütfen biraz sonra tekrar deneyin."
+STREAM_INTERRUPTED_NOTICE = "\n\n⚠️ Yanıt yarıda kesildi, lütfen tekrar deneyin."
+
 class GeminiChatSession:
-    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash", system_instruction: Optional[str] = None):
+    def __init__(self, api_key: str, model_name: str = DEFAULT_MODEL_NAME, system_instruction: Optional[str] = None,
+                 fallback: Optional[Callable[[str], str]] = None, client: Optional[ResilientLLMClient] = None,
+                 token_budget: int = CHAT_TOKEN_BUDGET):
         if not api_key:
             raise ValueError("Gemini API key is not provided.")
-        if genai is None:
+        if load_genai() is None:
             raise ImportError("google.generativeai modülü yüklü değil.")
         
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+        self.api_key = api_key
+        self.model_name = model_name
+        self.system_instruction = system_instruction
+        # Model nesnesi süreç genelinde paylaşılır; oturum yalnızca kendi chat handle'ını tutar
+        self.model = get_model_registry().get_model(api_key, model_name, system_instruction)
         self.chat = self.model.start_chat(history=[])
         self.history = [] # To store history in a format suitable for Streamlit display
+        # Devre kesici açıkken veya servis yanıt vermediğinde kullanılacak yedek yanıt üretici
+        self.fallback = fallback
+        self.client = client or get_llm_client()
+        # Modele gönderilen bağlam (özet + son turlar); self.history ise ekranda gösterilen tam geçmiştir
+        self.context = ChatContext(budget=token_budget, summarizer=self._summarize)
+        # Son yanıt modelden gelmediyse (yedek yanıt veya yarıda kesilen akış) True olur;
+        # çağıran taraf bu turu kaydetmemeli ve geçmişe eklememelidir
+        self.last_reply_failed = False
 
-    def send_message(self, user_message: str) -> str:
+    def send_message(self, user_message: str, use_cache: bool = True) -> str:
+        """
+        Mesajı gönderir ve yanıtı döner. Aynı persona + geçmiş + mesaj için önbellekteki yanıt kullanılır.
+        Deterministik olmaması istenen sohbetlerde use_cache=False verilmelidir.
+        Servis yanıt veremezse yedek yanıt döner ve last_reply_failed True olur.
+        """
+        self.last_reply_failed = False
+        cache, cache_key, cached = self._lookup_cache(user_message, use_cache)
+        if cached is not None:
+            self._append_cached_turn(user_message, cached)
+            return cached
+        started = time.perf_counter()
         try:
-            response = self.chat.send_message(user_message)
-            # Update internal history for Streamlit display
-            self.history.append({"role": "user", "parts": [user_message]})
-            self.history.append({"role": "model", "parts": [response.text]})
-            return response.text
+            response_text = self.client.send_chat(self.chat, user_message)
+            self._record_turn(user_message, response_text)
+            record_timing("llm.blocking.total", time.perf_counter() - started)
+            if cache_key is not None:
+                cache.set(cache_key, response_text)
+            return response_text
+        except LLMUnavailableError as e:
+            logger.error(f"Gemini servisine ulaşılamıyor: {e}")
+            return self._fallback_response(user_message)
         except Exception as e:
             logger.error(f"Gemini chat error: {e}")
-            return f"Üzgünüm, bir hata oluştu: {e}"
+            return self._fallback_response(user_message)
+
+    def send_message_stream(self, user_message: str, use_cache: bool = True) -> Iterator[str]:
+        """
+        Yanıtı geldikçe metin parçaları halinde üretir (st.write_stream ile kullanılabilir).
+        Geçmiş, akış tamamlandığında yalnızca bir kez güncellenir. Akış hiç başlamazsa yedek yanıt, yarıda
+        kesilirse bir uyarı üretilir; her iki durumda da last_reply_failed True olur.
+        """
+        self.last_reply_failed = False
+        cache, cache_key, cached = self._lookup_cache(user_message, use_cache)
+        if cached is not None:
+            self._append_cached_turn(user_message, cached)
+            yield cached
+            return
+        started = time.perf_counter()
+        chunks: List[str] = []
+        try:
+            for text in self.client.stream_chat(self.chat, user_message):
+                if not chunks:
+                    record_timing("llm.stream.first_chunk", time.perf_counter() - started)
+                chunks.append(text)
+                yield text
+        except Exception as e:
+            # Yarım kalan akış model geçmişine eklenmesin
+            self._rebuild_chat()
+            logger.error(f"Gemini chat stream error: {e}")
+            if chunks:
+                self.last_reply_failed = True
+                yield STREAM_INTERRUPTED_NOTICE
+            else:
+                yield self._fallback_response(user_message)
+            return
+        full_text = "".join(chunks)
+        self._record_turn(user_message, full_text)
+        record_timing("llm.stream.total", time.perf_counter() - started)
+        if cache_key is not None and full_text:
+            cache.set(cache_key, full_text)
+
+    def _fallback_response(self, user_message: str) -> str:
+        # Yedek yanıt geçmişe eklenmez; servis düzelince sohbet kaldığı yerden devam eder
+        self.last_reply_failed = True
+        if self.fallback is not None:
+            return self.fallback(user_message)
+        return FALLBACK_UNAVAILABLE_MESSAGE
+
+    def _lookup_cache(self, user_message: str, use_cache: bool):
+        cache = get_llm_cache() if use_cache else None
+        if cache is None:
+            return None, None, None
+        # Anahtar, modele gerçekten gönderilen bağlamdan (özet + son turlar) üretilir
+        cache_key = make_cache_key(self.model_name, self.system_instruction, self.context.as_history(), user_message)
+        return cache, cache_key, cache.get(cache_key)
+
+    def _append_cached_turn(self, user_message: str, response_text: str) -> None:
+        self._record_turn(user_message, response_text)
+        # Model tarafındaki sohbeti de aynı bağlamla senkronize et (ağ çağrısı yapmaz)
+        self._rebuild_chat()
+
+    def _record_turn(self, user_message: str, response_text: str) -> None:
+        # Update internal history for Streamlit display
+        self.history.append({"role": "user", "parts": [user_message]})
+        self.history.append({"role": "model", "parts": [response_text]})
+        if self.context.add_turn(user_message, response_text):
+            # Bütçe aşıldı: eski turlar özete katlandı, chat handle'ı kısaltılmış bağlamla yenile
+            self._rebuild_chat()
+
+    def _rebuild_chat(self) -> None:
+        self.chat = self.model.start_chat(history=self.context.as_history())
+
+    def _summarize(self, previous_summary: str, turns: List[tuple]) -> str:
+        """
+        Eski turları önceki özetle birlikte kısa bir özete katlar.
+        """
+        transcript = "\n".join(f"Kullanıcı: {user_text}\nYanıt: {model_text}" for user_text, model_text in turns)
+        prompt = (
+            "Aşağıdaki konuşmayı, önceki özetle birleştirerek en fazla 150 kelimelik Türkçe bir özete dönüştür. "
+            "Kullanıcının anlattığı önemli olayları, duyguları ve verilen önerileri koru.\n\n"
+            f"ÖNCEKİ ÖZET:\n{previous_summary or '-'}\n\nKONUŞMA:\n{transcript}"
+        )
+        summary_model = get_model_registry().get_model(self.api_key, self.model_name)
+        return self.client.generate(summary_model, prompt)
+
+    def budget_usage(self) -> Dict[str, Any]:
+        """
+        Bağlamın token bütçesi kullanımını döner (grafik/izleme için).
+        """
+        return self.context.usage()
+
+    def load_history(self, messages: List[Tuple[str, str]]) -> None:
+        """
+        Veritabanında saklanan [(role, content), ...] mesajlarından oturumu yeniden kurar (ağ çağrısı yapmaz,
+        yalnızca bağlam bütçeyi aşıyorsa bir kez özetleme yapılır).
+        """
+        self.history = [{"role": role, "parts": [content]} for role, content in messages]
+        turns = []
+        pending_user = None
+        for role, content in messages:
+            if role == "user":
+                pending_user = content
+            elif pending_user is not None:
+                turns.append((pending_user, content))
+                pending_user = None
+        self.context.load_turns(turns)
+        self._rebuild_chat()
 
     def get_full_history(self) -> List[Dict[str, Any]]:
         return self.history
@@ -121,13 +264,25 @@ class GeminiChatSession:
     def clear_history(self):
         self.chat = self.model.start_chat(history=[])
         self.history = []
+        self.context.clear()
 
 # --- Specific Chatbot Functions using GeminiChatSession ---
+DEFAULT_THERAPY_PROMPT = "Sen bir AI terapistsin. Kullanıcının sorunlarını dinle ve ona yardımcı olmaya çalış."
+
+def warm_up_models() -> None:
+    """
+    Rüya analisti ve tüm karakter personaları için model nesnelerini önceden oluşturur.
+    """
+    if not GEMINI_API_KEY or load_genai() is None:
+        return
+    instructions = [DREAM_ANALYSIS_PROMPT, DEFAULT_THERAPY_PROMPT, None, *CHARACTER_THERAPY_PROMPTS.values()]
+    get_model_registry().warm_up(GEMINI_API_KEY, DEFAULT_MODEL_NAME, instructions)
+
 def start_dream_analysis_chat() -> Optional[GeminiChatSession]:
     if not GEMINI_API_KEY:
         logger.warning("Gemini API anahtarı eksik. Rüya analizi sohbeti başlatılamıyor.")
         return None
-    return GeminiChatSession(GEMINI_API_KEY, system_instruction=DREAM_ANALYSIS_PROMPT)
+    return GeminiChatSession(GEMINI_API_KEY, system_instruction=DREAM_ANALYSIS_PROMPT, fallback=fallback_dream_analysis)
 
 def start_character_therapy_chat(character_name: str) -> Optional[GeminiChatSession]:
     if not GEMINI_API_KEY:
@@ -136,25 +291,51 @@ def start_character_therapy_chat(character_name: str) -> Optional[GeminiChatSess
     
     system_instruction = CHARACTER_THERAPY_PROMPTS.get(character_name, "")
     if not system_instruction:
-        system_instruction = "Sen bir AI terapistsin. Kullanıcının sorunlarını dinle ve ona yardımcı olmaya çalış." # Default if character not found
+        system_instruction = DEFAULT_THERAPY_PROMPT # Default if character not found
         
-    return GeminiChatSession(GEMINI_API_KEY, system_instruction=system_instruction)
+    return GeminiChatSession(GEMINI_API_KEY, system_instruction=system_instruction,
+                             fallback=partial(fallback_character_therapy, character_name))
+
+def resume_dream_analysis_chat(messages: List[Tuple[str, str]]) -> Optional[GeminiChatSession]:
+    """
+    Kayıtlı mesajlardan rüya analizi sohbetini kaldığı yerden devam ettirir.
+    """
+    session = start_dream_analysis_chat()
+    if session:
+        session.load_history(messages)
+    return session
+
+def resume_character_therapy_chat(character_name: str, messages: List[Tuple[str, str]]) -> Optional[GeminiChatSession]:
+    """
+    Kayıtlı mesajlardan karakter terapisi sohbetini kaldığı yerden devam ettirir.
+    """
+    session = start_character_therapy_chat(character_name)
+    if session:
+        session.load_history(messages)
+    return session
 
 # --- Old functions (kept for reference, will be removed or adapted) ---
-def analyze_dream(dream_text: str, debug: bool = False) -> str:
+def analyze_dream(dream_text: str, debug: bool = False, use_cache: bool = True) -> str:
     # This function will be replaced by the chat-based approach
     if not dream_text.strip():
         return "Lütfen analiz için bir rüya metni girin."
-    if not GEMINI_API_KEY or genai is None:
+    if not GEMINI_API_KEY or load_genai() is None:
         logger.warning("Gemini API anahtarı veya modülü eksik. Fallback çalışacak.")
         return fallback_dream_analysis(dream_text)
+    prompt = DREAM_ANALYSIS_PROMPT.format(dream_text=dream_text)
+    cache = get_llm_cache() if use_cache else None
+    cache_key = make_cache_key(DEFAULT_MODEL_NAME, None, [], prompt)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = DREAM_ANALYSIS_PROMPT.format(dream_text=dream_text)
-        response = model.generate_content(prompt)
-        if hasattr(response, "text") and response.text:
-            return response.text
+        model = get_model_registry().get_model(GEMINI_API_KEY, DEFAULT_MODEL_NAME)
+        response_text = get_llm_client().generate(model, prompt)
+        if response_text:
+            if cache is not None:
+                cache.set(cache_key, response_text)
+            return response_text
         else:
             logger.error("Gemini API yanıtı boş veya beklenmedik formatta.")
             return fallback_dream_analysis(dream_text)
@@ -164,20 +345,27 @@ def analyze_dream(dream_text: str, debug: bool = False) -> str:
             return f"[DEBUG] Hata: {e}"
         return fallback_dream_analysis(dream_text) 
 
-def character_therapy_response(character: str, user_input: str, debug: bool = False) -> str:
+def character_therapy_response(character: str, user_input: str, debug: bool = False, use_cache: bool = True) -> str:
     # This function will be replaced by the chat-based approach
     if not user_input.strip():
         return "Lütfen bir mesaj girin."
-    if not GEMINI_API_KEY or genai is None:
+    if not GEMINI_API_KEY or load_genai() is None:
         logger.warning("Gemini API anahtarı veya modülü eksik. Fallback çalışacak.")
         return fallback_character_therapy(character, user_input)
+    prompt = CHARACTER_THERAPY_PROMPTS.get(character, "") + f"\nKULLANICI: {user_input}\nYANIT:"
+    cache = get_llm_cache() if use_cache else None
+    cache_key = make_cache_key(DEFAULT_MODEL_NAME, None, [], prompt)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
     try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = CHARACTER_THERAPY_PROMPTS.get(character, "") + f"\nKULLANICI: {user_input}\nYANIT:"
-        response = model.generate_content(prompt)
-        if hasattr(response, "text") and response.text:
-            return response.text
+        model = get_model_registry().get_model(GEMINI_API_KEY, DEFAULT_MODEL_NAME)
+        response_text = get_llm_client().generate(model, prompt)
+        if response_text:
+            if cache is not None:
+                cache.set(cache_key, response_text)
+            return response_text
         else:
             logger.error("Gemini API yanıtı boş veya beklenmedik formatta.")
             return fallback_character_therapy(character, user_input)
@@ -1,56 +1,147 @@
-import torch
-from typing import Optional
+import contextlib
+import inspect
+import io
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
 from loguru import logger
+from models.image_store import SD_MODEL_ID, derive_seeds, get_image_store
+from models.sd_profiles import SDProfile, apply_profile, configure_threads, get_profile, profile_params_key, warm_up
 
-try:
-    from diffusers import StableDiffusionPipeline
-except ImportError:
-    StableDiffusionPipeline = None
+# Izgarada gösterilen önizlemelerin en uzun kenarı (px) ve WebP kalitesi
+THUMBNAIL_SIZE = int(os.getenv("DREAMMIND_THUMBNAIL_SIZE", "256"))
+THUMBNAIL_QUALITY = int(os.getenv("DREAMMIND_THUMBNAIL_QUALITY", "70"))
 
-# Model cache ve yükleme
-_sd_pipe: Optional[StableDiffusionPipeline] = None
+# İlerleme bildirimi: (tamamlanan adım, toplam adım)
+ProgressCallback = Callable[[int, int], None]
 
-def get_sd_pipeline() -> Optional[StableDiffusionPipeline]:
-    """ss
-    Stable Diffusion pipeline'ı cache'li şekilde yükler.
+
+class GenerationCancelled(Exception):
+    """
+    İlerleme callback'i üretimi yarıda kesmek istediğinde fırlatır.
+    """
+
+
+# Model cache ve yükleme (profil başına bir pipeline)
+_sd_pipes: Dict[str, Any] = {}
+
+def get_sd_pipeline(profile: Optional[SDProfile] = None) -> Optional[Any]:
+    """
+    Stable Diffusion pipeline'ı seçili profil ayarlarıyla cache'li şekilde yükler.
+    torch ve diffusers modül yüklenirken değil, ilk kullanımda import edilir.
     """
-    global _sd_pipe
-    if _sd_pipe is not None:
-        return _sd_pipe
-    if StableDiffusionPipeline is None:
-        logger.error("diffusers paketi yüklü değil.")
+    profile = profile or get_profile()
+    if profile.name in _sd_pipes:
+        return _sd_pipes[profile.name]
+    try:
+        import torch
+        from diffusers import StableDiffusionPipeline
+    except ImportError:
+        logger.error("torch/diffusers paketi yüklü değil.")
         return None
     try:
+        use_cuda = torch.cuda.is_available()
+        if not use_cuda:
+            configure_threads(profile)
+        started = time.perf_counter()
         pipe = StableDiffusionPipeline.from_pretrained(
-            "runwayml/stable-diffusion-v1-5",
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32
+            SD_MODEL_ID,
+            torch_dtype=torch.float16 if use_cuda else torch.float32
         )
-        if torch.cuda.is_available():
+        if use_cuda:
             pipe = pipe.to("cuda")
-        _sd_pipe = pipe
+        pipe = apply_profile(pipe, profile)
+        if profile.warmup:
+            warm_up(pipe, profile)
+        logger.info(f"Stable Diffusion '{profile.name}' profiliyle {time.perf_counter() - started:.1f} sn'de hazırlandı.")
+        _sd_pipes[profile.name] = pipe
         return pipe
     except Exception as e:
         logger.error(f"Stable Diffusion yüklenemedi: {e}")
         return None
 
-def generate_dream_image(prompt: str, seed: Optional[int] = None) -> Optional[str]:
+def _progress_kwargs(pipe, num_inference_steps: int, progress_callback: Optional[ProgressCallback]) -> dict:
     """
-    Verilen prompt ile rüya görseli üretir. Başarılıysa geçici bir dosya yolunu döner.
+    diffusers sürümüne göre adım callback'i parametrelerini hazırlar.
     """
-    pipe = get_sd_pipeline()
-    if pipe is None:
-        return None
-    try:
-        generator = torch.Generator(device=pipe.device)
-        if seed is not None:
-            generator = generator.manual_seed(seed)
-        with torch.autocast("cuda" if torch.cuda.is_available() else "cpu"):
-            image = pipe(prompt, num_inference_steps=30, guidance_scale=7.5, generator=generator).images[0]
-        # Geçici dosyaya kaydet
-        import tempfile
-        temp_file = tempfile.NamedTemporaryFile(suffix=".png", delete=False)
-        image.save(temp_file.name)
-        return temp_file.name
-    except Exception as e:
-        logger.error(f"Görsel üretim hatası: {e}")
-        return None 
\ No newline at end of file
+    if progress_callback is None:
+        return {}
+    parameters = inspect.signature(pipe.__call__).parameters
+    if "callback_on_step_end" in parameters:
+        def on_step_end(pipeline, step, timestep, callback_kwargs):
+            progress_callback(step + 1, num_inference_steps)
+            return callback_kwargs
+        return {"callback_on_step_end": on_step_end}
+    return {"callback": lambda step, timestep, latents: progress_callback(step + 1, num_inference_steps), "callback_steps": 1}
+
+def _thumbnail_bytes(image: Any) -> bytes:
+    """
+    Izgara görünümü için küçük WebP önizlemesi üretir.
+    """
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format="WEBP", quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue()
+
+def generate_dream_variants(prompt: str, seed: Optional[int] = None, count: int = 1,
+                            progress_callback: Optional[ProgressCallback] = None,
+                            profile: Optional[SDProfile] = None) -> List[str]:
+    """
+    Aynı prompt için `count` adet varyasyon üretir ve görsel deposundaki dosya yollarını seed sırasıyla döner.
+    Seed'ler derive_seeds(seed, count) ile türetilir; depoda olmayanlar tek bir batch pipeline çağrısında
+    üretilir (UNet adımları görseller arasında paylaşılır). Üretim başarısızsa boş liste döner.
+    progress_callback GenerationCancelled fırlatırsa üretim durdurulur ve hata çağırana iletilir.
+    """
+    profile = profile or get_profile()
+    store = get_image_store()
+    if seed is None:
+        # Seed'i açıkça seçip kaydediyoruz ki aynı görsel tekrar istenebilsin
+        seed = random.randrange(2 ** 31)
+    seeds = derive_seeds(seed, max(1, count))
+    paths: Dict[int, str] = {}
+    for variant_seed in seeds:
+        cached_path = store.get(profile_params_key(prompt, variant_seed, profile))
+        if cached_path:
+            paths[variant_seed] = cached_path
+    missing = [variant_seed for variant_seed in seeds if variant_seed not in paths]
+    if missing:
+        pipe = get_sd_pipeline(profile)
+        if pipe is None:
+            return []
+        import torch
+        try:
+            generators = [torch.Generator(device=pipe.device).manual_seed(s) for s in missing]
+            # CPU'da autocast bfloat16'ya geçip float32'den yavaş çalışır; yalnızca GPU'da kullanılır
+            precision = torch.autocast("cuda") if torch.cuda.is_available() else contextlib.nullcontext()
+            started = time.perf_counter()
+            with precision, torch.inference_mode():
+                images = pipe([prompt] * len(missing), num_inference_steps=profile.steps,
+                              guidance_scale=profile.guidance, width=profile.width, height=profile.height,
+                              generator=generators if len(generators) > 1 else generators[0],
+                              **_progress_kwargs(pipe, profile.steps, progress_callback)).images
+            elapsed = time.perf_counter() - started
+            logger.info(f"{len(missing)} görsel {elapsed:.1f} sn'de üretildi ({elapsed / len(missing):.1f} sn/görsel).")
+            for variant_seed, image in zip(missing, images):
+                buffer = io.BytesIO()
+                image.save(buffer, format="PNG")
+                paths[variant_seed] = store.put(profile_params_key(prompt, variant_seed, profile), buffer.getvalue(),
+                                                prompt, variant_seed, profile.steps, profile.guidance,
+                                                thumbnail=_thumbnail_bytes(image))
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Görsel üretim hatası: {e}")
+            return []
+    return [paths[variant_seed] for variant_seed in seeds]
+
+def generate_dream_image(prompt: str, seed: Optional[int] = None,
+                         progress_callback: Optional[ProgressCallback] = None,
+                         profile: Optional[SDProfile] = None) -> Optional[str]:
+    """
+    Verilen prompt ile tek bir rüya görseli üretir ve görsel deposundaki dosya yolunu döner.
+    Aynı (prompt, seed, profil ayarları) ile daha önce üretilmiş görsel varsa pipeline çalıştırılmaz.
+    """
+    paths = generate_dream_variants(prompt, seed, 1, progress_callback, profile)
+    return paths[0] if paths else None
@@ -0,0 +1,249 @@
+"""
+İçerik adresli (content-addressed) görsel deposu.
+
+- Dosyalar PNG baytlarının SHA-256 özetiyle `<kök>/<ilk 2 karakter>/<hash>.png` olarak saklanır;
+  aynı içerik bir kez yazılır.
+- Üretim parametrelerinin hash'i (params_key) içeriğe eşlenir; aynı parametrelerle gelen istek
+  diffusion pipeline'ına gitmeden mevcut dosyayı döner.
+- Her görselin yanında ızgarada gösterilmek üzere küçük bir WebP önizlemesi (`<hash>.thumb.webp`) tutulur.
+- Toplam boyut sınırı aşıldığında rüya kaydına bağlı olmayan görseller son erişim zamanına göre (LRU) silinir.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from sqlalchemy import func, select
+from database.db_manager import SessionLocal
+from database.models import DreamImage, ImageBlob, ImageVariant
+
+SD_MODEL_ID = os.getenv("DREAMMIND_SD_MODEL", "runwayml/stable-diffusion-v1-5")
+IMAGE_STORE_DIR = os.getenv("DREAMMIND_IMAGE_STORE_DIR", "image_store")
+IMAGE_STORE_MAX_BYTES = int(os.getenv("DREAMMIND_IMAGE_STORE_MAX_MB", "1024")) * 1024 * 1024
+
+DEFAULT_STEPS = 30
+DEFAULT_GUIDANCE = 7.5
+
+
+def params_key(prompt: str, seed: Optional[int], steps: int = DEFAULT_STEPS, guidance: float = DEFAULT_GUIDANCE,
+               model: str = SD_MODEL_ID, extra: str = "") -> str:
+    """
+    Üretim parametrelerinden deterministik anahtar üretir. extra, çıktıyı etkileyen diğer ayarlar
+    (scheduler, çözünürlük vb.) içindir.
+    """
+    payload = json.dumps([model, prompt, seed, steps, float(guidance)] + ([extra] if extra else []), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def prompt_seed(prompt: str, variant: int = 0) -> int:
+    """
+    Aynı prompt için tekrar üretilebilir seed; variant artırılarak farklı görseller istenebilir.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+    return (int.from_bytes(digest[:4], "big") + variant) % (2 ** 31)
+
+
+def derive_seeds(base_seed: int, count: int) -> List[int]:
+    """
+    Toplu üretimde varyasyon seed'leri: base, base+1, ... (prompt_seed varyantlarıyla uyumlu).
+    """
+    return [(base_seed + i) % (2 ** 31) for i in range(count)]
+
+
+def _thumbnail_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".thumb.webp"
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # Yarım yazılmış dosya okunmasın diye önce geçici dosyaya yazılır
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class ImageStore:
+    """
+    Görsel dosyalarını diskte, dizinlerini ana veritabanında tutar; süreçler arası paylaşılabilir.
+    """
+
+    def __init__(self, root: str = IMAGE_STORE_DIR, max_bytes: int = IMAGE_STORE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], f"{content_hash}.png")
+
+    def thumbnail_for(self, path: str) -> str:
+        """
+        Görsel yolunun WebP önizlemesini döner; önizleme yoksa tam boyutlu görseli döner.
+        """
+        thumbnail = _thumbnail_path(path)
+        return thumbnail if os.path.exists(thumbnail) else path
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Parametre anahtarına karşılık gelen görselin yolunu döner; yoksa None.
+        """
+        session = SessionLocal()
+        try:
+            variant = session.get(ImageVariant, key)
+            if variant is None:
+                self.misses += 1
+                return None
+            path = self.path_for(variant.content_hash)
+            if not os.path.exists(path):
+                # Dosya dışarıdan silinmiş; kaydı temizle
+                session.query(ImageVariant).filter(ImageVariant.content_hash == variant.content_hash).delete()
+                session.query(DreamImage).filter(DreamImage.content_hash == variant.content_hash).delete()
+                session.query(ImageBlob).filter(ImageBlob.content_hash == variant.content_hash).delete()
+                session.commit()
+                self.misses += 1
+                return None
+            session.query(ImageBlob).filter(ImageBlob.content_hash == variant.content_hash).update(
+                {ImageBlob.last_access: datetime.utcnow()}
+            )
+            session.commit()
+            self.hits += 1
+            return path
+        finally:
+            session.close()
+
+    def put(self, key: str, data: bytes, prompt: str, seed: Optional[int], steps: int = DEFAULT_STEPS,
+            guidance: float = DEFAULT_GUIDANCE, model: str = SD_MODEL_ID, thumbnail: Optional[bytes] = None) -> str:
+        """
+        PNG baytlarını (ve varsa WebP önizlemesini) depoya yazar; içerik zaten varsa yeniden yazmaz.
+        Parametre anahtarını bağlar ve gerekirse LRU temizliği yapar. Dosya yolunu döner.
+        """
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self.path_for(content_hash)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+        size = len(data)
+        if thumbnail:
+            if not os.path.exists(_thumbnail_path(path)):
+                _write_atomic(_thumbnail_path(path), thumbnail)
+            size += len(thumbnail)
+        now = datetime.utcnow()
+        session = SessionLocal()
+        try:
+            session.merge(ImageBlob(content_hash=content_hash, size=size, created_at=now, last_access=now))
+            session.merge(ImageVariant(params_key=key, content_hash=content_hash, prompt=prompt, seed=seed,
+                                       steps=steps, guidance=guidance, model=model, created_at=now))
+            session.commit()
+        finally:
+            session.close()
+        self.evict()
+        return path
+
+    def total_bytes(self) -> int:
+        session = SessionLocal()
+        try:
+            return session.query(func.coalesce(func.sum(ImageBlob.size), 0)).scalar()
+        finally:
+            session.close()
+
+    def evict(self) -> int:
+        """
+        Boyut sınırı aşıldıysa sınırın %90'ına inene kadar rüyaya bağlı olmayan en eski erişilen görselleri siler.
+        """
+        with self._lock:
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return 0
+            target = int(self.max_bytes * 0.9)
+            removed = 0
+            session = SessionLocal()
+            try:
+                linked = select(DreamImage.content_hash)
+                while total > target:
+                    rows = (
+                        session.query(ImageBlob.content_hash, ImageBlob.size)
+                        .filter(ImageBlob.content_hash.notin_(linked))
+                        .order_by(ImageBlob.last_access)
+                        .limit(64)
+                        .all()
+                    )
+                    if not rows:
+                        break
+                    for content_hash, size in rows:
+                        if total <= target:
+                            break
+                        session.query(ImageVariant).filter(ImageVariant.content_hash == content_hash).delete()
+                        session.query(ImageBlob).filter(ImageBlob.content_hash == content_hash).delete()
+                        path = self.path_for(content_hash)
+                        for file_path in (path, _thumbnail_path(path)):
+                            try:
+                                os.remove(file_path)
+                            except FileNotFoundError:
+                                pass
+                        total -= size
+                        removed += 1
+                    session.commit()
+            finally:
+                session.close()
+            self.evictions += removed
+            if removed:
+                logger.info(f"Görsel deposundan {removed} dosya silindi.")
+            return removed
+
+    def link_dream(self, dream_id: int, path: str) -> None:
+        """
+        Depodaki görseli rüya kaydına bağlar (rüya başına tek görsel, son bağlanan geçerli).
+        """
+        content_hash = os.path.splitext(os.path.basename(path))[0]
+        session = SessionLocal()
+        try:
+            session.merge(DreamImage(dream_id=dream_id, content_hash=content_hash, created_at=datetime.utcnow()))
+            session.commit()
+        finally:
+            session.close()
+
+    def dream_image_paths(self, dream_ids: List[int]) -> Dict[int, str]:
+        """
+        Verilen rüya kayıtlarına bağlı görsellerin yollarını tek sorguda döner.
+        """
+        if not dream_ids:
+            return {}
+        session = SessionLocal()
+        try:
+            rows = session.query(DreamImage.dream_id, DreamImage.content_hash).filter(DreamImage.dream_id.in_(dream_ids)).all()
+        finally:
+            session.close()
+        return {dream_id: self.path_for(content_hash) for dream_id, content_hash in rows
+                if os.path.exists(self.path_for(content_hash))}
+
+    def stats(self) -> Dict[str, Any]:
+        session = SessionLocal()
+        try:
+            files = session.query(func.count(ImageBlob.content_hash)).scalar()
+            variants = session.query(func.count(ImageVariant.params_key)).scalar()
+            linked = session.query(func.count(DreamImage.dream_id)).scalar()
+        finally:
+            session.close()
+        lookups = self.hits + self.misses
+        return {
+            "files": files,
+            "variants": variants,
+            "linked": linked,
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+_store = ImageStore()
+
+
+def get_image_store() -> ImageStore:
+    return _store
@@ -0,0 +1,82 @@
+"""
+Görsel üretim worker süreci.
+
+Stable Diffusion pipeline'ı yalnızca bu süreçte yüklenir; Streamlit tarafı işleri database.image_jobs
+üzerinden kuyruğa ekler ve durumlarını okur.
+
+Kullanım:
+    python -m models.image_worker            # sürekli çalışır
+    python -m models.image_worker --once     # kuyruk boşalınca çıkar
+"""
+import argparse
+import os
+import time
+from loguru import logger
+from database.db_manager import create_db_and_tables
+from database.image_jobs import claim_next_job, finish_job, requeue_running_jobs, update_progress
+from database.models import ImageJob
+from models.image_gen import GenerationCancelled, generate_dream_variants, get_sd_pipeline
+
+IMAGE_WORKER_POLL_SECONDS = float(os.getenv("DREAMMIND_IMAGE_WORKER_POLL", "1.0"))
+
+
+def run_job(job: ImageJob) -> str:
+    """
+    Tek bir işi çalıştırır ve bitiş durumunu kaydeder. Durumu döner.
+    """
+    def on_progress(step: int, total: int) -> None:
+        if update_progress(job.id, step / total):
+            raise GenerationCancelled()
+
+    logger.info(f"Görsel işi #{job.id} başladı.")
+    started = time.perf_counter()
+    try:
+        paths = generate_dream_variants(job.prompt, seed=job.seed, count=job.variants or 1,
+                                        progress_callback=on_progress)
+    except GenerationCancelled:
+        finish_job(job.id, "cancelled")
+        logger.info(f"Görsel işi #{job.id} iptal edildi.")
+        return "cancelled"
+    except Exception as e:
+        finish_job(job.id, "failed", error=str(e))
+        logger.error(f"Görsel işi #{job.id} başarısız: {e}")
+        return "failed"
+    if not paths:
+        finish_job(job.id, "failed", error="Görsel üretilemedi.")
+        return "failed"
+    finish_job(job.id, "done", result_paths=paths)
+    logger.info(f"Görsel işi #{job.id} ({len(paths)} görsel) {time.perf_counter() - started:.1f} sn'de tamamlandı.")
+    return "done"
+
+
+def run_worker(once: bool = False, poll_seconds: float = IMAGE_WORKER_POLL_SECONDS) -> None:
+    create_db_and_tables()
+    requeued = requeue_running_jobs()
+    if requeued:
+        logger.info(f"Yarım kalan {requeued} iş tekrar kuyruğa alındı.")
+    # Pipeline ilk işi beklemeden yüklenir
+    if get_sd_pipeline() is None:
+        logger.warning("Stable Diffusion pipeline'ı yüklenemedi; işler başarısız olarak işaretlenecek.")
+    while True:
+        job = claim_next_job()
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_seconds)
+            continue
+        run_job(job)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DreamMind görsel üretim worker'ı")
+    parser.add_argument("--once", action="store_true", help="Kuyruk boşalınca çık")
+    parser.add_argument("--poll", type=float, default=IMAGE_WORKER_POLL_SECONDS, help="Boş kuyrukta bekleme süresi (sn)")
+    args = parser.parse_args()
+    try:
+        run_worker(once=args.once, poll_seconds=args.poll)
+    except KeyboardInterrupt:
+        logger.info("Görsel worker'ı durduruldu.")
+
+
+if __name__ == "__main__":
+    main()
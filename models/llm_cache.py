@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+# Önbellek ayarları (.env üzerinden değiştirilebilir)
+LLM_CACHE_ENABLED = os.getenv("DREAMMIND_LLM_CACHE", "1") != "0"
+LLM_CACHE_PATH = os.getenv("DREAMMIND_LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("DREAMMIND_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("DREAMMIND_LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("DREAMMIND_LLM_CACHE_MAX_MB", "64")) * 1024 * 1024
+
+
+def hash_history(history: List[Dict[str, Any]]) -> str:
+    """
+    Sohbet geçmişinin (role/parts listesi) içerik hash'ini döner.
+    """
+    payload = json.dumps(history, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(model_name: str, system_instruction: Optional[str], history: List[Dict[str, Any]], message: str) -> str:
+    """
+    Model adı, sistem talimatı (persona), geçmiş hash'i ve yeni mesajdan içerik adresli anahtar üretir.
+    """
+    payload = json.dumps([model_name, system_instruction or "", hash_history(history), message], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    İki katmanlı LLM yanıt önbelleği: bellekte LRU + SQLite dosyasında kalıcı katman.
+    Kayıtlar TTL ile sona erer; disk katmanı toplam boyut sınırını aşınca en az kullanılanlar silinir.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 memory_entries: int = LLM_CACHE_MEMORY_ENTRIES, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, "
+            "last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+        self._conn.commit()
+        self._disk_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, response = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return response
+                del self._memory[key]
+            row = self._conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._delete_disk(key)
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, created_at, response)
+            self.disk_hits += 1
+            return response
+
+    def set(self, key: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._remember(key, now, response)
+            old = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access, size) VALUES (?, ?, ?, ?, ?)",
+                (key, response, now, now, size),
+            )
+            self._disk_bytes += size - (old[0] if old else 0)
+            if self._disk_bytes > self.max_bytes:
+                self._evict_disk(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Önbellek isabet/ıskalama sayaçlarını ve doluluk bilgisini döner.
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def _remember(self, key: str, created_at: float, response: str) -> None:
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _delete_disk(self, key: str) -> None:
+        row = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+            self._disk_bytes -= row[0]
+
+    def _evict_disk(self, now: float) -> None:
+        # Önce süresi dolanları, sonra sınırın %90'ına inene kadar en eski erişilenleri sil
+        expired = self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ? RETURNING size", (now - self.ttl_seconds,)
+        ).fetchall()
+        self._disk_bytes -= sum(size for (size,) in expired)
+        self.evictions += len(expired)
+        target = int(self.max_bytes * 0.9)
+        while self._disk_bytes > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM llm_cache ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._disk_bytes <= target:
+                    break
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._disk_bytes -= size
+                self.evictions += 1
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Süreç genelinde paylaşılan önbelleği döner. Önbellek kapalıysa veya açılamazsa None döner.
+    """
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = LLMResponseCache()
+                except Exception as e:
+                    logger.error(f"LLM önbelleği açılamadı: {e}")
+                    return None
+    return _cache
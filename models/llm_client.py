@@ -0,0 +1,375 @@
+"""
+Dayanıklı (resilient) LLM istemci katmanı.
+
+Tüm LLM çağrıları süreç genelinde tek bir asyncio event loop'u (arka plan thread'i) üzerinden yapılır:
+- Süreç genelinde eşzamanlı çağrı sınırı (semaphore)
+- Çağrı başına toplam süre sınırı (deadline; slot beklemesi dahil)
+- Tekrar denenebilir hatalarda jitter'lı üstel geri çekilme (exponential backoff)
+- Art arda hatalarda devre kesici (circuit breaker): açıkken çağrılar beklemeden reddedilir
+
+Senkron API (send/stream/generate) Streamlit script thread'inden doğrudan çağrılabilir.
+Backend soyutlaması sayesinde katman, ağ olmadan FakeLLMBackend ile test edilebilir.
+"""
+import asyncio
+import concurrent.futures
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Optional
+from loguru import logger
+
+LLM_MAX_CONCURRENCY = int(os.getenv("DREAMMIND_LLM_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("DREAMMIND_LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("DREAMMIND_LLM_MAX_RETRIES", "3"))
+LLM_BREAKER_FAILURES = int(os.getenv("DREAMMIND_LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("DREAMMIND_LLM_BREAKER_RESET", "30"))
+# Senkron köprü, event loop'un deadline'dan sonra sonucu iletmesi için bu kadar ek süre bekler
+BRIDGE_GRACE_SECONDS = 5.0
+
+# google.api_core istisnalarını import etmeden isimleriyle tanımak için
+_RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "BadGateway", "GatewayTimeout", "RetryError",
+}
+
+
+class LLMUnavailableError(Exception):
+    """
+    LLM servisine tekrar denemelere rağmen ulaşılamadığında fırlatılır.
+    """
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """
+    Devre kesici açıkken yapılan çağrılarda beklemeden fırlatılır.
+    """
+
+
+class LLMBusyError(LLMUnavailableError):
+    """
+    Eşzamanlılık slotu süre sınırı içinde boşalmadığında fırlatılır (servis hatası sayılmaz).
+    """
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Hatanın geçici (tekrar denenebilir) olup olmadığını belirler.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """
+    closed -> (art arda hata) -> open -> (bekleme süresi) -> half_open -> (başarı) -> closed
+    half_open durumunda yalnızca tek bir deneme çağrısı geçer; sonucu gelene kadar diğerleri reddedilir.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+            if self.trial_in_flight:
+                return False
+            # Tek bir deneme çağrısına izin ver
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("LLM devre kesici açıldı, çağrılar fallback'e yönlendirilecek.")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """
+        Sonucu belirlenemeyen çağrıda (iptal, yerel kuyruk zaman aşımı) deneme hakkını durumu değiştirmeden bırakır.
+        """
+        with self._lock:
+            self.trial_in_flight = False
+
+
+class GeminiBackend:
+    """
+    google.generativeai async API'sini kullanan backend.
+    """
+
+    async def send_chat(self, chat: Any, message: str) -> str:
+        response = await chat.send_message_async(message)
+        return response.text
+
+    async def stream_chat(self, chat: Any, message: str) -> AsyncIterator[str]:
+        response = await chat.send_message_async(message, stream=True)
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    async def generate(self, model: Any, prompt: str) -> str:
+        response = await model.generate_content_async(prompt)
+        return response.text
+
+
+class FakeLLMBackend:
+    """
+    Test ve yerel deneme için sahte backend. Gecikme ve sırayla fırlatılacak hatalar ayarlanabilir.
+    """
+
+    def __init__(self, reply: Callable[[str], str] = lambda message: f"Yanıt: {message}", latency: float = 0.0,
+                 failures: Iterable[BaseException] = (), chunk_size: int = 8):
+        self.reply = reply
+        self.latency = latency
+        self.failures: List[BaseException] = list(failures)
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    async def _maybe_fail(self) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.failures:
+            raise self.failures.pop(0)
+
+    async def send_chat(self, chat: Any, message: str) -> str:
+        await self._maybe_fail()
+        return self.reply(message)
+
+    async def stream_chat(self, chat: Any, message: str) -> AsyncIterator[str]:
+        await self._maybe_fail()
+        text = self.reply(message)
+        for i in range(0, len(text), self.chunk_size):
+            yield text[i:i + self.chunk_size]
+
+    async def generate(self, model: Any, prompt: str) -> str:
+        await self._maybe_fail()
+        return self.reply(prompt)
+
+
+_STREAM_END = object()
+
+
+class ResilientLLMClient:
+    """
+    Backend çağrılarını eşzamanlılık sınırı, deadline, retry ve devre kesici ile sarar.
+    """
+
+    def __init__(self, backend: Any = None, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout: float = LLM_TIMEOUT_SECONDS, max_retries: int = LLM_MAX_RETRIES,
+                 base_delay: float = 0.5, max_delay: float = 8.0, breaker: Optional[CircuitBreaker] = None):
+        self.backend = backend or GeminiBackend()
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop_lock = threading.Lock()
+
+    # --- Event loop yönetimi ---
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._loop_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="dreammind-llm-loop", daemon=True)
+                    thread.start()
+                    self._semaphore = asyncio.run_coroutine_threadsafe(self._make_semaphore(), loop).result()
+                    self._loop = loop
+        return self._loop
+
+    async def _make_semaphore(self) -> asyncio.Semaphore:
+        return asyncio.Semaphore(self.max_concurrency)
+
+    def _run(self, coro, timeout: Optional[float]) -> Any:
+        # Event loop takılırsa Streamlit thread'i sonsuza kadar beklemesin
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        try:
+            return future.result((timeout or self.timeout) + BRIDGE_GRACE_SECONDS)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise LLMUnavailableError("LLM event loop'u süre sınırı içinde yanıt vermedi.")
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _deadline(self, timeout: Optional[float]) -> float:
+        return time.monotonic() + (timeout or self.timeout)
+
+    async def _acquire_slot(self, deadline: float) -> None:
+        """
+        Eşzamanlılık slotunu bekler; bekleme de çağrının süre sınırından düşer.
+        """
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            raise LLMBusyError("LLM çağrısı eşzamanlılık slotu beklerken süre sınırını aştı.") from None
+
+    # --- Async API ---
+    async def _call(self, make_call: Callable[[], Any], deadline: float, limit: bool = True) -> Any:
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM servisi geçici olarak devre dışı (circuit open).")
+        recorded = False
+        attempt = 0
+        try:
+            while True:
+                try:
+                    if limit:
+                        await self._acquire_slot(deadline)
+                        try:
+                            result = await asyncio.wait_for(make_call(), deadline - time.monotonic())
+                        finally:
+                            self._semaphore.release()
+                    else:
+                        result = await asyncio.wait_for(make_call(), deadline - time.monotonic())
+                    self.breaker.record_success()
+                    recorded = True
+                    return result
+                except LLMBusyError:
+                    # Yerel kuyruk dolu; servisin sağlığı hakkında bilgi vermez
+                    raise
+                except Exception as e:
+                    if not is_retryable(e):
+                        # Servis yanıt verdi (ör. geçersiz istek); devre sağlıklı sayılır
+                        self.breaker.record_success()
+                        recorded = True
+                        raise
+                    remaining = deadline - time.monotonic()
+                    if attempt >= self.max_retries or remaining <= 0:
+                        self.breaker.record_failure()
+                        recorded = True
+                        raise LLMUnavailableError(f"LLM çağrısı {attempt + 1} denemede başarısız: {e!r}") from e
+                    delay = min(self._backoff(attempt), remaining)
+                    logger.warning(f"LLM çağrısı başarısız ({e!r}), {delay:.2f} sn sonra tekrar denenecek.")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+        finally:
+            if not recorded:
+                self.breaker.release()
+
+    async def send_chat_async(self, chat: Any, message: str, timeout: Optional[float] = None) -> str:
+        return await self._call(lambda: self.backend.send_chat(chat, message), self._deadline(timeout))
+
+    async def generate_async(self, model: Any, prompt: str, timeout: Optional[float] = None) -> str:
+        return await self._call(lambda: self.backend.generate(model, prompt), self._deadline(timeout))
+
+    async def _pump_stream(self, chat: Any, message: str, deadline: float, out: "queue.Queue") -> None:
+        # İlk parça gelene kadar retry yapılır; akış başladıktan sonra hata doğrudan iletilir
+
+        async def first_chunk():
+            stream = self.backend.stream_chat(chat, message).__aiter__()
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = None
+            return stream, first
+
+        try:
+            # Akış boyunca tek bir eşzamanlılık slotu tutulur; slot beklemesi de süre sınırına dahildir
+            await self._acquire_slot(deadline)
+            try:
+                stream, first = await self._call(first_chunk, deadline, limit=False)
+                if first is not None:
+                    out.put(first)
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise LLMUnavailableError("LLM akışı süre sınırını aştı.")
+                        try:
+                            chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+                        except StopAsyncIteration:
+                            break
+                        out.put(chunk)
+            finally:
+                self._semaphore.release()
+            out.put(_STREAM_END)
+        except BaseException as e:
+            out.put(e)
+
+    # --- Senkron API ---
+    def send_chat(self, chat: Any, message: str, timeout: Optional[float] = None) -> str:
+        return self._run(self.send_chat_async(chat, message, timeout), timeout)
+
+    def generate(self, model: Any, prompt: str, timeout: Optional[float] = None) -> str:
+        return self._run(self.generate_async(model, prompt, timeout), timeout)
+
+    def stream_chat(self, chat: Any, message: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Akışı senkron bir iterator olarak döner; parçalar event loop thread'inden kuyrukla aktarılır.
+        """
+        out: "queue.Queue" = queue.Queue()
+        deadline = self._deadline(timeout)
+        future = asyncio.run_coroutine_threadsafe(self._pump_stream(chat, message, deadline, out), self._ensure_loop())
+        try:
+            while True:
+                try:
+                    item = out.get(timeout=max(deadline - time.monotonic(), 0) + BRIDGE_GRACE_SECONDS)
+                except queue.Empty:
+                    raise LLMUnavailableError("LLM event loop'u süre sınırı içinde yanıt vermedi.") from None
+                if item is _STREAM_END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Tüketici akışı erken bırakırsa (Streamlit rerun/stop, close()) pompa iptal edilir ve slotu serbest kalır
+            if not future.done():
+                future.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+_client: Optional[ResilientLLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> ResilientLLMClient:
+    """
+    Süreç genelinde paylaşılan LLM istemcisini döner.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ResilientLLMClient()
+    return _client
+
+
+def set_llm_client(client: Optional[ResilientLLMClient]) -> None:
+    """
+    Paylaşılan istemciyi değiştirir (ör. testlerde FakeLLMBackend kullanmak için).
+    """
+    global _client
+    with _client_lock:
+        _client = client
@@ -0,0 +1,111 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from loguru import logger
+
+_genai: Any = None
+_genai_loaded = False
+_genai_lock = threading.Lock()
+
+
+def load_genai() -> Any:
+    """
+    google.generativeai modülünü ilk kullanımda import eder (import süresi ~1 sn); yüklü değilse None döner.
+    """
+    global _genai, _genai_loaded
+    if not _genai_loaded:
+        with _genai_lock:
+            if not _genai_loaded:
+                try:
+                    import google.generativeai as genai
+                    _genai = genai
+                except ImportError:
+                    _genai = None
+                _genai_loaded = True
+    return _genai
+
+
+class ModelRegistry:
+    """
+    Süreç genelinde thread-safe Gemini model kayıt defteri.
+    API istemcisi yalnızca bir kez yapılandırılır ve her (model_name, system_instruction)
+    çifti için tek bir GenerativeModel nesnesi oluşturulup paylaşılır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configured_key: Optional[str] = None
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._build_seconds: Dict[Tuple[str, str], float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, api_key: str) -> None:
+        """
+        genai.configure çağrısını anahtar değişmedikçe yalnızca bir kez yapar.
+        """
+        genai = load_genai()
+        if genai is None:
+            raise ImportError("google.generativeai modülü yüklü değil.")
+        if self._configured_key == api_key:
+            return
+        with self._lock:
+            if self._configured_key != api_key:
+                genai.configure(api_key=api_key)
+                self._configured_key = api_key
+                # Farklı anahtarla oluşturulmuş modeller geçersizdir
+                self._models.clear()
+                self._build_seconds.clear()
+
+    def get_model(self, api_key: str, model_name: str, system_instruction: Optional[str] = None) -> Any:
+        """
+        İstenen model nesnesini önbellekten döner, yoksa oluşturup kaydeder.
+        """
+        self.configure(api_key)
+        key = (model_name, system_instruction or "")
+        model = self._models.get(key)
+        if model is not None:
+            self.hits += 1
+            return model
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                model = load_genai().GenerativeModel(model_name=model_name, system_instruction=system_instruction)
+                self._build_seconds[key] = time.perf_counter() - started
+                self._models[key] = model
+                self.misses += 1
+            else:
+                self.hits += 1
+        return model
+
+    def warm_up(self, api_key: str, model_name: str, system_instructions: Iterable[Optional[str]]) -> None:
+        """
+        Verilen sistem talimatları için modelleri önceden oluşturur.
+        """
+        for instruction in system_instructions:
+            try:
+                self.get_model(api_key, model_name, instruction)
+            except Exception as e:
+                logger.error(f"Model önceden oluşturulamadı: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Kayıtlı model sayısı, isabet/ıskalama ve toplam oluşturma süresini döner.
+        """
+        with self._lock:
+            build_seconds = list(self._build_seconds.values())
+            return {
+                "models": len(self._models),
+                "hits": self.hits,
+                "misses": self.misses,
+                "build_seconds_total": sum(build_seconds),
+                "build_seconds_max": max(build_seconds, default=0.0),
+            }
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _registry
@@ -0,0 +1,106 @@
+"""
+Stable Diffusion çıkarım profilleri.
+
+GPU'suz sunucularda görsel üretim süresi büyük ölçüde adım sayısı, çözünürlük ve thread ayarlarına bağlıdır.
+Profil DREAMMIND_SD_PROFILE ile seçilir; karşılaştırma için:
+
+    python -m benchmarks.sd_profiles
+
+Bu modül torch/diffusers'ı yalnızca profil uygulanırken import eder; sayfalar önbellek anahtarı
+hesaplamak için güvenle import edebilir.
+"""
+import os
+from typing import Any, Dict, NamedTuple, Optional
+from loguru import logger
+from models.image_store import params_key
+
+
+class SDProfile(NamedTuple):
+    name: str
+    # "default" modelin kendi scheduler'ını korur; "dpm" DPMSolverMultistep (daha az adımda benzer kalite)
+    scheduler: str
+    steps: int
+    guidance: float
+    width: int
+    height: int
+    attention_slicing: bool
+    channels_last: bool
+    # 0: fiziksel çekirdek sayısı kadar thread
+    threads: int
+    warmup: bool
+
+
+SD_PROFILES: Dict[str, SDProfile] = {
+    # Eski davranış: varsayılan scheduler, 30 adım, 512x512
+    "quality": SDProfile("quality", "default", 30, 7.5, 512, 512, False, False, 0, False),
+    "balanced": SDProfile("balanced", "dpm", 20, 7.0, 512, 512, True, True, 0, True),
+    "fast": SDProfile("fast", "dpm", 12, 6.5, 384, 384, True, True, 0, True),
+}
+
+SD_PROFILE = os.getenv("DREAMMIND_SD_PROFILE", "balanced")
+
+
+def get_profile(name: Optional[str] = None) -> SDProfile:
+    name = name or SD_PROFILE
+    profile = SD_PROFILES.get(name)
+    if profile is None:
+        logger.warning(f"Bilinmeyen SD profili '{name}', 'balanced' kullanılacak.")
+        profile = SD_PROFILES["balanced"]
+    return profile
+
+
+def profile_params_key(prompt: str, seed: Optional[int], profile: Optional[SDProfile] = None) -> str:
+    """
+    Görsel deposu anahtarı; çıktıyı etkileyen profil ayarlarını (scheduler, boyut) da içerir.
+    """
+    profile = profile or get_profile()
+    return params_key(prompt, seed, profile.steps, profile.guidance,
+                      extra=f"{profile.scheduler}|{profile.width}x{profile.height}")
+
+
+def _physical_cores() -> int:
+    count = os.cpu_count() or 1
+    # Hyper-threading açık sistemlerde mantıksal çekirdeklerin yarısı genellikle daha hızlıdır
+    return max(1, count // 2) if count > 2 else count
+
+
+def configure_threads(profile: SDProfile) -> int:
+    import torch
+
+    threads = profile.threads or _physical_cores()
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Paralel iş başladıktan sonra değiştirilemez; ilk yüklemede ayarlanmış olur
+        pass
+    return threads
+
+
+def apply_profile(pipe: Any, profile: SDProfile) -> Any:
+    """
+    Yüklenmiş pipeline'a profilin scheduler, bellek düzeni ve attention ayarlarını uygular.
+    """
+    import torch
+
+    if profile.scheduler == "dpm":
+        from diffusers import DPMSolverMultistepScheduler
+        pipe.scheduler = DPMSolverMultistepScheduler.from_config(pipe.scheduler.config, use_karras_sigmas=True)
+    if profile.attention_slicing:
+        pipe.enable_attention_slicing()
+    if profile.channels_last:
+        pipe.unet.to(memory_format=torch.channels_last)
+        pipe.vae.to(memory_format=torch.channels_last)
+    pipe.set_progress_bar_config(disable=True)
+    return pipe
+
+
+def warm_up(pipe: Any, profile: SDProfile) -> None:
+    """
+    İlk istekteki tek seferlik maliyetleri (bellek ayırma, kernel seçimi) önceden öder.
+    """
+    import torch
+
+    with torch.inference_mode():
+        pipe("warm-up", num_inference_steps=1, guidance_scale=profile.guidance,
+             width=profile.width, height=profile.height)
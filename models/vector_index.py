@@ -0,0 +1,175 @@
+"""
+Kullanıcı bazlı rüya embedding indeksi.
+
+Her kullanıcının vektörleri SQLite'ta (dream_embedding tablosu, float32 BLOB) saklanır ve ilk aramada
+tek sorguyla (n, d) boyutlu bir NumPy matrisine yüklenir. Arama, normalize vektörler üzerinde tek bir
+matris-vektör çarpımı ve argpartition ile yapılır; eklemeler ve silmeler bellekteki matrise de yansıtılır.
+Yeni kayıtların vektörleri arka planda models.embedding_worker tarafından üretilip add_vectors ile eklenir;
+embedding'i eksik eski kayıtlar da indeks yüklenirken aynı kuyruğa alınır, arama thread'i model çıkarımı yapmaz.
+"""
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from database.db_manager import (
+    add_delete_listener, get_dream_analyses_by_ids, list_unindexed_dreams, load_dream_embeddings,
+    save_dream_embeddings,
+)
+from database.models import DreamAnalysis
+from models.embeddings import embed_texts, embeddings_available
+
+# Bellekte matrisi tutulacak en fazla kullanıcı sayısı (LRU)
+MAX_CACHED_USERS = 64
+# İndeks yüklenirken embedding'i eksik rüyalardan tek seferde arka plan kuyruğuna alınacak en fazla kayıt
+BACKFILL_ON_LOAD = 64
+
+
+class UserVectorIndex:
+    """
+    Tek bir kullanıcının id haritası ve float32 vektör matrisi.
+    """
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray):
+        self.ids = ids
+        self.matrix = matrix
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[int, bytes]]) -> "UserVectorIndex":
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32))
+        ids = np.fromiter((dream_id for dream_id, _ in rows), dtype=np.int64, count=len(rows))
+        matrix = np.frombuffer(b"".join(vector for _, vector in rows), dtype=np.float32).reshape(len(rows), -1)
+        return cls(ids, matrix)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        # Aynı id tekrar eklenirse eski vektörü değiştir
+        self.remove(ids)
+        if len(self.ids) == 0:
+            self.ids, self.matrix = ids.astype(np.int64), vectors
+        else:
+            self.ids = np.concatenate([self.ids, ids.astype(np.int64)])
+            self.matrix = np.vstack([self.matrix, vectors])
+
+    def remove(self, ids: Iterable[int]) -> None:
+        if len(self.ids) == 0:
+            return
+        keep = ~np.isin(self.ids, np.asarray(list(ids), dtype=np.int64))
+        if not keep.all():
+            self.ids, self.matrix = self.ids[keep], self.matrix[keep]
+
+    def search(self, query: np.ndarray, k: int, exclude_ids: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        if len(self.ids) == 0:
+            return []
+        scores = self.matrix @ query
+        exclude = list(exclude_ids)
+        if exclude:
+            scores[np.isin(self.ids, exclude)] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[i]), float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+
+class DreamVectorIndex:
+    """
+    Kullanıcı indekslerini LRU olarak bellekte tutar, DB ile senkron ekleme/silme yapar.
+    """
+
+    def __init__(self, max_users: int = MAX_CACHED_USERS):
+        self.max_users = max_users
+        self._users: "OrderedDict[int, UserVectorIndex]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _get(self, user_id: int) -> UserVectorIndex:
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is not None:
+                self._users.move_to_end(user_id)
+                return index
+            index = UserVectorIndex.from_rows(load_dream_embeddings(user_id))
+            self._users[user_id] = index
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        # Embedding'i olmayan eski kayıtlar arka planda kodlanır; bu arama yalnızca indekslenmiş kayıtları görür
+        missing = list_unindexed_dreams(user_id, limit=BACKFILL_ON_LOAD)
+        if missing:
+            from models.embedding_worker import enqueue_items
+            enqueue_items([("dream", dream_id, user_id, text) for dream_id, text in missing])
+        return index
+
+    def add_vectors(self, dreams: List[Tuple[int, int]], vectors: np.ndarray) -> None:
+        """
+        Hazır (dream_id, user_id) vektörlerini DB'ye yazar ve bellekte yüklü indekslere ekler.
+        """
+        if not dreams:
+            return
+        save_dream_embeddings([
+            (dream_id, user_id, vectors.shape[1], vectors[i].tobytes())
+            for i, (dream_id, user_id) in enumerate(dreams)
+        ])
+        with self._lock:
+            for user_id in {user_id for _, user_id in dreams}:
+                index = self._users.get(user_id)
+                if index is None:
+                    continue
+                rows = [i for i, dream in enumerate(dreams) if dream[1] == user_id]
+                index.append(np.array([dreams[i][0] for i in rows], dtype=np.int64), vectors[rows])
+
+    def remove(self, dream_id: int, user_id: int) -> None:
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is not None:
+                index.remove([dream_id])
+
+    def search(self, user_id: int, query_text: str, k: int = 5,
+               exclude_ids: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """
+        Sorgu metnine en benzer k rüyayı (dream_id, kosinüs benzerliği) olarak döner.
+        """
+        if not query_text or not embeddings_available():
+            return []
+        index = self._get(user_id)
+        query = embed_texts([query_text])[0]
+        with self._lock:
+            return index.search(query, k, exclude_ids)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+
+_index = DreamVectorIndex()
+
+
+def get_dream_index() -> DreamVectorIndex:
+    return _index
+
+
+def find_similar_dreams(user_id: int, query_text: str, k: int = 5,
+                        exclude_ids: Iterable[int] = ()) -> List[Tuple[DreamAnalysis, float]]:
+    """
+    Sorguya benzeyen geçmiş rüya kayıtlarını benzerlik skorlarıyla döner.
+    """
+    try:
+        hits = _index.search(user_id, query_text, k, exclude_ids)
+    except Exception as e:
+        logger.error(f"Benzer rüya araması başarısız: {e}")
+        return []
+    scores = dict(hits)
+    records = get_dream_analyses_by_ids(user_id, [dream_id for dream_id, _ in hits])
+    return [(record, scores[record.id]) for record in records]
+
+
+def _on_record_deleted(model, record_id: int, user_id: int) -> None:
+    if model is DreamAnalysis:
+        _index.remove(record_id, user_id)
+
+
+add_delete_listener(_on_record_deleted)
@@ -1,18 +1,31 @@
 import streamlit as st
-from models.gemini_client import start_dream_analysis_chat, GEMINI_API_KEY
+from components.session import restore_session
+from models.gemini_client import start_dream_analysis_chat, resume_dream_analysis_chat, GEMINI_API_KEY
 import pyperclip
 import time
-from database.db_manager import add_dream_analysis, list_dream_analyses, delete_dream_analysis
-import pandas as pd
-from models.image_gen import generate_dream_image
+from database.db_manager import add_dream_analysis, list_dream_analyses_page, delete_dream_analysis, set_conversation_dream
+from components.history import get_history_rows, render_load_older, drop_history_row, reset_history
+from components.conversations import (
+    start_persisted_conversation, persist_turn, requested_conversation, clear_conversation_param,
+    render_saved_conversations, CONVERSATION_PARAM,
+)
+from database.image_jobs import submit_job, get_job, job_result_paths, cancel_job, queue_position, QueueFullError
+from models.image_store import derive_seeds, get_image_store, prompt_seed
+from models.sd_profiles import profile_params_key
+from utils.warmup import start_background_services
+
+# Oturum çerezi bileşeni restore_session içinde çizildiğinden sayfa ayarı önce yapılır
+st.set_page_config(page_title="🔮 Rüya Analizi", page_icon="🔮")
+
+# Sayfa doğrudan açılmış olabilir; veritabanı ve embedding worker'ı süreç başına bir kez hazırlanır
+start_background_services()
 
 # --- Authentication Check ---
+restore_session()
 if not st.session_state.get('logged_in') and not st.session_state.get('is_guest'):
     st.error("Bu sayfayı görüntülemek için lütfen giriş yapın veya misafir olarak devam edin.")
     st.stop()
 
-st.set_page_config(page_title="🔮 Rüya Analizi", page_icon="🔮")
-
 st.title("🔮 Rüya Analizi")
 st.markdown("Rüyanızı aşağıya yazın, AI analizini başlatın!")
 
@@ -27,15 +40,73 @@ if "dream_messages" not in st.session_state:
     st.session_state.dream_messages = []
 if "dream_analysis_started" not in st.session_state:
     st.session_state.dream_analysis_started = False
+if "dream_conversation_id" not in st.session_state:
+    st.session_state.dream_conversation_id = None
+if "dream_id" not in st.session_state:
+    st.session_state.dream_id = None
 
 # --- Session State Initialization for Image Visualization (existing) ---
 if "dream_image_path" not in st.session_state:
     st.session_state.dream_image_path = None
 if "visualize_mode" not in st.session_state:
     st.session_state.visualize_mode = False
+if "dream_image_job" not in st.session_state:
+    st.session_state.dream_image_job = None
+if "dream_image_variant" not in st.session_state:
+    st.session_state.dream_image_variant = 0
+if "dream_image_candidates" not in st.session_state:
+    st.session_state.dream_image_candidates = []
+
+# Görsel işi sürerken sayfanın durum kontrolü için yeniden çalıştırılma aralığı (sn)
+IMAGE_JOB_POLL_SECONDS = 2
+# Tek seferde istenebilecek en fazla varyasyon sayısı
+MAX_IMAGE_VARIANTS = 4
+poll_image_job = False
 
 RATE_LIMIT_SECONDS = 60 # Not directly used for chat, but kept for reference
 
+def reset_dream_chat():
+    st.session_state.dream_chat_session = None
+    st.session_state.pop("dream_similar", None)
+    st.session_state.dream_messages = []
+    st.session_state.dream_analysis_started = False
+    st.session_state.dream_conversation_id = None
+    st.session_state.dream_id = None
+    st.session_state.dream_image_path = None # Clear image for new chat
+    st.session_state.dream_image_job = None
+    st.session_state.dream_image_variant = 0
+    st.session_state.dream_image_candidates = []
+    st.session_state.visualize_mode = False
+
+def current_dream_id():
+    # Rüya kaydı yalnızca giriş yapmış kullanıcılar için tutulur; id ilk analiz kaydedilirken alınır
+    if not st.session_state.get('logged_in'):
+        return None
+    return st.session_state.dream_id
+
+def set_dream_image(path):
+    st.session_state.dream_image_path = path
+    st.session_state.dream_image_candidates = []
+    dream_id = current_dream_id()
+    if dream_id:
+        get_image_store().link_dream(dream_id, path)
+
+# --- Resume Saved Conversation (sayfa yenilendiğinde veya geçmişten seçildiğinde) ---
+if not st.session_state.dream_analysis_started:
+    resumed = requested_conversation("dream")
+    if resumed:
+        conversation, stored_messages = resumed
+        st.session_state.dream_chat_session = resume_dream_analysis_chat(stored_messages)
+        if st.session_state.dream_chat_session:
+            st.session_state.dream_messages = [{"role": role, "content": content} for role, content in stored_messages]
+            st.session_state.dream_conversation_id = conversation.id
+            st.session_state.dream_id = conversation.dream_id
+            st.session_state.dream_analysis_started = True
+            # Rüyaya bağlı görsel varsa geri yükle
+            dream_id = current_dream_id()
+            if dream_id:
+                st.session_state.dream_image_path = get_image_store().dream_image_paths([dream_id]).get(dream_id)
+
 # --- Initial Dream Input Form ---
 if not st.session_state.dream_analysis_started:
     with st.form("initial_dream_form"):
@@ -48,49 +119,76 @@ if not st.session_state.dream_analysis_started:
         else:
             with st.spinner("Rüya analizi başlatılıyor..."):
                 st.session_state.dream_chat_session = start_dream_analysis_chat()
-                if st.session_state.dream_chat_session:
-                    # Send initial dream and get first response
-                    ai_response = st.session_state.dream_chat_session.send_message(dream_text_input)
-                    st.session_state.dream_messages.append({"role": "user", "content": dream_text_input})
-                    st.session_state.dream_messages.append({"role": "model", "content": ai_response})
-                    st.session_state.dream_analysis_started = True
-                    # Save initial analysis for logged-in users
-                    if st.session_state.get('logged_in'):
-                        add_dream_analysis(st.session_state['user_id'], dream_text_input, ai_response) # Save initial response
-                    st.rerun()
-                else:
-                    st.error("Sohbet oturumu başlatılamadı. API anahtarını kontrol edin.")
+            if st.session_state.dream_chat_session:
+                # İlk yanıt sohbet ekranında akış (stream) olarak üretilecek
+                st.session_state.dream_messages.append({"role": "user", "content": dream_text_input})
+                st.session_state.dream_conversation_id = start_persisted_conversation("dream", dream_text_input[:60])
+                st.session_state.dream_analysis_started = True
+                st.rerun()
+            else:
+                st.error("Sohbet oturumu başlatılamadı. API anahtarını kontrol edin.")
 
 # --- Chat Interface ---
 if st.session_state.dream_analysis_started:
     st.markdown("---")
     st.subheader("💬 Rüya Analizi Sohbeti")
 
+    # Bağlam bütçesi kullanımı (uzun sohbetlerde eski turlar özetlenir)
+    if st.session_state.dream_chat_session:
+        usage = st.session_state.dream_chat_session.budget_usage()
+        st.caption(f"🧠 Bağlam: ~{usage['tokens']}/{usage['budget']} token · özetlenen tur: {usage['summarized_turns']}")
+
     # Display chat messages from history
     for message in st.session_state.dream_messages:
         with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+            if message.get("failed"):
+                st.warning(message["content"])
+            else:
+                st.markdown(message["content"])
+
+    def record_reply(user_message, ai_response):
+        # Yedek/yarıda kalan yanıtlar yalnızca ekranda gösterilir; sohbete ve analiz geçmişine kaydedilmez
+        failed = st.session_state.dream_chat_session.last_reply_failed
+        st.session_state.dream_messages.append({"role": "model", "content": ai_response, "failed": failed})
+        if failed:
+            # Uyarı ve "Tekrar Dene" butonu sohbet geçmişiyle birlikte yeniden çizilir
+            st.rerun()
+        persist_turn(st.session_state.dream_conversation_id, user_message, ai_response)
+        # Save initial analysis for logged-in users
+        if len(st.session_state.dream_messages) == 2 and st.session_state.get('logged_in'):
+            st.session_state.dream_id = add_dream_analysis(st.session_state['user_id'], user_message, ai_response) # Save initial response
+            if st.session_state.dream_conversation_id:
+                set_conversation_dream(st.session_state.dream_conversation_id, st.session_state['user_id'], st.session_state.dream_id)
+            reset_history("dream")
+
+    # Son mesaj yanıtlanmamışsa (ilk rüya metni veya yarıda kalan akış) yanıtı akış olarak üret
+    if st.session_state.dream_messages and st.session_state.dream_messages[-1]["role"] == "user":
+        pending_message = st.session_state.dream_messages[-1]["content"]
+        with st.chat_message("model"):
+            ai_response = st.write_stream(st.session_state.dream_chat_session.send_message_stream(pending_message))
+        record_reply(pending_message, ai_response)
+
+    # Son yanıt alınamadıysa sohbet, aynı mesaj yeniden denenene kadar bekler
+    last_failed = bool(st.session_state.dream_messages and st.session_state.dream_messages[-1].get("failed"))
+    if last_failed and st.button("🔁 Tekrar Dene"):
+        st.session_state.dream_messages.pop()
+        st.rerun()
 
     # Chat input for new messages
-    if prompt := st.chat_input("Rüyanız hakkında daha fazla soru sorun veya yorum yapın..."):
+    if prompt := st.chat_input("Rüyanız hakkında daha fazla soru sorun veya yorum yapın...", disabled=last_failed):
         st.session_state.dream_messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
         with st.chat_message("model"):
-            with st.spinner("AI yanıtlıyor..."):
-                ai_response = st.session_state.dream_chat_session.send_message(prompt)
-                st.markdown(ai_response)
-                st.session_state.dream_messages.append({"role": "model", "content": ai_response})
+            ai_response = st.write_stream(st.session_state.dream_chat_session.send_message_stream(prompt))
+        record_reply(prompt, ai_response)
 
     col_chat_actions = st.columns(2)
     with col_chat_actions[0]:
         if st.button("🔄 Yeni Sohbet Başlat"):
-            st.session_state.dream_chat_session = None
-            st.session_state.dream_messages = []
-            st.session_state.dream_analysis_started = False
-            st.session_state.dream_image_path = None # Clear image for new chat
-            st.session_state.visualize_mode = False
+            reset_dream_chat()
+            clear_conversation_param()
             st.rerun()
     with col_chat_actions[1]:
         # --- Dream Visualization (Available for Guests too, but won't be saved) ---
@@ -100,6 +198,43 @@ if st.session_state.dream_analysis_started:
                 st.session_state.visualize_mode = True
                 st.session_state.dream_image_path = None # Clear old image
                 st.rerun()
+        elif st.session_state.dream_image_candidates:
+            # Izgarada yalnızca küçük önizlemeler yüklenir; tam boyutlu görsel seçilince gösterilir
+            st.caption("Bir varyasyon seçin:")
+            store = get_image_store()
+            candidate_cols = st.columns(len(st.session_state.dream_image_candidates))
+            for i, (col, path) in enumerate(zip(candidate_cols, st.session_state.dream_image_candidates)):
+                with col:
+                    st.image(store.thumbnail_for(path), use_column_width=True)
+                    if st.button("Seç", key=f"select_dream_image_{i}"):
+                        set_dream_image(path)
+                        st.rerun()
+        elif st.session_state.dream_image_job:
+            # Görsel ayrı worker sürecinde üretilir; burada yalnızca durumu okunur
+            job = get_job(st.session_state.dream_image_job)
+            if job is None or job.status == "cancelled":
+                st.session_state.dream_image_job = None
+                st.info("Görsel üretimi iptal edildi.")
+            elif job.status == "done":
+                paths = job_result_paths(job)
+                if len(paths) == 1:
+                    set_dream_image(paths[0])
+                else:
+                    st.session_state.dream_image_candidates = paths
+                st.session_state.dream_image_job = None
+                st.rerun()
+            elif job.status == "failed":
+                st.session_state.dream_image_job = None
+                st.error("Görsel üretilemedi.")
+            else:
+                if job.status == "queued":
+                    st.info(f"Görsel sırada bekliyor (önünde {queue_position(job.id)} iş var)...")
+                else:
+                    st.progress(job.progress, text=f"Rüya görseli üretiliyor... %{job.progress * 100:.0f}")
+                if st.button("⛔ Görseli İptal Et"):
+                    cancel_job(job.id)
+                    st.rerun()
+                poll_image_job = True
         elif st.session_state.visualize_mode:
             with st.form("visualize_form"):
                 st.info("Görsel oluşturmak için aşağıdaki metni düzenleyin veya kendi isteminizi yazın.")
@@ -107,36 +242,86 @@ if st.session_state.dream_analysis_started:
                 # Use the initial dream text for suggestion, not the chat history
                 suggested_prompt = st.session_state.dream_messages[0]["content"][:150] + "..." if st.session_state.dream_messages else ""
                 image_prompt = st.text_area("Görselleştirme İstemi (Prompt)", value=suggested_prompt, height=100)
+                variant_count = st.select_slider("Varyasyon sayısı", options=list(range(1, MAX_IMAGE_VARIANTS + 1)), value=1)
                 
                 submitted_visualize = st.form_submit_button("Görseli Oluştur")
                 if submitted_visualize:
-                    with st.spinner("Rüya görseli üretiliyor..."):
-                        image_path = generate_dream_image(image_prompt)
-                        if image_path:
-                            st.session_state.dream_image_path = image_path
+                    seed = prompt_seed(image_prompt, st.session_state.dream_image_variant)
+                    # Aynı parametrelerle üretilmiş görseller depoda varsa kuyruğa gitmeden göster
+                    store = get_image_store()
+                    cached_paths = [store.get(profile_params_key(image_prompt, variant_seed))
+                                    for variant_seed in derive_seeds(seed, variant_count)]
+                    try:
+                        if all(cached_paths):
+                            if len(cached_paths) == 1:
+                                set_dream_image(cached_paths[0])
+                            else:
+                                st.session_state.dream_image_candidates = cached_paths
                         else:
-                            st.error("Görsel üretilemedi.")
-                    st.session_state.visualize_mode = False
-                    st.rerun()
+                            # Tüm varyasyonlar worker'da tek batch çağrısında üretilir
+                            st.session_state.dream_image_job = submit_job(image_prompt, st.session_state.get('user_id'),
+                                                                          seed, variant_count)
+                        # Sonraki istek farklı seed'lerle yeni görseller üretsin
+                        st.session_state.dream_image_variant += variant_count
+                        st.session_state.visualize_mode = False
+                        st.rerun()
+                    except QueueFullError:
+                        st.warning("Görsel kuyruğu şu anda dolu, lütfen biraz sonra tekrar deneyin.")
         else:
             if st.button("🎨 Rüyamı Görselleştir"):
                 st.session_state.visualize_mode = True
                 st.rerun()
 
+# --- Similar Past Dreams (anlamsal arama, yalnızca giriş yapmış kullanıcılar) ---
+if st.session_state.get('logged_in') and st.session_state.dream_analysis_started and st.session_state.dream_messages:
+    dream_text = st.session_state.dream_messages[0]["content"]
+    # Sorgu her yeniden çizimde tekrar kodlanmasın
+    cached = st.session_state.get("dream_similar")
+    if not cached or cached[0] != dream_text:
+        # Vektör indeksi (NumPy + embedding modeli) yalnızca arama gerektiğinde yüklenir
+        from models.vector_index import find_similar_dreams
+        matches = find_similar_dreams(st.session_state['user_id'], dream_text, k=4)
+        cached = (dream_text, [(rec, score) for rec, score in matches if rec.dream_text != dream_text][:3])
+        st.session_state.dream_similar = cached
+    if cached[1]:
+        st.markdown("---")
+        st.subheader("🔗 Benzer Geçmiş Rüyalar")
+        for rec, score in cached[1]:
+            with st.expander(f"{rec.created_at.strftime('%d.%m.%Y %H:%M')} - Rüya #{rec.id} · benzerlik %{score * 100:.0f}"):
+                st.markdown(f"**Rüya:**\n{rec.dream_text}")
+                st.markdown(f"**Analiz:**\n{rec.analysis_result}")
+
 # --- History Section (Logged-in users only) ---
 if st.session_state.get('logged_in'):
+    st.markdown("---")
+    st.subheader("💬 Kayıtlı Sohbetler")
+    resume_id = render_saved_conversations("dream")
+    if resume_id:
+        reset_dream_chat()
+        st.query_params[CONVERSATION_PARAM] = str(resume_id)
+        st.rerun()
+
     st.markdown("---")
     st.subheader("🕑 Rüya Analizi Geçmişi")
     
-    records = list_dream_analyses(st.session_state['user_id'], limit=30)
+    def fetch_dream_page(cursor):
+        return list_dream_analyses_page(st.session_state['user_id'], cursor, page_size=30)
+
+    records = get_history_rows("dream", fetch_dream_page)
     if not records:
         st.info("Henüz analiz geçmişiniz yok.")
     else:
-        df = pd.DataFrame([{"id": r.id, "created_at": r.created_at, "dream_text": r.dream_text} for r in records])
-        for _, rec in df.iterrows():
-            with st.expander(f"{rec['created_at'].strftime('%d.%m.%Y %H:%M')} - Rüya #{rec['id']}"):
-                st.markdown(f"**Rüya:**\n{rec['dream_text']}")
-                if st.button(f"❌ Sil", key=f"del_dream_{rec['id']}"):
-                    delete_dream_analysis(rec['id'])
+        for rec in records:
+            with st.expander(f"{rec.created_at.strftime('%d.%m.%Y %H:%M')} - Rüya #{rec.id}"):
+                st.markdown(f"**Rüya:**\n{rec.dream_text}")
+                if st.button(f"❌ Sil", key=f"del_dream_{rec.id}"):
+                    delete_dream_analysis(rec.id)
+                    drop_history_row("dream", rec.id)
                     st.success("Kayıt silindi!")
-                    st.rerun()
\ No newline at end of file
+                    st.rerun()
+        render_load_older("dream", fetch_dream_page)
+
+# --- Görsel işi durum takibi (sayfa çizildikten sonra) ---
+if poll_image_job:
+    time.sleep(IMAGE_JOB_POLL_SECONDS)
+    st.rerun()
@@ -1,17 +1,28 @@
 import streamlit as st
-from datetime import date
-from database.db_manager import add_mood_record, list_mood_records, delete_mood_record
+from components.session import restore_session
+from datetime import timedelta
+from database.db_manager import add_mood_record, list_mood_counts, get_mood_distribution, list_mood_records_page, delete_mood_record
+from components.history import get_history_rows, render_load_older, drop_history_row, reset_history
+import numpy as np
 import pandas as pd
 import plotly.express as px
+from utils.analytics_cache import get_analytics_cache
+from utils.mood_stats import MOOD_OPTIONS, WEEKDAY_LABELS, compute_mood_stats, utc_today
+from utils.warmup import start_background_services
+
+# Oturum çerezi bileşeni restore_session içinde çizildiğinden sayfa ayarı önce yapılır
+st.set_page_config(page_title="😊 Mood Tracker", page_icon="😊")
+
+# Sayfa doğrudan açılmış olabilir; veritabanı ve embedding worker'ı süreç başına bir kez hazırlanır
+start_background_services()
 
 # --- Authentication Check ---
 
+restore_session()
 if not st.session_state.get('logged_in') and not st.session_state.get('is_guest'):
     st.error("Bu sayfayı görüntülemek için lütfen giriş yapın veya misafir olarak devam edin.")
     st.stop()
 
-st.set_page_config(page_title="😊 Mood Tracker", page_icon="😊")
-
 st.title("😊 Mood Tracker")
 st.markdown("Günlük ruh halinizi kaydedin ve değişimi takip edin.")
 
@@ -21,40 +32,90 @@ if st.session_state.get('is_guest'):
 
 # --- Mood Submission Form (Disabled for guests) ---
 with st.form("mood_form"):
-    mood = st.selectbox("Bugünkü ruh haliniz?", ["😊 Mutlu", "😢 Üzgün", "😠 Sinirli", "😨 Korkmuş", "🫥 Depresyonda","😲 Şaşkın", "🤢 İğrenmiş", "😐 Nötr","🥲 Duygusal","💖 Heyecanlı","😥 Kaygılı","🥵Başından aşağı kaynar sular dökülmüş","🤒 Hasta"])
+    mood = st.selectbox("Bugünkü ruh haliniz?", MOOD_OPTIONS)
     note = st.text_input("Eklemek istediğiniz bir not var mı?")
     submitted = st.form_submit_button("Kaydet", use_container_width=True, disabled=st.session_state.get('is_guest'))
 
 if submitted and st.session_state.get('logged_in'):
     add_mood_record(st.session_state['user_id'], mood, note)
-    st.success(f"{date.today()} - Ruh hali kaydedildi: {mood}")
+    reset_history("mood")
+    st.success(f"{utc_today()} - Ruh hali kaydedildi: {mood}")
     st.rerun()
 
 # --- Analytics and History (Logged-in users only) ---
 if st.session_state.get('logged_in'):
     st.markdown("---")
     st.subheader("📈 Mood Trend Grafiği")
-    records = list_mood_records(st.session_state['user_id'], limit=90)
+    # Grafikler günlük özet tablosundan okunur; aralık ham kayıt sayısından bağımsızdır
+    range_options = {"Son 30 gün": 30, "Son 90 gün": 90, "Son 1 yıl": 365, "Tümü": None}
+    range_label = st.selectbox("Zaman aralığı", list(range_options), index=1)
+    range_days = range_options[range_label]
+
+    def build_mood_charts(user_id, range_days):
+        """
+        Seçili aralığın metriklerini ve figürlerini hesaplar; sonuç (kullanıcı, veri versiyonu, aralık)
+        anahtarıyla önbelleğe alınır ve veri değişmedikçe yeniden çalıştırmalarda veritabanına gidilmez.
+        """
+        start_day = utc_today() - timedelta(days=range_days) if range_days else None
+        # Kayan ortalamalar aralık başında da doğru olsun diye istatistikler tüm geçmiş üzerinden hesaplanır
+        stats = compute_mood_stats(list_mood_counts(user_id))
+        if stats is None or int((stats.record_counts > 0).sum()) < 2:
+            return None
+
+        visible = stats.days >= np.datetime64(start_day) if start_day else slice(None)
+        df = pd.DataFrame({
+            "date": stats.days[visible],
+            "Günlük": stats.valence[visible],
+            "7 gün ort.": stats.rolling_7[visible],
+            "30 gün ort.": stats.rolling_30[visible],
+        }).melt(id_vars="date", var_name="seri", value_name="valence")
+        fig = px.line(df, x="date", y="valence", color="seri", title="Ruh Hali Değişim Grafiği (valence: -1 olumsuz, +1 olumlu)")
+        fig.update_traces(mode="markers", selector={"name": "Günlük"})
+        fig.update_yaxes(range=[-1.05, 1.05])
+
+        weekday_df = pd.DataFrame({"gün": WEEKDAY_LABELS, "valence": stats.weekday_valence})
+        distribution = get_mood_distribution(user_id, start=start_day)
+        dist_df = pd.DataFrame(distribution, columns=["mood", "count"])
+        return {
+            "current_streak": stats.current_streak,
+            "longest_streak": stats.longest_streak,
+            "volatility": "-" if pd.isna(stats.volatility) else f"{stats.volatility:.2f}",
+            "trend": fig,
+            "weekday": px.bar(weekday_df, x="gün", y="valence", title="Haftanın Günlerine Göre Ortalama Ruh Hali"),
+            "distribution": px.bar(dist_df, x="mood", y="count", title="Ruh Hali Dağılımı"),
+        }
+
+    user_id = st.session_state['user_id']
+    # Aralık ve seriler bugüne göre hesaplandığından gün değişince sonuç yenilenir
+    charts = get_analytics_cache().get_or_compute(user_id, "mood_charts", (range_days, utc_today()),
+                                                  lambda: build_mood_charts(user_id, range_days))
     
-    if not records or len(records) < 2:
-        st.info("Grafik çizmek için en az 2 ruh hali kaydınız olmalıdır.")
+    if charts is None:
+        st.info("Grafik çizmek için en az 2 farklı günde ruh hali kaydınız olmalıdır.")
     else:
-        df = pd.DataFrame([{"date": r.created_at.date(), "mood": r.mood} for r in records])
-        df = df.sort_values("date").drop_duplicates("date", keep="last")
-        mood_order = ["😊 Mutlu", "😢 Üzgün", "😠 Sinirli", "😨 Korkmuş", "🫥 Depresyonda","😲 Şaşkın", "🤢 İğrenmiş", "😐 Nötr","🥲 Duygusal","💖 Heyecanlı","😥 Kaygılı","🥵Başından aşağı kaynar sular dökülmüş","🤒 Hasta"]
-        df["mood"] = pd.Categorical(df["mood"], categories=mood_order, ordered=True)
-        fig = px.line(df, x="date", y="mood", markers=True, title="Ruh Hali Değişim Grafiği")
-        st.plotly_chart(fig, use_container_width=True)
+        col_streak, col_longest, col_volatility = st.columns(3)
+        col_streak.metric("Güncel Seri", f"{charts['current_streak']} gün")
+        col_longest.metric("En Uzun Seri", f"{charts['longest_streak']} gün")
+        col_volatility.metric("Oynaklık", charts["volatility"])
+        st.plotly_chart(charts["trend"], use_container_width=True)
+        st.plotly_chart(charts["weekday"], use_container_width=True)
+        st.plotly_chart(charts["distribution"], use_container_width=True)
 
     st.markdown("---")
     st.subheader("🕑 Mood Geçmişi")
-    if not records:
+    def fetch_mood_page(cursor):
+        return list_mood_records_page(st.session_state['user_id'], cursor, page_size=30)
+
+    history_records = get_history_rows("mood", fetch_mood_page)
+    if not history_records:
         st.info("Henüz mood geçmişiniz yok.")
     else:
-        for rec in records:
+        for rec in history_records:
             with st.expander(f"{rec.created_at.strftime('%d.%m.%Y %H:%M')} - {rec.mood}"):
                 st.write(f"**Not:** {rec.note if rec.note else '-'}")
                 if st.button(f"❌ Sil", key=f"del_mood_{rec.id}"):
                     delete_mood_record(rec.id)
+                    drop_history_row("mood", rec.id)
                     st.success("Kayıt silindi!")
-                    st.rerun()
\ No newline at end of file
+                    st.rerun()
+        render_load_older("mood", fetch_mood_page)
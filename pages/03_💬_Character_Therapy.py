@@ -1,14 +1,26 @@
 import streamlit as st
-from database.db_manager import add_character_therapy, list_character_therapies, delete_character_therapy
-from models.gemini_client import start_character_therapy_chat, GEMINI_API_KEY
+from components.session import restore_session
+from database.db_manager import add_character_therapy, list_character_therapies_page, delete_character_therapy
+from components.history import get_history_rows, render_load_older, drop_history_row, reset_history
+from components.conversations import (
+    start_persisted_conversation, persist_turn, requested_conversation, clear_conversation_param,
+    render_saved_conversations, CONVERSATION_PARAM,
+)
+from models.gemini_client import start_character_therapy_chat, resume_character_therapy_chat, GEMINI_API_KEY
+from utils.warmup import start_background_services
+
+# Oturum çerezi bileşeni restore_session içinde çizildiğinden sayfa ayarı önce yapılır
+st.set_page_config(page_title="💬 Karakter Terapisi", page_icon="💬")
+
+# Sayfa doğrudan açılmış olabilir; veritabanı ve embedding worker'ı süreç başına bir kez hazırlanır
+start_background_services()
 
 # --- Authentication Check ---
+restore_session()
 if not st.session_state.get('logged_in') and not st.session_state.get('is_guest'):
     st.error("Bu sayfayı görüntülemek için lütfen giriş yapın veya misafir olarak devam edin.")
     st.stop()
 
-st.set_page_config(page_title="💬 Karakter Terapisi", page_icon="💬")
-
 st.title("💬 Karakter Terapisi")
 st.markdown("Favori karakterinizi seçin ve AI ile terapi başlatın.")
 
@@ -25,9 +37,30 @@ if "therapy_started" not in st.session_state:
     st.session_state.therapy_started = False
 if "selected_character_therapy" not in st.session_state:
     st.session_state.selected_character_therapy = None
+if "therapy_conversation_id" not in st.session_state:
+    st.session_state.therapy_conversation_id = None
 
 characters = ["Sherlock Holmes", "Firdevs Hanım","Ramiz Dayı","Aksakallı Dede", "İsmail Abi","Burhan Altıntop","Carrie Bradshaw", "Yılmaz"]
 
+def reset_therapy_chat():
+    st.session_state.therapy_chat_session = None
+    st.session_state.therapy_messages = []
+    st.session_state.therapy_started = False
+    st.session_state.selected_character_therapy = None
+    st.session_state.therapy_conversation_id = None
+
+# --- Resume Saved Conversation (sayfa yenilendiğinde veya geçmişten seçildiğinde) ---
+if not st.session_state.therapy_started:
+    resumed = requested_conversation("therapy")
+    if resumed:
+        conversation, stored_messages = resumed
+        st.session_state.therapy_chat_session = resume_character_therapy_chat(conversation.character, stored_messages)
+        if st.session_state.therapy_chat_session:
+            st.session_state.therapy_messages = [{"role": role, "content": content} for role, content in stored_messages]
+            st.session_state.selected_character_therapy = conversation.character
+            st.session_state.therapy_conversation_id = conversation.id
+            st.session_state.therapy_started = True
+
 # --- Initial Character Selection and Input Form ---
 if not st.session_state.therapy_started:
     selected_character = st.selectbox("Karakter Seçimi", characters, key="initial_character_select")
@@ -43,56 +76,93 @@ if not st.session_state.therapy_started:
         else:
             with st.spinner(f"{selected_character} ile terapi başlatılıyor..."):
                 st.session_state.therapy_chat_session = start_character_therapy_chat(selected_character)
-                if st.session_state.therapy_chat_session:
-                    st.session_state.selected_character_therapy = selected_character
-                    # Send initial user input and get first response
-                    ai_response = st.session_state.therapy_chat_session.send_message(user_input)
-                    st.session_state.therapy_messages.append({"role": "user", "content": user_input})
-                    st.session_state.therapy_messages.append({"role": "model", "content": ai_response})
-                    st.session_state.therapy_started = True
-                    # Save initial therapy session for logged-in users
-                    if st.session_state.get('logged_in'):
-                        add_character_therapy(st.session_state['user_id'], selected_character, user_input, ai_response) # Save initial response
-                    st.rerun()
-                else:
-                    st.error("Sohbet oturumu başlatılamadı. API anahtarını kontrol edin.")
+            if st.session_state.therapy_chat_session:
+                st.session_state.selected_character_therapy = selected_character
+                # İlk yanıt sohbet ekranında akış (stream) olarak üretilecek
+                st.session_state.therapy_messages.append({"role": "user", "content": user_input})
+                st.session_state.therapy_conversation_id = start_persisted_conversation("therapy", user_input[:60], selected_character)
+                st.session_state.therapy_started = True
+                st.rerun()
+            else:
+                st.error("Sohbet oturumu başlatılamadı. API anahtarını kontrol edin.")
 
 # --- Chat Interface ---
 if st.session_state.therapy_started:
     st.markdown("---")
     st.subheader(f"💬 {st.session_state.selected_character_therapy} ile Sohbet")
 
+    # Bağlam bütçesi kullanımı (uzun sohbetlerde eski turlar özetlenir)
+    if st.session_state.therapy_chat_session:
+        usage = st.session_state.therapy_chat_session.budget_usage()
+        st.caption(f"🧠 Bağlam: ~{usage['tokens']}/{usage['budget']} token · özetlenen tur: {usage['summarized_turns']}")
+
     # Display chat messages from history
     for message in st.session_state.therapy_messages:
         with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+            if message.get("failed"):
+                st.warning(message["content"])
+            else:
+                st.markdown(message["content"])
+
+    def record_reply(user_message, ai_response):
+        # Yedek/yarıda kalan yanıtlar yalnızca ekranda gösterilir; sohbete ve terapi geçmişine kaydedilmez
+        failed = st.session_state.therapy_chat_session.last_reply_failed
+        st.session_state.therapy_messages.append({"role": "model", "content": ai_response, "failed": failed})
+        if failed:
+            # Uyarı ve "Tekrar Dene" butonu sohbet geçmişiyle birlikte yeniden çizilir
+            st.rerun()
+        persist_turn(st.session_state.therapy_conversation_id, user_message, ai_response)
+        # Save initial therapy session for logged-in users
+        if len(st.session_state.therapy_messages) == 2 and st.session_state.get('logged_in'):
+            add_character_therapy(st.session_state['user_id'], st.session_state.selected_character_therapy, user_message, ai_response) # Save initial response
+            reset_history("therapy")
+
+    # Son mesaj yanıtlanmamışsa (ilk mesaj veya yarıda kalan akış) yanıtı akış olarak üret
+    if st.session_state.therapy_messages and st.session_state.therapy_messages[-1]["role"] == "user":
+        pending_message = st.session_state.therapy_messages[-1]["content"]
+        with st.chat_message("model"):
+            ai_response = st.write_stream(st.session_state.therapy_chat_session.send_message_stream(pending_message))
+        record_reply(pending_message, ai_response)
+
+    # Son yanıt alınamadıysa sohbet, aynı mesaj yeniden denenene kadar bekler
+    last_failed = bool(st.session_state.therapy_messages and st.session_state.therapy_messages[-1].get("failed"))
+    if last_failed and st.button("🔁 Tekrar Dene"):
+        st.session_state.therapy_messages.pop()
+        st.rerun()
 
     # Chat input for new messages
-    if prompt := st.chat_input(f"{st.session_state.selected_character_therapy}'a bir şeyler söyleyin..."):
+    if prompt := st.chat_input(f"{st.session_state.selected_character_therapy}'a bir şeyler söyleyin...", disabled=last_failed):
         st.session_state.therapy_messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
             st.markdown(prompt)
 
         with st.chat_message("model"):
-            with st.spinner(f"{st.session_state.selected_character_therapy} yanıtlıyor..."):
-                ai_response = st.session_state.therapy_chat_session.send_message(prompt)
-                st.markdown(ai_response)
-                st.session_state.therapy_messages.append({"role": "model", "content": ai_response})
+            ai_response = st.write_stream(st.session_state.therapy_chat_session.send_message_stream(prompt))
+        record_reply(prompt, ai_response)
 
     col_chat_actions = st.columns(2)
     with col_chat_actions[0]:
         if st.button("🔄 Yeni Terapi Başlat"):
-            st.session_state.therapy_chat_session = None
-            st.session_state.therapy_messages = []
-            st.session_state.therapy_started = False
-            st.session_state.selected_character_therapy = None
+            reset_therapy_chat()
+            clear_conversation_param()
             st.rerun()
 
 # --- History Section (Logged-in users only) ---
 if st.session_state.get('logged_in'):
+    st.markdown("---")
+    st.subheader("💬 Kayıtlı Sohbetler")
+    resume_id = render_saved_conversations("therapy")
+    if resume_id:
+        reset_therapy_chat()
+        st.query_params[CONVERSATION_PARAM] = str(resume_id)
+        st.rerun()
+
     st.markdown("---")
     st.subheader("🕑 Terapi Geçmişi")
-    records = list_character_therapies(st.session_state['user_id'], limit=30)
+    def fetch_therapy_page(cursor):
+        return list_character_therapies_page(st.session_state['user_id'], cursor, page_size=30)
+
+    records = get_history_rows("therapy", fetch_therapy_page)
     if not records:
         st.info("Henüz terapi geçmişiniz yok.")
     else:
@@ -102,5 +172,7 @@ if st.session_state.get('logged_in'):
                 st.markdown(f"**{rec.character}:** {rec.ai_response}")
                 if st.button(f"❌ Sil", key=f"del_therapy_{rec.id}"):
                     delete_character_therapy(rec.id)
+                    drop_history_row("therapy", rec.id)
                     st.success("Kayıt silindi!")
                     st.rerun()
+        render_load_older("therapy", fetch_therapy_page)
@@ -1,14 +1,25 @@
 import streamlit as st
+from components.session import restore_session
 import pandas as pd
 import plotly.express as px
-from database.db_manager import list_dream_analyses, list_mood_records, list_character_therapies
+from database.db_manager import get_user_totals, get_mood_distribution, get_character_counts, get_daily_activity, list_mood_counts
+from utils.analytics_cache import get_analytics_cache
+from utils.insights import MAX_LAG_DAYS, get_user_insights
+from utils.mood_stats import WEEKDAY_LABELS, compute_mood_stats, utc_today
+from utils.warmup import start_background_services
+
+# Oturum çerezi bileşeni restore_session içinde çizildiğinden sayfa ayarı önce yapılır
+st.set_page_config(page_title="📊 Analytics", page_icon="📊")
+
+# Sayfa doğrudan açılmış olabilir; veritabanı ve embedding worker'ı süreç başına bir kez hazırlanır
+start_background_services()
 
 # --- Authentication Check ---
+restore_session()
 if not st.session_state.get('logged_in') and not st.session_state.get('is_guest'):
     st.error("Bu sayfayı görüntülemek için lütfen giriş yapın veya misafir olarak devam edin.")
     st.stop()
 
-st.set_page_config(page_title="📊 Analytics", page_icon="📊")
 st.title("📊 Kişisel Analizleriniz")
 
 # --- Guest User Message ---
@@ -18,31 +29,148 @@ if st.session_state.get('is_guest'):
     st.stop()
 
 # --- Analytics for Logged-in Users ---
+def _signed(value):
+    return "-" if value is None or pd.isna(value) else f"{value:+.2f}"
+
+def build_analytics(user_id):
+    """
+    Sayfadaki tüm metrikleri ve figürleri hesaplar. Sonuç analiz önbelleğinde tutulur; veri değişmediği
+    sürece yeniden çalıştırmalarda bu fonksiyon (ve veritabanı sorguları) atlanır.
+    """
+    # Load aggregates (SQLite tarafında hesaplanır)
+    dream_total, mood_total, therapy_total = get_user_totals(user_id)
+    mood_distribution = get_mood_distribution(user_id)
+    character_counts = get_character_counts(user_id)
+    daily_activity = get_daily_activity(user_id)
+    mood_stats = compute_mood_stats(list_mood_counts(user_id))
+    # Önceden hesaplanmış çapraz sinyal analizleri (yalnızca veri değiştiyse yeniden hesaplanır)
+    insights = get_user_insights(user_id)
+
+    result = {"totals": (dream_total, mood_total, therapy_total)}
+
+    # Mood Distribution Chart
+    if mood_distribution:
+        mood_counts = pd.DataFrame(mood_distribution, columns=['mood', 'count'])
+        result["mood_distribution"] = px.pie(mood_counts, names='mood', values='count', title="Kaydedilen Ruh Hallerinin Dağılımı", hole=.3)
+
+    # Mood Trend (valence skorları, 30 günlük kayan ortalama)
+    if mood_stats is not None and int((mood_stats.record_counts > 0).sum()) >= 2:
+        trend_df = pd.DataFrame({"date": mood_stats.days, "valence": mood_stats.rolling_30})
+        fig = px.line(trend_df, x="date", y="valence", title="30 Günlük Kayan Ortalama Ruh Hali")
+        fig.update_yaxes(range=[-1.05, 1.05])
+        weekday_df = pd.DataFrame({"gün": WEEKDAY_LABELS, "valence": mood_stats.weekday_valence})
+        result["mood_trend"] = {
+            "rolling_30": _signed(mood_stats.rolling_30[-1]),
+            "positive_streak": mood_stats.positive_streak,
+            "volatility": "-" if pd.isna(mood_stats.volatility) else f"{mood_stats.volatility:.2f}",
+            "trend": fig,
+            "weekday": px.bar(weekday_df, x="gün", y="valence", title="Haftanın Günlerine Göre Ortalama Ruh Hali"),
+        }
+
+    # Character Usage Chart
+    if character_counts:
+        character_df = pd.DataFrame(character_counts, columns=['character', 'count'])
+        result["characters"] = px.bar(character_df, x='character', y='count', title="Karakter Bazında Terapi Seansları")
+
+    # Daily Activity Chart
+    if daily_activity:
+        activity_df = pd.DataFrame(daily_activity, columns=['date', 'Rüya', 'Mood', 'Terapi'])
+        activity_df['date'] = pd.to_datetime(activity_df['date'])
+        activity_df = activity_df.melt(id_vars='date', var_name='kayıt', value_name='count')
+        result["activity"] = px.bar(activity_df, x='date', y='count', color='kayıt', title="Gün Bazında Kayıt Sayıları")
+
+    # Cross-Signal Insights
+    if insights.get("mood_days", 0) >= 2:
+        with_dreams, without_dreams = insights["dream_days"]["with"], insights["dream_days"]["without"]
+        cross = {
+            "with_dreams": (with_dreams["days"], _signed(with_dreams["valence"])),
+            "without_dreams": (without_dreams["days"], _signed(without_dreams["valence"])),
+            "computed_at": insights.get("computed_at", "-"),
+        }
+        dist_rows = [{"gün": label, "mood": mood, "oran": share}
+                     for label, group in (("Rüyalı", with_dreams), ("Rüyasız", without_dreams))
+                     for mood, share in group["distribution"].items()]
+        if dist_rows:
+            cross["dream_distribution"] = px.bar(pd.DataFrame(dist_rows), x="mood", y="oran", color="gün", barmode="group",
+                                                 title="Rüyalı ve Rüyasız Günlerde Ruh Hali Dağılımı")
+
+        personas = [p for p in insights["personas"] if p["next_day_valence"] is not None or p["same_day_valence"] is not None]
+        if personas:
+            persona_df = pd.DataFrame(personas).rename(columns={
+                "character": "Karakter", "session_days": "Seans günü",
+                "same_day_valence": "Aynı gün", "next_day_valence": "Ertesi gün",
+            })
+            fig = px.bar(persona_df.melt(id_vars=["Karakter", "Seans günü"], var_name="zaman", value_name="valence"),
+                         x="Karakter", y="valence", color="zaman", barmode="group",
+                         title="Karakter Terapisi Sonrası Ortalama Ruh Hali")
+            if insights.get("baseline_valence") is not None:
+                fig.add_hline(y=insights["baseline_valence"], line_dash="dot", annotation_text="genel ortalama")
+            cross["personas"] = fig
+
+        lag_df = pd.DataFrame({
+            "gecikme (gün)": list(range(MAX_LAG_DAYS + 1)) * 2,
+            "korelasyon": insights["lagged"]["dream"] + insights["lagged"]["therapy"],
+            "sinyal": ["Rüya"] * (MAX_LAG_DAYS + 1) + ["Terapi"] * (MAX_LAG_DAYS + 1),
+        }).dropna()
+        if not lag_df.empty:
+            fig = px.line(lag_df, x="gecikme (gün)", y="korelasyon", color="sinyal", markers=True,
+                          title="Etkinlik ile Sonraki Günlerin Ruh Hali Arasındaki Korelasyon")
+            fig.update_yaxes(range=[-1, 1])
+            cross["lagged"] = fig
+        result["cross"] = cross
+    return result
+
 if st.session_state.get('logged_in'):
     user_id = st.session_state['user_id']
-
-    # Load data
-    dream_records = list_dream_analyses(user_id, limit=1000)
-    mood_records = list_mood_records(user_id, limit=1000)
-    therapy_records = list_character_therapies(user_id, limit=1000)
+    cache = get_analytics_cache()
+    # Seriler bugüne göre hesaplandığından gün değişince sonuç yenilenir
+    analytics = cache.get_or_compute(user_id, "analytics", utc_today(), lambda: build_analytics(user_id))
 
     st.markdown("### Genel Bakış")
+    dream_total, mood_total, therapy_total = analytics["totals"]
     col1, col2, col3 = st.columns(3)
-    col1.metric("Toplam Rüya Analizi", len(dream_records))
-    col2.metric("Toplam Mood Kaydı", len(mood_records))
-    col3.metric("Toplam Terapi Seansı", len(therapy_records))
+    col1.metric("Toplam Rüya Analizi", dream_total)
+    col2.metric("Toplam Mood Kaydı", mood_total)
+    col3.metric("Toplam Terapi Seansı", therapy_total)
 
     st.markdown("---")
 
-    # Mood Distribution Chart
-    if mood_records:
+    if "mood_distribution" in analytics:
         st.subheader("Ruh Hali Dağılımı")
-        mood_df = pd.DataFrame([r.mood for r in mood_records], columns=['mood'])
-        mood_counts = mood_df['mood'].value_counts().reset_index()
-        mood_counts.columns = ['mood', 'count']
-        fig = px.pie(mood_counts, names='mood', values='count', title="Kaydedilen Ruh Hallerinin Dağılımı", hole=.3)
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(analytics["mood_distribution"], use_container_width=True)
     else:
         st.info("Ruh hali grafiği için henüz yeterli veri yok.")
 
-    # Further analytics can be added here
\ No newline at end of file
+    if "mood_trend" in analytics:
+        trend = analytics["mood_trend"]
+        st.subheader("Ruh Hali Eğilimi")
+        col_mean, col_streak, col_volatility = st.columns(3)
+        col_mean.metric("30 Günlük Ortalama", trend["rolling_30"])
+        col_streak.metric("Pozitif Seri", f"{trend['positive_streak']} gün")
+        col_volatility.metric("Oynaklık", trend["volatility"])
+        st.plotly_chart(trend["trend"], use_container_width=True)
+        st.plotly_chart(trend["weekday"], use_container_width=True)
+
+    if "characters" in analytics:
+        st.subheader("Karakter Terapisi Kullanımı")
+        st.plotly_chart(analytics["characters"], use_container_width=True)
+
+    if "activity" in analytics:
+        st.subheader("Günlük Aktivite")
+        st.plotly_chart(analytics["activity"], use_container_width=True)
+
+    if "cross" in analytics:
+        cross = analytics["cross"]
+        st.markdown("---")
+        st.subheader("🔗 Ruh Hali ve Etkinlik İlişkileri")
+        col_with, col_without = st.columns(2)
+        col_with.metric(f"Rüya kaydedilen günler ({cross['with_dreams'][0]} gün)", cross["with_dreams"][1])
+        col_without.metric(f"Rüya kaydedilmeyen günler ({cross['without_dreams'][0]} gün)", cross["without_dreams"][1])
+        for key in ("dream_distribution", "personas", "lagged"):
+            if key in cross:
+                st.plotly_chart(cross[key], use_container_width=True)
+        st.caption(f"Son hesaplama: {cross['computed_at']} (UTC)")
+
+    cache_stats = cache.stats()
+    st.caption(f"Analiz önbelleği: isabet oranı %{cache_stats['hit_ratio'] * 100:.0f}, "
+               f"{cache_stats['entries']} sonuç, {cache_stats['bytes'] / (1024 * 1024):.1f} MB")
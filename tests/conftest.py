@@ -0,0 +1,27 @@
+"""
+Testler geçici bir SQLite dosyasında çalışır; DREAMMIND_* değişkenleri db_manager import edilmeden önce ayarlanır.
+"""
+import os
+import tempfile
+import uuid
+
+_TEST_DIR = tempfile.mkdtemp(prefix="dreammind-test-")
+os.environ["DREAMMIND_DB_PATH"] = os.path.join(_TEST_DIR, "dreammind_test.db")
+os.environ["DREAMMIND_WRITE_BEHIND"] = "0"
+os.environ["DREAMMIND_WARMUP"] = "0"
+os.environ.setdefault("DREAMMIND_SECRET_KEY", "dreammind-test-secret")
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def db():
+    from database import db_manager
+    db_manager.create_db_and_tables()
+    return db_manager
+
+
+@pytest.fixture
+def user_id(db) -> int:
+    # Her test kendi kullanıcısıyla çalışır; veritabanı oturum boyunca paylaşılır
+    return db.add_user(f"test_{uuid.uuid4().hex[:12]}", "x").id
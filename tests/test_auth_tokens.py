@@ -0,0 +1,59 @@
+import time
+import pytest
+from utils import auth
+
+
+def _flip(text: str, index: int) -> str:
+    return text[:index] + ("A" if text[index] != "A" else "B") + text[index + 1:]
+
+
+def test_round_trip():
+    token = auth.create_session_token(7, "ayşe", 3)
+    assert auth.verify_session_token(token) == (7, "ayşe", 3)
+
+
+def test_token_is_url_and_cookie_safe():
+    token = auth.create_session_token(7, "ayşe", 0)
+    assert set(token) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_.")
+
+
+@pytest.mark.parametrize("part", ["payload", "signature"])
+def test_tampered_token_is_rejected(part):
+    payload, signature = auth.create_session_token(7, "ayşe", 0).split(".")
+    if part == "payload":
+        payload = _flip(payload, len(payload) // 2)
+    else:
+        signature = _flip(signature, 0)
+    assert auth.verify_session_token(f"{payload}.{signature}") is None
+
+
+def test_token_for_other_user_cannot_be_forged():
+    payload, signature = auth.create_session_token(7, "ayşe", 0).split(".")
+    other_payload, _ = auth.create_session_token(8, "mehmet", 0).split(".")
+    assert auth.verify_session_token(f"{other_payload}.{signature}") is None
+
+
+def test_expired_token_is_rejected():
+    assert auth.verify_session_token(auth.create_session_token(7, "ayşe", 0, ttl_seconds=-1)) is None
+
+
+def test_token_expires_after_ttl(monkeypatch):
+    token = auth.create_session_token(7, "ayşe", 0, ttl_seconds=60)
+    now = time.time()
+    monkeypatch.setattr(auth.time, "time", lambda: now + 61)
+    assert auth.verify_session_token(token) is None
+
+
+@pytest.mark.parametrize("token", [None, "", "abc", "a.b.c", "!!!.???"])
+def test_malformed_token_is_rejected(token):
+    assert auth.verify_session_token(token) is None
+
+
+def test_revocation_bumps_token_version(db, user_id):
+    version = db.get_token_version(user_id)
+    token = auth.create_session_token(user_id, "ayşe", version)
+    db.revoke_session_tokens(user_id)
+    _, _, token_version = auth.verify_session_token(token)
+    # İmza hâlâ geçerlidir; restore_session sürüm uyuşmazlığı nedeniyle token'ı reddeder
+    assert token_version != db.get_token_version(user_id)
+
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from models.llm_client import (
+    CircuitBreaker, CircuitOpenError, FakeLLMBackend, LLMBusyError, LLMUnavailableError, ResilientLLMClient,
+)
+
+
+def _client(backend, **kwargs):
+    kwargs.setdefault("base_delay", 0.01)
+    kwargs.setdefault("max_delay", 0.02)
+    return ResilientLLMClient(backend, **kwargs)
+
+
+def test_send_chat_returns_reply():
+    client = _client(FakeLLMBackend())
+    assert client.send_chat(None, "merhaba") == "Yanıt: merhaba"
+
+
+def test_stream_chat_yields_whole_reply():
+    client = _client(FakeLLMBackend(chunk_size=3))
+    chunks = list(client.stream_chat(None, "rüyamda uçtum"))
+    assert len(chunks) > 1
+    assert "".join(chunks) == "Yanıt: rüyamda uçtum"
+
+
+def test_retryable_error_is_retried():
+    backend = FakeLLMBackend(failures=[ConnectionError("reset")])
+    client = _client(backend, max_retries=2)
+    assert client.send_chat(None, "x") == "Yanıt: x"
+    assert backend.calls == 2
+
+
+def test_slow_call_fails_at_deadline():
+    client = _client(FakeLLMBackend(latency=2.0), timeout=0.3)
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailableError):
+        client.send_chat(None, "x")
+    assert time.monotonic() - started < 1.0
+
+
+def test_slot_wait_counts_against_deadline():
+    client = _client(FakeLLMBackend(latency=0.6), max_concurrency=1, timeout=2.0)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        holder = pool.submit(client.send_chat, None, "ilk")
+        time.sleep(0.1)
+        started = time.monotonic()
+        with pytest.raises(LLMBusyError):
+            client.send_chat(None, "ikinci", timeout=0.2)
+        waited = time.monotonic() - started
+        assert holder.result() == "Yanıt: ilk"
+    assert waited < 0.5
+
+
+def test_busy_error_does_not_trip_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    client = _client(FakeLLMBackend(latency=0.5), max_concurrency=1, timeout=2.0, breaker=breaker)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        holder = pool.submit(client.send_chat, None, "ilk")
+        time.sleep(0.1)
+        with pytest.raises(LLMBusyError):
+            client.send_chat(None, "ikinci", timeout=0.1)
+        holder.result()
+    assert breaker.state == "closed"
+
+
+def test_breaker_opens_after_failures_and_rejects_fast():
+    backend = FakeLLMBackend(failures=[ConnectionError()] * 2)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = _client(backend, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(LLMUnavailableError):
+            client.send_chat(None, "x")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.send_chat(None, "x")
+    assert backend.calls == 2
+
+
+def test_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert [breaker.allow() for _ in range(3)] == [True, False, False]
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0)
+    breaker.state, breaker.opened_at = "open", 0.0
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.trial_in_flight
+
+
+def test_non_retryable_error_records_outcome():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    backend = FakeLLMBackend(failures=[ValueError("geçersiz istek")])
+    client = _client(backend, breaker=breaker)
+    with pytest.raises(ValueError):
+        client.send_chat(None, "x")
+    # Deneme hakkı bırakılmış ve servis yanıt verdiği için devre kapanmış olmalı
+    assert breaker.state == "closed"
+    assert not breaker.trial_in_flight
+    assert backend.calls == 1
+
+
+class _SlowStreamBackend(FakeLLMBackend):
+    # Her parça arasında bekleyen uzun bir akış
+    async def stream_chat(self, chat, message):
+        self.calls += 1
+        for i in range(100):
+            await asyncio.sleep(0.05)
+            yield f"{i} "
+
+
+def test_abandoned_stream_releases_slot():
+    client = _client(_SlowStreamBackend(), max_concurrency=1, timeout=10.0)
+    stream = client.stream_chat(None, "uzun")
+    assert next(stream) == "0 "
+    stream.close()
+    # İptal event loop thread'inde işlenir; slot kısa sürede boşalmalı
+    assert client.send_chat(None, "sonraki", timeout=1.0) == "Yanıt: sonraki"
@@ -0,0 +1,67 @@
+import json
+from datetime import datetime
+from database.transfer import import_rows
+
+
+def _daily(db, user_id):
+    return {row.day: row for row in db.list_mood_daily(user_id)}
+
+
+def test_insert_upserts_day_summary(db, user_id):
+    db.add_mood_record(user_id, "😊 Mutlu", "sabah")
+    db.add_mood_record(user_id, "😢 Üzgün", "akşam")
+    db.add_mood_record(user_id, "😊 Mutlu")
+    (day,) = _daily(db, user_id).values()
+    assert day.record_count == 3
+    assert day.last_mood == "😊 Mutlu"
+    assert json.loads(day.mood_counts) == {"😊 Mutlu": 2, "😢 Üzgün": 1}
+    assert day.last_record_id == db.list_mood_records(user_id, limit=1)[0].id
+
+
+def test_delete_refreshes_day_from_raw_records(db, user_id):
+    db.add_mood_record(user_id, "😊 Mutlu")
+    db.add_mood_record(user_id, "😨 Korkmuş")
+    latest = db.list_mood_records(user_id, limit=1)[0]
+    db.delete_mood_record(latest.id)
+
+    (day,) = _daily(db, user_id).values()
+    assert day.record_count == 1
+    assert day.last_mood == "😊 Mutlu"
+    assert json.loads(day.mood_counts) == {"😊 Mutlu": 1}
+
+
+def test_deleting_last_record_of_day_removes_row(db, user_id):
+    db.add_mood_record(user_id, "😐 Nötr")
+    db.delete_mood_record(db.list_mood_records(user_id, limit=1)[0].id)
+    assert db.list_mood_daily(user_id) == []
+
+
+def test_days_are_bucketed_by_created_at(db, user_id):
+    rows = [("mood", {"created_at": datetime(2026, 5, 1, 23, 59), "mood": "😊 Mutlu", "note": None}),
+            ("mood", {"created_at": datetime(2026, 5, 2, 0, 1), "mood": "😢 Üzgün", "note": None}),
+            ("mood", {"created_at": datetime(2026, 5, 2, 9, 0), "mood": "😐 Nötr", "note": None})]
+    import_rows(rows, user_id=user_id)
+    daily = _daily(db, user_id)
+    assert sorted(daily) == ["2026-05-01", "2026-05-02"]
+    assert daily["2026-05-02"].record_count == 2
+    assert daily["2026-05-02"].last_mood == "😐 Nötr"
+
+
+def test_rebuild_matches_incremental_summary(db, user_id):
+    for mood in ("😊 Mutlu", "😢 Üzgün", "😊 Mutlu", "💖 Heyecanlı"):
+        db.add_mood_record(user_id, mood)
+    db.delete_mood_record(db.list_mood_records(user_id, limit=1)[0].id)
+    incremental = [(r.day, r.record_count, r.last_mood, r.last_record_id, json.loads(r.mood_counts))
+                   for r in db.list_mood_daily(user_id)]
+    db.rebuild_mood_daily(user_id)
+    rebuilt = [(r.day, r.record_count, r.last_mood, r.last_record_id, json.loads(r.mood_counts))
+               for r in db.list_mood_daily(user_id)]
+    assert rebuilt == incremental
+
+
+def test_writes_bump_data_version(db, user_id):
+    before = db.data_version(user_id)
+    db.add_mood_record(user_id, "😊 Mutlu")
+    after_insert = db.data_version(user_id)
+    db.delete_mood_record(db.list_mood_records(user_id, limit=1)[0].id)
+    assert before < after_insert < db.data_version(user_id)
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+import pytest
+from database.migrations import MIGRATIONS, explain_history_queries, get_schema_version, run_migrations, verify_history_indexes
+from database.models import DreamAnalysis
+from database.transfer import import_rows
+
+
+def _add_dreams(user_id, timestamps):
+    rows = [("dream", {"created_at": created_at, "dream_text": f"rüya {i}", "analysis_result": "-"})
+            for i, created_at in enumerate(timestamps)]
+    import_rows(rows, user_id=user_id)
+
+
+def test_keyset_pages_cover_all_rows_in_order(db, user_id):
+    base = datetime(2026, 1, 1, 8, 0)
+    # Aynı created_at'e sahip kayıtlar sayfa sınırında id ile ayrışmalı
+    timestamps = [base + timedelta(minutes=i // 3) for i in range(25)]
+    _add_dreams(user_id, timestamps)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        records, cursor = db.list_dream_analyses_page(user_id, cursor, page_size=10)
+        seen.extend((record.created_at, record.id) for record in records)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 25
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_keyset_page_size_boundary_has_no_extra_cursor(db, user_id):
+    _add_dreams(user_id, [datetime(2026, 2, 1) + timedelta(hours=i) for i in range(10)])
+    records, cursor = db.list_dream_analyses_page(user_id, page_size=10)
+    assert len(records) == 10
+    assert cursor is None
+
+
+def test_keyset_pages_are_scoped_to_user(db, user_id):
+    other = db.add_user(f"other_{user_id}", "x").id
+    _add_dreams(user_id, [datetime(2026, 3, 1)] * 3)
+    records, _ = db.list_dream_analyses_page(other)
+    assert records == []
+
+
+def test_invalid_cursor_is_rejected(db, user_id):
+    with pytest.raises(ValueError):
+        db.list_dream_analyses_page(user_id, "bozuk-imlec")
+
+
+def test_migrations_are_applied_once(db):
+    latest = MIGRATIONS[-1][0]
+    assert get_schema_version(db.engine) == latest
+    assert run_migrations(db.engine) == latest
+
+
+def test_migration_versions_are_append_only():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_history_queries_use_composite_index(db):
+    plans = explain_history_queries(db.engine)
+    assert f"{DreamAnalysis.__tablename__}:keyset" in plans
+    assert verify_history_indexes(db.engine)
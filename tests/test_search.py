@@ -0,0 +1,52 @@
+import pytest
+from database.search import make_snippet, query_terms, tr_fold
+
+
+@pytest.mark.parametrize("text, folded", [
+    ("İstanbul", "istanbul"),
+    ("ISTANBUL", "istanbul"),
+    ("ılık", "ilik"),
+    ("ILIK", "ilik"),
+    ("Şeker Çiçeği Ağacı Ölü Üzüm", "seker cicegi agaci olu uzum"),
+])
+def test_tr_fold(text, folded):
+    assert tr_fold(text) == folded
+    assert len(tr_fold(text)) == len(text)
+
+
+def test_query_terms_are_folded():
+    assert query_terms("İSTANBUL'da ılık") == query_terms("istanbul'DA ILIK")
+
+
+@pytest.mark.parametrize("query", ["İstanbul", "ISTANBUL", "istanbul", "IstanbuL"])
+def test_dream_search_matches_any_turkish_casing(db, user_id, query):
+    db.add_dream_analysis(user_id, "Rüyamda İstanbul'da yürüyordum.", "Şehir özlemi.")
+    hits = db.search_records(user_id, query)
+    assert [hit.kind for hit in hits] == ["dream"]
+    assert "İstanbul" in hits[0].snippet
+
+
+@pytest.mark.parametrize("query", ["ılık", "ILIK", "ilik"])
+def test_mood_and_therapy_search_fold_dotless_i(db, user_id, query):
+    db.add_mood_record(user_id, "😊 Mutlu", "Ilık bir bahar günüydü.")
+    db.add_character_therapy(user_id, "Sherlock Holmes", "Sabah ılık bir duş aldım.", "Güzel bir başlangıç.")
+    hits = db.search_records(user_id, query)
+    assert sorted(hit.kind for hit in hits) == ["mood", "therapy"]
+
+
+def test_search_is_scoped_to_user(db, user_id):
+    other = db.add_user(f"search_other_{user_id}", "x").id
+    db.add_dream_analysis(other, "İstanbul'da kayboldum.", "-")
+    assert db.search_records(user_id, "istanbul") == []
+
+
+def test_deleted_record_leaves_index(db, user_id):
+    dream_id = db.add_dream_analysis(user_id, "Kapadokya'da balon.", "-")
+    assert db.search_records(user_id, "kapadokya")
+    db.delete_dream_analysis(dream_id)
+    assert db.search_records(user_id, "kapadokya") == []
+
+
+def test_snippet_keeps_original_casing():
+    snippet = make_snippet("Dün gece İSTANBUL boğazında yüzdüm.", query_terms("istanbul"))
+    assert "İSTANBUL" in snippet
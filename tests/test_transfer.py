@@ -0,0 +1,77 @@
+import io
+import json
+from datetime import datetime
+import pytest
+from database.transfer import TransferError, export_data, export_jsonl, import_data, import_rows
+
+_ROWS = [
+    ("dream", {"created_at": datetime(2026, 4, 1, 7, 30), "dream_text": "İstanbul'da uçtum.", "analysis_result": "Özgürlük."}),
+    ("dream", {"created_at": datetime(2026, 4, 2, 7, 30), "dream_text": "Sınava geç kaldım.", "analysis_result": "Kaygı."}),
+    ("mood", {"created_at": datetime(2026, 4, 1, 21, 0), "mood": "😊 Mutlu", "note": "Ilık bir gün."}),
+    ("mood", {"created_at": datetime(2026, 4, 2, 21, 0), "mood": "😢 Üzgün", "note": None}),
+    ("therapy", {"created_at": datetime(2026, 4, 3, 20, 0), "character": "Sherlock Holmes",
+                 "user_input": "Kaygılıyım.", "ai_response": "Nedenini birlikte bulalım."}),
+]
+
+
+def _export(user_id):
+    out = io.StringIO()
+    counts = export_jsonl(out, user_id)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    for row in rows:
+        row.pop("user_id")
+    return counts, rows
+
+
+@pytest.mark.parametrize("file_name", ["export.jsonl", "export.jsonl.gz"])
+def test_jsonl_round_trip_to_another_user(db, user_id, tmp_path, file_name):
+    import_rows(_ROWS, user_id=user_id)
+    path = str(tmp_path / file_name)
+    exported = export_data(path, "jsonl", user_id)
+    assert exported == {"dream": 2, "mood": 2, "therapy": 1}
+
+    target = db.add_user(f"transfer_target_{user_id}_{len(file_name)}", "x").id
+    assert import_data(path, target) == exported
+    assert _export(target) == _export(user_id)
+
+
+def test_import_updates_derived_data(db, user_id, tmp_path):
+    version = db.data_version(user_id)
+    import_rows(_ROWS, user_id=user_id)
+    assert [row.day for row in db.list_mood_daily(user_id)] == ["2026-04-01", "2026-04-02"]
+    assert db.data_version(user_id) > version
+    assert [hit.kind for hit in db.search_records(user_id, "ILIK")] == ["mood"]
+
+
+def test_chunked_import_keeps_all_rows(db, user_id):
+    rows = [("mood", {"created_at": datetime(2026, 6, 1, hour), "mood": "😐 Nötr", "note": None}) for hour in range(10)]
+    assert import_rows(rows, user_id=user_id, chunk_size=3)["mood"] == 10
+    assert db.list_mood_daily(user_id)[0].record_count == 10
+
+
+def test_invalid_line_is_reported(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"kind": "dream", "user_id": 1}\nnot json\n', encoding="utf-8")
+    with pytest.raises(TransferError, match="bad.jsonl:2"):
+        import_data(str(path))
+
+
+def test_unknown_kind_is_rejected(tmp_path):
+    path = tmp_path / "bad.jsonl"
+    path.write_text('{"kind": "secret", "user_id": 1}\n', encoding="utf-8")
+    with pytest.raises(TransferError):
+        import_data(str(path))
+
+
+def test_unknown_source_user_is_rejected(db, user_id):
+    rows = [("mood", {"user_id": user_id, "created_at": datetime(2026, 7, 1), "mood": "😊 Mutlu", "note": None}),
+            ("mood", {"user_id": 10 ** 9, "created_at": datetime(2026, 7, 2), "mood": "😊 Mutlu", "note": None})]
+    with pytest.raises(TransferError, match="bilinmeyen user_id"):
+        import_rows(rows)
+    assert db.list_mood_records(user_id) == []
+
+
+def test_missing_required_field_is_reported(db, user_id):
+    rows = [("dream", {"created_at": datetime(2026, 7, 1), "analysis_result": "-"})]
+    with pytest.raises(TransferError, match=r"dream parçası \(satır 1-1\)"):
+        import_rows(rows, user_id=user_id)
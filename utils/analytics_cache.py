@@ -0,0 +1,134 @@
+"""
+Kullanıcı başına analiz sonucu önbelleği.
+
+Analytics ve Mood Tracker sayfaları her Streamlit yeniden çalıştırmasında aynı sorguları ve figürleri
+yeniden üretir. Sonuçlar (user_id, veri versiyonu, ad, aralık) anahtarıyla bellekte tutulur; veri versiyonu
+veritabanındaki user_insight.data_version'dır ve kayıt ekleyen/silen her yazma (başka süreçlerdekiler dahil:
+cli import, sentetik veri üretici) aynı transaction'da artırır. Böylece veri değişmediği sürece yeniden
+çalıştırmalar yalnızca tek satırlık versiyon okuması yapar. Toplam boyut sınırı aşılınca kullanıcılar arası
+LRU ile en eski sonuçlar atılır.
+"""
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from database.db_manager import data_version
+
+ANALYTICS_CACHE_MAX_BYTES = int(float(os.getenv("DREAMMIND_ANALYTICS_CACHE_MB", "32")) * 1024 * 1024)
+
+T = TypeVar("T")
+CacheKey = Tuple[int, int, str, Hashable]
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Değerin yaklaşık bellek boyutu (pickle uzunluğu); yalnızca sonuç hesaplandığında bir kez çağrılır.
+    """
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+
+class AnalyticsCache:
+    """
+    Boyut sınırlı, kullanıcılar arası LRU önbellek. Bir kullanıcının verisi değişince (yeni versiyonla ilk
+    yazmada) o kullanıcıya ait eski versiyon sonuçları hemen bırakılır.
+    """
+
+    def __init__(self, max_bytes: int = ANALYTICS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[Any, int]]" = OrderedDict()
+        self._latest_version: Dict[int, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, user_id: int, name: str, range_key: Hashable, compute: Callable[[], T]) -> T:
+        """
+        Önbellekteki sonucu döner; yoksa compute() ile hesaplayıp saklar.
+        compute kilit dışında çalışır; aynı anahtar için eşzamanlı iki hesaplama olabilir, sonuncusu saklanır.
+        """
+        key = (user_id, data_version(user_id), name, range_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key: CacheKey, value: Any) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        user_id, version = key[0], key[1]
+        with self._lock:
+            if version < self._latest_version.get(user_id, -1):
+                # Hesaplama sürerken veri değişmiş; eski sonuç saklanmaz
+                return
+            if version > self._latest_version.get(user_id, -1):
+                self._latest_version[user_id] = version
+                self._drop_user(user_id, keep_version=version)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._drop_user(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._latest_version.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        İsabet oranını ve bellek kullanımını döner.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "users": len({key[0] for key in self._entries}),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _drop_user(self, user_id: int, keep_version: Optional[int] = None) -> None:
+        for key in [k for k in self._entries if k[0] == user_id and k[1] != keep_version]:
+            self._bytes -= self._entries.pop(key)[1]
+
+
+_cache: Optional[AnalyticsCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_analytics_cache() -> AnalyticsCache:
+    """
+    Süreç genelinde paylaşılan analiz önbelleğini döner.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalyticsCache()
+    return _cache
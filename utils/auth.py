@@ -1,16 +1,110 @@
+"""
+Şifre doğrulama ve imzalı oturum token'ları.
+
+bcrypt bilerek yavaştır; eşzamanlı girişler sunucuyu kilitlemesin diye hash/doğrulama işleri sınırlı
+bir thread havuzunda çalışır. Maliyet faktörü DREAMMIND_BCRYPT_ROUNDS ile değiştirildiğinde eski hash'ler
+bir sonraki başarılı girişte yeni maliyetle yeniden hash'lenir (verify_and_update).
+
+Oturum token'ı kullanıcı id'si, adı, token versiyonu ve bitiş zamanını HMAC-SHA256 ile imzalar; imza
+bcrypt'e gitmeden doğrulanır. Versiyon kullanıcı kaydındakiyle karşılaştırılır (components.session), çıkışta
+artırılarak verilmiş token'lar iptal edilir. İmza anahtarı DREAMMIND_SECRET_KEY, süre
+DREAMMIND_SESSION_TTL_HOURS ile verilir.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from loguru import logger
 from passlib.context import CryptContext
 
-# Şifreleme context'i oluştur
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("DREAMMIND_BCRYPT_ROUNDS", "12"))
+# Aynı anda en fazla bu kadar bcrypt işlemi çalışır (bcrypt GIL'i bırakır, CPU çekirdeği kadar yeterlidir)
+BCRYPT_MAX_WORKERS = int(os.getenv("DREAMMIND_BCRYPT_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+SESSION_TTL_SECONDS = int(float(os.getenv("DREAMMIND_SESSION_TTL_HOURS", "12")) * 3600)
+
+# Şifreleme context'i oluştur; min/max sınırları maliyet değiştiğinde eski hash'leri "güncellenmeli" işaretler
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="dreammind-bcrypt")
+
+
+def _load_secret_key() -> bytes:
+    secret = os.getenv("DREAMMIND_SECRET_KEY")
+    if secret:
+        return secret.encode("utf-8")
+    # Anahtar verilmezse süreç başına rastgele anahtar üretilir; sunucu yeniden başlayınca oturumlar düşer
+    logger.warning("DREAMMIND_SECRET_KEY tanımlı değil; oturum token'ları sunucu yeniden başlatılınca geçersiz olacak.")
+    return secrets.token_bytes(32)
+
+
+_secret_key = _load_secret_key()
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Girilen şifre ile hash'lenmiş şifreyi doğrular.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _bcrypt_pool.submit(pwd_context.verify, plain_password, hashed_password).result()
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Şifreyi doğrular; hash eski bir maliyet faktörüyle üretilmişse ikinci değer olarak yeni hash'i döner
+    (çağıran tarafından kaydedilmelidir), aksi halde None.
+    """
+    return _bcrypt_pool.submit(pwd_context.verify_and_update, plain_password, hashed_password).result()
 
 def get_password_hash(password: str) -> str:
     """
     Girilen şifreyi hash'ler.
     """
-    return pwd_context.hash(password)
+    return _bcrypt_pool.submit(pwd_context.hash, password).result()
+
+
+# --- Oturum token'ları ---
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_secret_key, payload.encode("ascii"), hashlib.sha256).digest())
+
+def create_session_token(user_id: int, username: str, token_version: int = 0,
+                         ttl_seconds: int = SESSION_TTL_SECONDS) -> str:
+    """
+    Kullanıcı için süreli, imzalı oturum token'ı üretir.
+    """
+    claims = {"uid": user_id, "usr": username, "ver": token_version, "exp": int(time.time()) + ttl_seconds}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    return f"{payload}.{_sign(payload)}"
+
+def verify_session_token(token: Optional[str]) -> Optional[Tuple[int, str, int]]:
+    """
+    Token imzası geçerli ve süresi dolmamışsa (user_id, username, token_version) döner, aksi halde None.
+    Veritabanına erişmez; versiyonun iptal edilmediğini çağıran kontrol eder.
+    """
+    if not token or token.count(".") != 1:
+        return None
+    payload, signature = token.split(".")
+    try:
+        if not hmac.compare_digest(_sign(payload), signature):
+            return None
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or claims.get("exp", 0) < time.time():
+        return None
+    return claims.get("uid"), claims.get("usr"), claims.get("ver", 0)
@@ -0,0 +1,191 @@
+"""
+Çapraz sinyal analizleri: ruh halinin rüya ve karakter terapisi etkinliğiyle ilişkisi.
+
+Gün kovaları SQLite'ta hazırlanır (list_mood_counts, list_activity_days); hesaplar kesintisiz takvim
+üzerinde NumPy dizileriyle yapılır ve sonuç user_insight tablosunda JSON olarak saklanır. Sayfa yalnızca
+bu satırı okur; geçmiş ne kadar uzun olursa olsun yükleme süresi sabittir. Kayıt eklenip silindikçe satır
+bayatlar ve bir sonraki okumada (veya toplu yenilemede) yeniden hesaplanır:
+
+    python -m utils.insights --refresh
+"""
+import argparse
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from loguru import logger
+from database.db_manager import (
+    get_user_insight, list_activity_days, list_mood_counts, list_stale_insight_users, save_user_insight,
+)
+from utils.mood_stats import MOOD_OPTIONS, count_matrix, day_numbers_for, score_days
+
+# Gecikmeli korelasyonlarda bakılan en uzun gecikme (gün)
+MAX_LAG_DAYS = 3
+# Ortalama/korelasyon raporlamak için gereken en az gün sayısı
+MIN_SAMPLE_DAYS = 3
+
+
+def _mean(values: np.ndarray) -> Optional[float]:
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if len(values) >= MIN_SAMPLE_DAYS else None
+
+
+def _pearson(x: np.ndarray, y: np.ndarray) -> Optional[float]:
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    if valid.sum() < MIN_SAMPLE_DAYS:
+        return None
+    x, y = x[valid], y[valid]
+    x_std, y_std = x.std(), y.std()
+    if x_std == 0 or y_std == 0:
+        return None
+    return float(((x - x.mean()) * (y - y.mean())).mean() / (x_std * y_std))
+
+
+def lagged_correlations(signal: np.ndarray, valence: np.ndarray, max_lag: int = MAX_LAG_DAYS) -> List[Optional[float]]:
+    """
+    signal[t] ile valence[t + gecikme] arasındaki Pearson korelasyonlarını 0..max_lag için döner.
+    """
+    length = len(valence)
+    return [_pearson(signal[:length - lag], valence[lag:]) if lag < length else None for lag in range(max_lag + 1)]
+
+
+def _distribution(counts: np.ndarray) -> Dict[str, float]:
+    total = counts.sum()
+    if total == 0:
+        return {}
+    return {label: float(share) for label, share in zip(MOOD_OPTIONS, counts / total) if share > 0}
+
+
+def _masked_means(masks: np.ndarray, values: np.ndarray) -> List[Optional[float]]:
+    """
+    (gün x grup) maskesinin her sütunu için values ortalamasını döner (NaN'lar atlanır).
+    """
+    present = ~np.isnan(values)
+    weights = masks.T.astype(np.float64)
+    sums = weights @ np.where(present, values, 0.0)
+    counts = weights @ present
+    return [float(total / n) if n >= MIN_SAMPLE_DAYS else None for total, n in zip(sums, counts)]
+
+
+def compute_insights(mood_rows: Sequence[Tuple[int, str, str, int]],
+                     activity_rows: Sequence[Tuple[str, str, Optional[str], int]]) -> Dict[str, Any]:
+    """
+    Tek kullanıcının mood sayaçları ve etkinlik gün kovalarından çapraz sinyal analizlerini hesaplar.
+    Sonuç JSON'a çevrilebilir bir sözlüktür.
+    """
+    result: Dict[str, Any] = {"mood_days": 0, "calendar_days": 0}
+    if not mood_rows:
+        return result
+    _, mood_days, mood_counts, _ = count_matrix(mood_rows)
+    day_valence, _ = score_days(mood_counts)
+
+    activity_days = day_numbers_for([row[0] for row in activity_rows]) if activity_rows else np.empty(0, dtype=np.int64)
+    first = int(min(mood_days[0], activity_days.min() if len(activity_days) else mood_days[0]))
+    last = int(max(mood_days[-1], activity_days.max() if len(activity_days) else mood_days[-1]))
+    length = last - first + 1
+
+    # Kesintisiz takvim: valence (kayıt yoksa NaN), gün x ruh hali sayaçları, rüya sayısı, gün x karakter seans sayısı
+    valence = np.full(length, np.nan)
+    valence[mood_days - first] = day_valence
+    counts = np.zeros((length, len(MOOD_OPTIONS)))
+    counts[mood_days - first] = mood_counts
+
+    kinds = np.array([row[1] for row in activity_rows], dtype=object)
+    amounts = np.array([row[3] for row in activity_rows], dtype=np.int64)
+    offsets = activity_days - first
+    dreams = np.bincount(offsets[kinds == "dream"], weights=amounts[kinds == "dream"], minlength=length)
+
+    therapy_mask = kinds == "therapy"
+    characters, character_index = np.unique(
+        np.array([row[2] for row in activity_rows], dtype=object)[therapy_mask], return_inverse=True
+    ) if therapy_mask.any() else (np.empty(0, dtype=object), np.empty(0, dtype=np.int64))
+    sessions = np.zeros((length, len(characters)))
+    np.add.at(sessions, (offsets[therapy_mask], character_index), amounts[therapy_mask])
+
+    logged = ~np.isnan(valence)
+    dream_days = dreams > 0
+    result.update({
+        "mood_days": int(logged.sum()),
+        "calendar_days": length,
+        "baseline_valence": _mean(valence),
+        "dream_days": {
+            "with": {"days": int((logged & dream_days).sum()), "valence": _mean(valence[dream_days]),
+                     "distribution": _distribution(counts[dream_days].sum(axis=0))},
+            "without": {"days": int((logged & ~dream_days).sum()), "valence": _mean(valence[~dream_days]),
+                        "distribution": _distribution(counts[~dream_days].sum(axis=0))},
+        },
+    })
+
+    # Seans günü ve ertesi günün ortalama valence'ı; tüm karakterler tek matris çarpımıyla
+    next_valence = np.append(valence[1:], np.nan)
+    session_days = sessions > 0
+    personas = []
+    for name, same_day, next_day, days in zip(
+        characters,
+        _masked_means(session_days, valence),
+        _masked_means(session_days, next_valence),
+        session_days.sum(axis=0),
+    ):
+        personas.append({"character": name, "session_days": int(days), "same_day_valence": same_day,
+                         "next_day_valence": next_day})
+    result["personas"] = sorted(personas, key=lambda p: p["session_days"], reverse=True)
+
+    result["lagged"] = {
+        "dream": lagged_correlations(dreams, valence),
+        "therapy": lagged_correlations(sessions.sum(axis=1), valence),
+    }
+    return result
+
+
+def refresh_user_insights(user_id: int) -> Dict[str, Any]:
+    """
+    Kullanıcının analizlerini yeniden hesaplayıp kaydeder ve döner.
+    """
+    row = get_user_insight(user_id)
+    version = row.data_version if row else 0
+    insights = compute_insights(list_mood_counts(user_id), list_activity_days(user_id))
+    insights["computed_at"] = datetime.utcnow().isoformat(timespec="seconds")
+    if not save_user_insight(user_id, version, json.dumps(insights, ensure_ascii=False)):
+        logger.debug(f"Kullanıcı {user_id} analizleri hesaplanırken yeni kayıt geldi; bir sonraki okumada yenilenecek.")
+    return insights
+
+
+def get_user_insights(user_id: int) -> Dict[str, Any]:
+    """
+    Saklanan analizleri döner; satır yoksa veya bayatsa önce yeniden hesaplar.
+    """
+    row = get_user_insight(user_id)
+    if row is not None and row.payload and row.computed_version == row.data_version:
+        return json.loads(row.payload)
+    return refresh_user_insights(user_id)
+
+
+def refresh_stale_insights() -> int:
+    """
+    Bayat veya hiç hesaplanmamış tüm kullanıcıların analizlerini yeniler; yenilenen kullanıcı sayısını döner.
+    """
+    user_ids = list_stale_insight_users()
+    for user_id in user_ids:
+        refresh_user_insights(user_id)
+    return len(user_ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Çapraz sinyal analizlerini önceden hesapla")
+    parser.add_argument("--refresh", action="store_true", help="Bayat analizleri yenile")
+    parser.add_argument("--user", type=int, help="Yalnızca bu kullanıcının analizlerini yenile")
+    args = parser.parse_args()
+    from database.db_manager import create_db_and_tables
+
+    create_db_and_tables()
+    if args.user is not None:
+        refresh_user_insights(args.user)
+        print(f"Kullanıcı {args.user} analizleri yenilendi.")
+    elif args.refresh:
+        print(f"{refresh_stale_insights()} kullanıcının analizleri yenilendi.")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator
+
+# Her metrik için saklanan son ölçüm sayısı
+_MAX_SAMPLES = 1000
+
+_lock = threading.Lock()
+_samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_MAX_SAMPLES))
+
+
+def record_timing(name: str, seconds: float) -> None:
+    """
+    Süre ölçümünü (saniye) isimlendirilmiş metriğe ekler.
+    """
+    with _lock:
+        _samples[name].append(seconds)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    with bloğunun süresini ölçüp metriğe kaydeder.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, time.perf_counter() - started)
+
+
+def _percentile(sorted_values, q: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def timing_summary() -> Dict[str, Dict[str, float]]:
+    """
+    Tüm metrikler için adet, ortalama, p50 ve p95 değerlerini döner.
+    """
+    with _lock:
+        snapshot = {name: sorted(values) for name, values in _samples.items() if values}
+    return {
+        name: {
+            "count": len(values),
+            "mean": sum(values) / len(values),
+            "p50": _percentile(values, 0.50),
+            "p95": _percentile(values, 0.95),
+        }
+        for name, values in snapshot.items()
+    }
+
+
+def reset_timings() -> None:
+    with _lock:
+        _samples.clear()
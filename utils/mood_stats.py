@@ -0,0 +1,211 @@
+"""
+Mood istatistikleri: valence/arousal skorları, kayan ortalamalar, seriler, oynaklık ve haftanın günü profili.
+
+Ruh hali etiketleri sayısal skorlara (valence: olumsuz -1 .. olumlu +1, arousal: sakin -1 .. uyarılmış +1)
+çevrilir. Günlük değerler mood_daily özetindeki ruh hali sayaçlarının ağırlıklı ortalamasıdır. Tüm
+hesaplar kesintisiz bir takvim üzerinde NumPy dizileriyle yapılır (kayıt olmayan günler NaN); çok yıllık
+geçmiş ve tüm kullanıcılar tek seferde işlenebilir (compute_mood_stats_batch). Gün kovaları UTC'dir
+(mood_daily, created_at'in UTC tarihi); "bugün" de UTC tarihidir (utc_today).
+"""
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+
+# Etiket -> (valence, arousal); Mood Tracker formundaki seçenekler de bu sırayla gösterilir
+MOOD_SCORES: Dict[str, Tuple[float, float]] = {
+    "😊 Mutlu": (0.8, 0.4),
+    "😢 Üzgün": (-0.7, -0.4),
+    "😠 Sinirli": (-0.6, 0.8),
+    "😨 Korkmuş": (-0.7, 0.7),
+    "🫥 Depresyonda": (-0.9, -0.7),
+    "😲 Şaşkın": (0.1, 0.7),
+    "🤢 İğrenmiş": (-0.6, 0.3),
+    "😐 Nötr": (0.0, 0.0),
+    "🥲 Duygusal": (0.0, 0.3),
+    "💖 Heyecanlı": (0.8, 0.9),
+    "😥 Kaygılı": (-0.6, 0.6),
+    "🥵Başından aşağı kaynar sular dökülmüş": (-0.8, 0.9),
+    "🤒 Hasta": (-0.5, -0.5),
+}
+MOOD_OPTIONS: List[str] = list(MOOD_SCORES)
+
+_MOOD_INDEX = {label: i for i, label in enumerate(MOOD_OPTIONS)}
+_VALENCE = np.array([scores[0] for scores in MOOD_SCORES.values()])
+_AROUSAL = np.array([scores[1] for scores in MOOD_SCORES.values()])
+
+WEEKDAY_LABELS = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
+
+
+class MoodStats(NamedTuple):
+    # Kesintisiz takvim (ilk kayıt gününden bugüne); diğer diziler bununla aynı uzunluktadır
+    days: np.ndarray             # datetime64[D]
+    valence: np.ndarray          # günlük ortalama, kayıt yoksa NaN
+    arousal: np.ndarray
+    record_counts: np.ndarray    # gün başına kayıt sayısı
+    rolling_7: np.ndarray        # son 7 takvim gününün kayıtlı günleri üzerinden ortalama valence
+    rolling_30: np.ndarray
+    current_streak: int          # bugün (veya dün) biten, art arda kayıt girilen gün sayısı
+    longest_streak: int
+    positive_streak: int         # bugün (veya dün) biten, valence > 0 olan art arda gün sayısı
+    volatility: float            # art arda iki takvim günü arasındaki valence değişiminin standart sapması
+    weekday_valence: np.ndarray  # Pazartesi=0 ... Pazar=6, veri yoksa NaN
+
+
+def utc_today() -> date:
+    """
+    Gün kovalarıyla aynı saat dilimindeki (UTC) bugünün tarihi.
+    """
+    return datetime.utcnow().date()
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    NaN değerleri atlayan kayan ortalama; penceredeki tüm değerler NaN ise sonuç NaN olur.
+    """
+    present = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(present)))
+    end = np.arange(1, len(values) + 1)
+    start = np.maximum(end - window, 0)
+    window_counts = counts[end] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(window_counts > 0, (sums[end] - sums[start]) / window_counts, np.nan)
+
+
+def run_lengths(mask: np.ndarray) -> np.ndarray:
+    """
+    Her konumda, o konumda biten art arda True dizisinin uzunluğunu döner (False konumlarında 0).
+    """
+    index = np.arange(len(mask))
+    last_false = np.maximum.accumulate(np.where(mask, -1, index))
+    return index - last_false
+
+
+def _current_run(runs: np.ndarray) -> int:
+    # Bugün henüz kayıt girilmemişse dün biten seri devam ediyor sayılır
+    if len(runs) == 0:
+        return 0
+    if runs[-1] == 0 and len(runs) > 1:
+        return int(runs[-2])
+    return int(runs[-1])
+
+
+def day_numbers_for(days: Sequence) -> np.ndarray:
+    # 'YYYY-MM-DD' -> 1970-01-01'den itibaren gün sayısı
+    return np.asarray(days, dtype="datetime64[D]").astype(np.int64)
+
+
+def score_days(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (gün x ruh hali) sayaç matrisinden günlük ağırlıklı valence ve arousal dizilerini döner
+    (bilinen etiket içermeyen günler NaN).
+    """
+    known = counts.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (np.where(known > 0, counts @ _VALENCE / known, np.nan),
+                np.where(known > 0, counts @ _AROUSAL / known, np.nan))
+
+
+def count_matrix(rows: Sequence[Tuple[int, str, str, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (user_id, gün 'YYYY-MM-DD', ruh hali, adet) satırlarını (user_id, gün sırasına göre sıralı)
+    (kullanıcı, gün) başına tek satıra indirger: (kullanıcılar, gün numaraları, gün x ruh hali sayaçları,
+    kayıt sayıları). Bilinmeyen etiketler kayıt sayılarına katılır, sayaç matrisine katılmaz.
+    """
+    user_ids, days, moods, amounts = zip(*rows)
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    day_numbers = day_numbers_for(days)
+    amounts = np.asarray(amounts, dtype=np.int64)
+
+    # Etiketler benzersiz değerler üzerinden indekslenir (-1: bilinmeyen etiket)
+    labels, label_inverse = np.unique(np.asarray(moods, dtype=object), return_inverse=True)
+    mood_index = np.array([_MOOD_INDEX.get(label, -1) for label in labels])[label_inverse]
+
+    # (kullanıcı, gün) değiştiğinde yeni satır başlar
+    new_row = np.ones(len(rows), dtype=bool)
+    new_row[1:] = (user_ids[1:] != user_ids[:-1]) | (day_numbers[1:] != day_numbers[:-1])
+    row_index = np.cumsum(new_row) - 1
+    row_count = int(row_index[-1]) + 1
+
+    counts = np.zeros((row_count, len(MOOD_OPTIONS)))
+    known = mood_index >= 0
+    np.add.at(counts, (row_index[known], mood_index[known]), amounts[known])
+    records = np.bincount(row_index, weights=amounts, minlength=row_count).astype(np.int64)
+    return user_ids[new_row], day_numbers[new_row], counts, records
+
+
+def _stats_for_days(day_numbers: np.ndarray, counts: np.ndarray, records: np.ndarray, today: int) -> MoodStats:
+    """
+    Tek kullanıcının sıralı gün numaraları ve (gün x ruh hali) sayaç matrisinden istatistikleri hesaplar.
+    """
+    day_valence, day_arousal = score_days(counts)
+
+    first = int(day_numbers[0])
+    length = max(int(day_numbers[-1]), today) - first + 1
+    offsets = day_numbers - first
+    valence = np.full(length, np.nan)
+    arousal = np.full(length, np.nan)
+    record_counts = np.zeros(length, dtype=np.int64)
+    valence[offsets] = day_valence
+    arousal[offsets] = day_arousal
+    record_counts[offsets] = records
+
+    logged_runs = run_lengths(record_counts > 0)
+    positive_runs = run_lengths(np.nan_to_num(valence, nan=0.0) > 0)
+
+    # Değişimler kesintisiz takvim üzerinde alınır; arada kayıtsız gün olan çiftler (NaN) hesaba katılmaz,
+    # böylece haftalar arayla girilen iki kayıt tek günlük bir sıçrama gibi sayılmaz
+    changes = np.diff(valence)
+    changes = changes[~np.isnan(changes)]
+    volatility = float(np.std(changes)) if len(changes) > 1 else float("nan")
+
+    scored_days = ~np.isnan(day_valence)
+    # 1970-01-01 Perşembe olduğundan Pazartesi=0 için +3
+    weekdays = (day_numbers[scored_days] + 3) % 7
+    weekday_counts = np.bincount(weekdays, minlength=7)
+    weekday_sums = np.bincount(weekdays, weights=day_valence[scored_days], minlength=7)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weekday_valence = np.where(weekday_counts > 0, weekday_sums / weekday_counts, np.nan)
+
+    return MoodStats(
+        days=np.arange(first, first + length).astype("datetime64[D]"),
+        valence=valence,
+        arousal=arousal,
+        record_counts=record_counts,
+        rolling_7=rolling_mean(valence, 7),
+        rolling_30=rolling_mean(valence, 30),
+        current_streak=_current_run(logged_runs),
+        longest_streak=int(logged_runs.max()),
+        positive_streak=_current_run(positive_runs),
+        volatility=volatility,
+        weekday_valence=weekday_valence,
+    )
+
+
+def compute_mood_stats_batch(rows: Sequence[Tuple[int, str, str, int]],
+                             today: Optional[date] = None) -> Dict[int, MoodStats]:
+    """
+    (user_id, gün 'YYYY-MM-DD', ruh hali, adet) satırlarından (user_id, gün sırasına göre sıralı)
+    kullanıcı başına istatistikleri hesaplar. Sayaç matrisi tüm kullanıcılar için tek seferde kurulur.
+    """
+    if not rows:
+        return {}
+    row_users, row_days, counts, records = count_matrix(rows)
+    row_count = len(row_users)
+
+    today_number = int(np.datetime64(today or utc_today(), "D").astype(np.int64))
+    boundaries = np.flatnonzero(np.diff(row_users)) + 1
+    stats = {}
+    for start, end in zip(np.concatenate(([0], boundaries)), np.concatenate((boundaries, [row_count]))):
+        stats[int(row_users[start])] = _stats_for_days(row_days[start:end], counts[start:end], records[start:end],
+                                                       today_number)
+    return stats
+
+
+def compute_mood_stats(rows: Sequence[Tuple[int, str, str, int]], today: Optional[date] = None) -> Optional[MoodStats]:
+    """
+    Tek kullanıcının satırlarından istatistikleri hesaplar; kayıt yoksa None döner.
+    """
+    stats = compute_mood_stats_batch(rows, today)
+    return next(iter(stats.values()), None)
+
@@ -0,0 +1,113 @@
+"""
+Sunucu açılışında ağır bağımlılıkları arka planda önceden yükleyen warm-up thread'i.
+
+Sayfalar ağır modülleri (google.generativeai, sentence-transformers ...) ilk kullanımda import eder;
+warm-up bu maliyeti kullanıcı isteğinden önce öder. Her adımın durumu warmup_status() ile okunabilir.
+DREAMMIND_WARMUP=0 ile kapatılabilir.
+
+Veritabanı ve arka plan embedding worker'ı warm-up'tan bağımsız olarak start_background_services() ile
+süreç başına bir kez başlatılır; ana sayfa ve kayıt yazan sayfalar bunu çağırır.
+"""
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+
+WARMUP_ENABLED = os.getenv("DREAMMIND_WARMUP", "1") != "0"
+
+_services_started = False
+_services_lock = threading.Lock()
+
+
+def start_background_services() -> None:
+    """
+    Tabloları/migration'ları hazırlar ve embedding worker'ını süreç başına bir kez başlatır.
+    Worker thread'i modeli ilk grupta yükler; başlatmak ucuzdur. Sonraki çağrılar yalnızca bayrağı okur.
+    """
+    global _services_started
+    if _services_started:
+        return
+    with _services_lock:
+        if not _services_started:
+            from database.db_manager import ensure_database
+            from models.embedding_worker import start_embedding_worker
+            ensure_database()
+            start_embedding_worker()
+            _services_started = True
+
+
+def _warm_database() -> None:
+    start_background_services()
+
+
+def _warm_llm() -> None:
+    from models.gemini_client import warm_up_models
+    warm_up_models()
+
+
+def _warm_embeddings() -> None:
+    from models.embeddings import get_embedding_model
+    get_embedding_model()
+
+
+# (isim, fonksiyon) - sırayla çalıştırılır
+WARMUP_TASKS: List[Tuple[str, Callable[[], None]]] = [
+    ("database", _warm_database),
+    ("llm", _warm_llm),
+    ("embeddings", _warm_embeddings),
+]
+
+_status: Dict[str, Dict[str, Any]] = {name: {"state": "pending", "seconds": 0.0} for name, _ in WARMUP_TASKS}
+_status_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_start_lock = threading.Lock()
+
+
+def _set_status(name: str, **values: Any) -> None:
+    with _status_lock:
+        _status[name].update(values)
+
+
+def _run() -> None:
+    for name, task in WARMUP_TASKS:
+        _set_status(name, state="running")
+        started = time.perf_counter()
+        try:
+            task()
+            _set_status(name, state="ready", seconds=time.perf_counter() - started)
+        except Exception as e:
+            _set_status(name, state="failed", seconds=time.perf_counter() - started, error=str(e))
+            logger.error(f"Warm-up adımı başarısız ({name}): {e}")
+    logger.info("Warm-up tamamlandı: " + ", ".join(f"{n}={s['state']} ({s['seconds']:.1f} sn)"
+                                                   for n, s in warmup_status().items()))
+
+
+def start_warmup() -> bool:
+    """
+    Warm-up thread'ini süreç başına bir kez başlatır. Kapalıysa False döner.
+    """
+    global _thread
+    if not WARMUP_ENABLED:
+        return False
+    if _thread is None:
+        with _start_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_run, name="dreammind-warmup", daemon=True)
+                _thread.start()
+    return True
+
+
+def warmup_status() -> Dict[str, Dict[str, Any]]:
+    with _status_lock:
+        return {name: dict(values) for name, values in _status.items()}
+
+
+def is_ready(name: Optional[str] = None) -> bool:
+    """
+    Verilen adım (veya tüm adımlar) tamamlandıysa True döner.
+    """
+    status = warmup_status()
+    if name is not None:
+        return status.get(name, {}).get("state") == "ready"
+    return all(values["state"] == "ready" for values in status.values())